@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Mapping, Optional
+
+
+@dataclass
+class CompositeAnalysisResult:
+    results: Dict[str, object] = field(default_factory=dict)
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: one entry per stage plus the wall-clock total."""
+        entries = [f"{name};dur={duration:.1f}" for name, duration in self.timings_ms.items()]
+        entries.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(entries)
+
+
+class CompositeAnalysisExecutor:
+    """
+    Runs independent analysis stages, timing each.
+
+    ``process_stages`` are picklable callables handed to a worker process from
+    ``process_executor_factory`` before anything else starts, so they run
+    while the other stages do and the total approaches the slower side. The
+    other stages run one after another in this process: the analyzers are
+    mostly per-row Python loops and ``re`` calls that hold the GIL, so threads
+    made every stage slower under contention. Without a factory, or when the
+    pool is broken and cannot be rebuilt, process stages run inline as well.
+
+    A failing stage is recorded in ``errors`` and the others still run.
+    """
+
+    def __init__(self, process_executor_factory: Optional[Callable[[], Executor]] = None) -> None:
+        self._process_executor_factory = process_executor_factory
+        self._process_executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def offloads(self) -> bool:
+        """Whether ``process_stages`` go to a worker process."""
+        return self._process_executor_factory is not None
+
+    def run(
+        self,
+        stages: Mapping[str, Callable[[], object]],
+        process_stages: Optional[Mapping[str, Callable[[], object]]] = None,
+    ) -> CompositeAnalysisResult:
+        started = time.perf_counter()
+        outcome = CompositeAnalysisResult()
+        submitted = {}
+        finished_at: Dict[str, float] = {}
+        inline = dict(stages)
+        for name, stage in (process_stages or {}).items():
+            future = self._submit(stage)
+            if future is None:
+                inline[name] = stage
+                continue
+            future.add_done_callback(
+                lambda _future, name=name: finished_at.setdefault(name, time.perf_counter())
+            )
+            submitted[name] = (stage, future, time.perf_counter())
+
+        for name, stage in inline.items():
+            self._record(outcome, name, *self._timed(stage))
+        for name, (stage, future, submitted_at) in submitted.items():
+            try:
+                value, error = future.result(), None
+            except BrokenExecutor:
+                # The worker died; drop the pool and compute this stage here.
+                self._discard_process_executor()
+                self._record(outcome, name, *self._timed(stage))
+                continue
+            except Exception as exc:
+                value, error = None, exc
+            duration_ms = (finished_at.get(name, time.perf_counter()) - submitted_at) * 1000
+            self._record(outcome, name, value, error, duration_ms)
+        outcome.total_ms = (time.perf_counter() - started) * 1000
+        return outcome
+
+    def shutdown(self) -> None:
+        self._discard_process_executor()
+
+    def _submit(self, stage: Callable[[], object]):
+        if self._process_executor_factory is None:
+            return None
+        with self._lock:
+            for _attempt in range(2):
+                if self._process_executor is None:
+                    self._process_executor = self._process_executor_factory()
+                try:
+                    return self._process_executor.submit(stage)
+                except BrokenExecutor:
+                    self._discard_locked()
+        return None
+
+    def _discard_process_executor(self) -> None:
+        with self._lock:
+            self._discard_locked()
+
+    def _discard_locked(self) -> None:
+        executor, self._process_executor = self._process_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _record(outcome: CompositeAnalysisResult, name: str, value, error, duration_ms: float) -> None:
+        outcome.timings_ms[name] = duration_ms
+        if error is not None:
+            outcome.errors[name] = error
+        else:
+            outcome.results[name] = value
+
+    @staticmethod
+    def _timed(stage: Callable[[], object]):
+        started = time.perf_counter()
+        try:
+            value, error = stage(), None
+        except Exception as exc:
+            value, error = None, exc
+        return value, error, (time.perf_counter() - started) * 1000
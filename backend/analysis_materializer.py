@@ -0,0 +1,276 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from response_encoding import EncodedBody
+
+
+class AnalysisMaterializer:
+    """
+    Precomputes analysis payloads after the survey data changes.
+
+    Each payload is added with ``register(name, render)``, where ``render``
+    returns its JSON bytes; payloads registered with ``parts`` are instead
+    built by ``render(bodies)`` from those payloads' bodies, so they cost no
+    analyzer runs of their own. ``schedule`` (a survey snapshot listener)
+    marks them outdated. A daemon thread waits until no change has arrived for
+    ``debounce_seconds``, or ``max_delay_seconds`` since the first one, then
+    renders every payload and stores it in ``analysis_results``. A burst of
+    submissions therefore costs one recomputation. Each stored payload gets a
+    version number that increases per name, served as ``X-Analysis-Version``.
+
+    Payloads are tagged with ``data_version()``, and ``latest`` only returns
+    one whose tag is still current, so a failed render is never served for
+    newer data. Processes share the work: one claims a data version in
+    ``analysis_render_claims`` and renders it, the others adopt what it
+    stored. A claim older than ``claim_timeout_seconds`` (a crashed worker) is
+    taken over. Payloads are kept in memory as ``EncodedBody``, so their ETag
+    and compressed copies are made once per version.
+    ``debounce_seconds <= 0`` disables the thread.
+    """
+
+    def __init__(
+        self,
+        data_version: Callable[[], str],
+        connection_provider: Callable[[], sqlite3.Connection],
+        debounce_seconds: float = 2,
+        max_delay_seconds: float = 30,
+        compress_min_bytes: int = 1024,
+        claim_timeout_seconds: float = 120,
+        claim_poll_seconds: float = 0.5,
+    ) -> None:
+        self._renderers: Dict[str, Callable[[], Optional[bytes]]] = {}
+        # name -> (part names, render(bodies))
+        self._composites: Dict[str, Tuple[Tuple[str, ...], Callable]] = {}
+        self._data_version = data_version
+        self._connection_provider = connection_provider
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.compress_min_bytes = compress_min_bytes
+        self.claim_timeout_seconds = claim_timeout_seconds
+        self.claim_poll_seconds = claim_poll_seconds
+        self._owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._materialize_lock = threading.Lock()
+        self._first_change_at: Optional[float] = None
+        self._last_change_at: Optional[float] = None
+        self._worker: Optional[threading.Thread] = None
+        # name -> (version, data_version, body)
+        self._latest: Dict[str, Tuple[int, str, EncodedBody]] = {}
+        self.runs = 0
+        self.payloads_rendered = 0
+        self.payloads_adopted = 0
+        self.failures = 0
+        self.last_duration_seconds = 0.0
+
+    @property
+    def names(self) -> List[str]:
+        return [*self._renderers, *self._composites]
+
+    def register(self, name: str, render: Callable, parts: Sequence[str] = ()) -> None:
+        """Materialize ``render()`` as ``name``, or ``render(bodies)`` of ``parts``; ``None`` is not stored."""
+        if parts:
+            self._composites[name] = (tuple(parts), render)
+        else:
+            self._renderers[name] = render
+
+    def schedule(self, *_args) -> None:
+        """Note that the data changed; accepts (and ignores) snapshot listener arguments."""
+        if self.debounce_seconds <= 0:
+            return
+        with self._changed:
+            now = time.monotonic()
+            if self._first_change_at is None:
+                self._first_change_at = now
+            self._last_change_at = now
+            self._changed.notify()
+        self._ensure_worker()
+
+    def latest(self, name: str, data_version: str) -> Optional[Tuple[int, EncodedBody]]:
+        """``(version, body)`` of the payload for ``name``, if one was materialized for ``data_version``."""
+        with self._lock:
+            entry = self._latest.get(name)
+        if entry is None or entry[1] != data_version:
+            return None
+        return entry[0], entry[2]
+
+    def materialize(self) -> int:
+        """Bring every payload up to the current data; returns how many were rendered here."""
+        with self._materialize_lock:
+            started = time.perf_counter()
+            rendered = 0
+            while True:
+                data_version = self._data_version()
+                self._adopt_stored(data_version)
+                if not self._missing(data_version):
+                    break
+                if self._claim(data_version):
+                    try:
+                        rendered = self._render_missing(data_version)
+                    finally:
+                        self._release(data_version)
+                    break
+                # Another process is rendering this data; adopt its results once stored.
+                time.sleep(self.claim_poll_seconds)
+
+            self.runs += 1
+            self.payloads_rendered += rendered
+            self.last_duration_seconds = time.perf_counter() - started
+            return rendered
+
+    def load_latest(self) -> None:
+        """Adopt what an earlier run (or another process) stored for the current data."""
+        self._adopt_stored(self._data_version())
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._first_change_at is not None
+        return {
+            "runs": self.runs,
+            "payloads_rendered": self.payloads_rendered,
+            "payloads_adopted": self.payloads_adopted,
+            "failures": self.failures,
+            "last_duration_seconds": self.last_duration_seconds,
+            "pending": pending,
+        }
+
+    def _missing(self, data_version: str) -> List[str]:
+        return [name for name in self.names if self.latest(name, data_version) is None]
+
+    def _adopt_stored(self, data_version: str) -> None:
+        with self._connection_provider() as conn:
+            rows = conn.execute(
+                "SELECT name, version, payload FROM analysis_results WHERE data_version = ?",
+                (data_version,),
+            ).fetchall()
+        for row in rows:
+            name = row["name"]
+            if name in self.names and self.latest(name, data_version) is None:
+                self._remember(name, row["version"], data_version, row["payload"].encode("utf-8"))
+                self.payloads_adopted += 1
+
+    def _render_missing(self, data_version: str) -> int:
+        rendered = 0
+        missing = self._missing(data_version)
+        # Plain payloads first: composites are built from them.
+        for name in [name for name in missing if name in self._renderers]:
+            if self._render_one(name, data_version, self._renderers[name]):
+                rendered += 1
+        for name in [name for name in missing if name in self._composites]:
+            parts, render = self._composites[name]
+            bodies = {}
+            for part in parts:
+                latest = self.latest(part, data_version)
+                if latest is not None:
+                    bodies[part] = bytes(latest[1])
+            if len(bodies) < len(parts):
+                self.failures += 1
+                continue
+            if self._render_one(name, data_version, lambda: render(bodies)):
+                rendered += 1
+        return rendered
+
+    def _render_one(self, name: str, data_version: str, render: Callable[[], Optional[bytes]]) -> bool:
+        try:
+            body = render()
+        except Exception as exc:
+            print(f"Materializing analysis {name} failed: {exc}")
+            body = None
+        if body is None:
+            self.failures += 1
+            return False
+        version = self._store(name, data_version, body)
+        self._remember(name, version, data_version, body)
+        return True
+
+    def _claim(self, data_version: str) -> bool:
+        now = time.time()
+        with self._connection_provider() as conn:
+            conn.execute(
+                "DELETE FROM analysis_render_claims WHERE claimed_at < ?",
+                (now - self.claim_timeout_seconds,),
+            )
+            # The write lock makes this a compare-and-set across processes.
+            claimed = conn.execute(
+                """
+                INSERT INTO analysis_render_claims (data_version, owner, claimed_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(data_version) DO UPDATE SET claimed_at = excluded.claimed_at
+                WHERE owner = excluded.owner
+                """,
+                (data_version, self._owner, now),
+            ).rowcount
+            conn.commit()
+        return claimed == 1
+
+    def _release(self, data_version: str) -> None:
+        with self._connection_provider() as conn:
+            conn.execute(
+                "DELETE FROM analysis_render_claims WHERE data_version = ? AND owner = ?",
+                (data_version, self._owner),
+            )
+            conn.commit()
+
+    def _remember(self, name: str, version: int, data_version: str, body: bytes) -> None:
+        body = EncodedBody(body, self.compress_min_bytes)
+        with self._lock:
+            current = self._latest.get(name)
+            if current is None or current[1] != data_version or version >= current[0]:
+                self._latest[name] = (int(version), data_version, body)
+
+    def _store(self, name: str, data_version: str, body: bytes) -> int:
+        with self._connection_provider() as conn:
+            conn.execute(
+                """
+                INSERT INTO analysis_results (name, version, data_version, payload, computed_at)
+                VALUES (?, 1, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    version = version + 1,
+                    data_version = excluded.data_version,
+                    payload = excluded.payload,
+                    computed_at = excluded.computed_at
+                """,
+                (name, data_version, body.decode("utf-8"), datetime.utcnow().isoformat()),
+            )
+            version = conn.execute(
+                "SELECT version FROM analysis_results WHERE name = ?", (name,)
+            ).fetchone()[0]
+            conn.commit()
+        return int(version)
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run_worker,
+                name="analysis-materializer",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _run_worker(self) -> None:
+        while True:
+            with self._changed:
+                while self._first_change_at is None:
+                    self._changed.wait()
+                while True:
+                    now = time.monotonic()
+                    due_at = min(
+                        self._last_change_at + self.debounce_seconds,
+                        self._first_change_at + self.max_delay_seconds,
+                    )
+                    if now >= due_at:
+                        break
+                    self._changed.wait(due_at - now)
+                self._first_change_at = None
+                self._last_change_at = None
+            try:
+                self.materialize()
+            except Exception as exc:
+                print(f"Analysis materialization failed: {exc}")
@@ -4,6 +4,7 @@ import json
 import hashlib
 import logging
 from logging.config import dictConfig
+import multiprocessing
 import os
 import smtplib
 import sqlite3
@@ -14,14 +15,24 @@ from datetime import datetime
 from email.message import EmailMessage
 from io import BytesIO
 from uuid import uuid4
-from typing import List, Optional, Tuple, Set
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Set
 from collections import defaultdict
-from functools import wraps
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial, wraps
 from urllib import request as urllib_request
 from urllib.error import URLError, HTTPError
 
 from celery import Celery
-from flask import Flask, request, jsonify, send_from_directory, send_file, g, make_response
+from flask import (
+    Flask,
+    copy_current_request_context,
+    g,
+    jsonify,
+    make_response,
+    request,
+    send_file,
+    send_from_directory,
+)
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from flasgger import Swagger
@@ -46,6 +57,29 @@ import sentiment_analysis_family_income as income
 import sentiment_analysis_problems_in_home as home_problems
 import survey_processor
 from config import settings
+from analysis_executor import CompositeAnalysisExecutor
+from analysis_materializer import AnalysisMaterializer
+from incremental_aggregates import IncrementalAggregates
+from response_cache import TwoTierResponseCache
+from response_encoding import EncodedBody
+from rl_learning_pipeline import RLLearningPipeline
+from sqlite_pool import SQLiteConnectionPool
+from data_quality_alert_outbox import AlertOutbox, empty_alert_channels
+from data_quality_completeness import completeness_summary, missing_counts
+from data_quality_microbatch import SubmissionBatchCoalescer
+from data_quality_outliers import IQROutlierEngine
+from survey_bulk_ingest import SurveyBulkIngestor
+from survey_excel_mirror import SurveyExcelMirror
+from survey_stream_ingest import (
+    NormalizedChunkSpool,
+    StreamingQualityMetrics,
+    chunked,
+    iter_csv_records,
+    iter_ndjson_records,
+)
+from survey_preprocessing import PreparedSurveyFrame
+from survey_snapshot import SurveySnapshot
+from training_scheduler import BackgroundTrainingScheduler
 from vector_store import PgVectorStore
 from pdf_utils import pdf_bytesio, generate_pdf_bytes
 from hierarchical_regression import run_career_confidence_models
@@ -123,7 +157,11 @@ def _normalize_background_analysis_result(payload, error_message: Optional[str]
     return _empty_background_analysis_result(error_message)
 
 
-def _run_background_analysis(include_details: bool):
+def _run_background_analysis(
+    frame: pd.DataFrame,
+    include_details: bool,
+    prepared: Optional[PreparedSurveyFrame] = None,
+):
     global background
 
     last_error = None
@@ -131,7 +169,13 @@ def _run_background_analysis(include_details: bool):
         try:
             if should_reload:
                 background = importlib.reload(background)
-            results = background.get_background_sentiment(data, persist_artifacts=False)
+            results = background.get_background_sentiment(
+                frame,
+                persist_artifacts=False,
+                include_details=include_details,
+                prepared=prepared,
+                **_rl_read_options("background"),
+            )
             normalized = _normalize_background_analysis_result(results)
             if not include_details and "background_details" in normalized:
                 del normalized["background_details"]
@@ -221,67 +265,96 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 swagger = Swagger(app)
 celery_app = make_celery(app)
 redis_client = get_redis_client()
-_in_memory_cache_store = {}
+# Analytics responses: serialized bytes in a per-process LRU, backed by Redis.
+analytics_response_cache = TwoTierResponseCache(
+    redis_client,
+    max_entries=settings.analytics_local_cache_max_entries,
+    max_bytes=settings.analytics_local_cache_max_bytes,
+    stale_seconds=settings.analytics_cache_stale_seconds,
+    fill_lock_seconds=settings.analytics_cache_fill_lock_seconds,
+    version_poll_seconds=settings.analytics_cache_version_poll_seconds,
+    compress_min_bytes=settings.analytics_compress_min_bytes,
+)
 _in_memory_rate_store = {}
 _request_metrics = {
     "total_requests": 0,
     "error_responses": 0,
     "total_latency_ms": 0.0,
+    "not_modified_responses": 0,
     "endpoint_stats": defaultdict(lambda: {"count": 0, "errors": 0, "latency_ms": 0.0}),
 }
 
+# One WAL-mode connection per thread, shared by every get_db_connection() on it.
+db_pool = SQLiteConnectionPool(
+    path_provider=lambda: settings.database_path,
+    busy_timeout_ms=settings.sqlite_busy_timeout_ms,
+    mmap_size_bytes=settings.sqlite_mmap_size_bytes,
+    cached_statements=settings.sqlite_cached_statements,
+)
+
 # Global variable declaration
 global data
 data = None
+# Readers take frames from here instead of re-parsing Childsurvey.xlsx per request.
+survey_snapshot = SurveySnapshot(
+    [*SURVEY_COLUMNS, "timestamp"],
+    refresh_interval_seconds=settings.survey_snapshot_refresh_seconds,
+)
+# Running analyzer counters, folded forward by each snapshot append.
+analysis_aggregates = IncrementalAggregates(
+    {
+        "background": lambda: background,
+        "income": lambda: income,
+        "home_problems": lambda: home_problems,
+    }
+)
+survey_snapshot.add_listener(analysis_aggregates.update)
+# Default /api/analysis/* payloads, recomputed off the request path after new surveys.
+analysis_materializer = AnalysisMaterializer(
+    data_version=lambda: _materialized_data_version(),
+    connection_provider=lambda: get_db_connection(),
+    debounce_seconds=settings.analysis_materialize_debounce_seconds,
+    max_delay_seconds=settings.analysis_materialize_max_delay_seconds,
+    compress_min_bytes=settings.analytics_compress_min_bytes,
+)
+survey_snapshot.add_listener(analysis_materializer.schedule)
+# Submissions are logged here and folded into Childsurvey.xlsx by the compactor.
+survey_excel_mirror = SurveyExcelMirror(
+    path_provider=lambda: SURVEY_EXCEL_PATH,
+    preferred_columns=["Timestamp", *SURVEY_COLUMNS, "Date of Birth", "timestamp"],
+    value_lookup=lambda row, column: _lookup_payload_value(row, column),
+    compaction_interval_seconds=settings.survey_excel_compaction_seconds,
+)
 
 
-def _cache_get(key: str):
-    if not settings.analytics_cache_enabled:
-        return None
-
-    try:
-        raw = redis_client.get(key)
-        if raw is None:
-            return None
-        return json.loads(raw)
-    except Exception:
-        # Fallback keeps local/dev behavior predictable when Redis is unavailable.
-        entry = _in_memory_cache_store.get(key)
-        if not entry:
-            return None
-        expires_at, payload = entry
-        if expires_at <= time.time():
-            _in_memory_cache_store.pop(key, None)
-            return None
-        return payload
-
-
-def _cache_set(key: str, payload, ttl_seconds: int):
-    if not settings.analytics_cache_enabled:
-        return
+# What cached responses depend on. Writes invalidate only the tags they touch.
+CACHE_TAG_SURVEYS = "surveys"
+CACHE_TAG_DQ_BATCHES = "dq_batches"
+CACHE_TAG_DQ_ALERTS = "dq_alerts"
+CACHE_TAG_DQ_ALERT_CONFIG = "dq_alert_config"
 
-    if ttl_seconds <= 0:
-        ttl_seconds = settings.analytics_cache_ttl_seconds
 
-    try:
-        redis_client.setex(key, ttl_seconds, json.dumps(payload))
-    except Exception:
-        _in_memory_cache_store[key] = (time.time() + ttl_seconds, payload)
+def _cache_version_tag(depends_on: Tuple[str, ...]) -> str:
+    versions = analytics_response_cache.versions(depends_on)
+    parts = [f"{tag}={versions[tag]}" for tag in depends_on]
+    if CACHE_TAG_SURVEYS in depends_on:
+        # Also catches surveys this process's snapshot picked up from other workers;
+        # workers holding the same rows agree on it, so they can share entries.
+        parts.append(f"snapshot={survey_snapshot.data_version}")
+    return "|".join(parts)
 
 
-def _get_cache_version() -> int:
-    try:
-        raw_version = redis_client.get("analytics:cache:version")
-        return int(raw_version or 0)
-    except Exception:
-        return 0
+def invalidate_cached_responses(*tags: str):
+    analytics_response_cache.invalidate(*tags)
 
 
-def _bump_cache_version():
-    try:
-        redis_client.incr("analytics:cache:version")
-    except Exception:
-        _in_memory_cache_store.clear()
+def _invalidate_after_ingest(result: dict):
+    tags = [CACHE_TAG_DQ_BATCHES]
+    if result["metrics"]["inserted_rows"]:
+        tags.append(CACHE_TAG_SURVEYS)
+    if result["alerts"]:
+        tags.append(CACHE_TAG_DQ_ALERTS)
+    invalidate_cached_responses(*tags)
 
 
 def _is_valid_analysis_cache_payload(cache_namespace: str, payload) -> bool:
@@ -312,31 +385,98 @@ def _is_valid_analysis_cache_payload(cache_namespace: str, payload) -> bool:
     return required_background_keys.issubset(background_payload.keys())
 
 
-def cached_json_response(cache_namespace: str, ttl_seconds: Optional[int] = None):
+def cached_json_response(
+    cache_namespace: str,
+    depends_on: Tuple[str, ...] = (CACHE_TAG_SURVEYS,),
+    ttl_seconds: Optional[int] = None,
+    stale_while_revalidate: bool = False,
+    materialized: bool = False,
+    materialized_from: Tuple[str, ...] = (),
+    bypass_when: Optional[Callable[[], bool]] = None,
+):
+    """
+    Cache 200 JSON responses per request path until their TTL runs out or one
+    of the ``depends_on`` tags is invalidated. Concurrent misses for one path
+    are computed once. With ``stale_while_revalidate``, an outdated entry is
+    served at once (``X-Cache: STALE``) while it is recomputed in the background.
+    With ``materialized``, the request without query parameters is answered
+    from the payload ``analysis_materializer`` stored for the current survey
+    data, when there is one; ``materialized_from`` builds that payload from
+    other materialized namespaces instead of calling the view.
+    Requests for which ``bypass_when()`` is true are computed every time
+    (``X-Cache: BYPASS``), for responses that report live state.
+    """
+
     def decorator(func):
+        if materialized_from:
+            analysis_materializer.register(
+                cache_namespace,
+                lambda bodies: _compose_materialized_analysis(cache_namespace, materialized_from, bodies),
+                parts=materialized_from,
+            )
+        elif materialized:
+            analysis_materializer.register(
+                cache_namespace, lambda: _render_materialized_analysis(cache_namespace, func)
+            )
+
         @wraps(func)
         def wrapper(*args, **kwargs):
+            if materialized and not request.args:
+                latest = analysis_materializer.latest(
+                    cache_namespace, _materialized_data_version()
+                )
+                if latest is not None:
+                    version, body = latest
+                    response = _encoded_body_response(body)
+                    response.headers["X-Analysis-Version"] = str(version)
+                    return response
+
+            if not settings.analytics_cache_enabled:
+                response = make_response(func(*args, **kwargs))
+                response.headers["X-Cache"] = "MISS"
+                return response
+            if bypass_when is not None and bypass_when():
+                response = make_response(func(*args, **kwargs))
+                response.headers["X-Cache"] = "BYPASS"
+                return response
+
             ttl = ttl_seconds or settings.analytics_cache_ttl_seconds
-            version = _get_cache_version()
+            version_tag = _cache_version_tag(depends_on)
             key_payload = (
-                f"{cache_namespace}|v={version}|method={request.method}|path={request.full_path}"
+                f"{cache_namespace}|method={request.method}|path={request.full_path}"
             )
             cache_key = "analytics:cache:" + hashlib.sha256(
                 key_payload.encode("utf-8")
             ).hexdigest()
 
-            cached_payload = _cache_get(cache_key)
-            if cached_payload is not None and _is_valid_analysis_cache_payload(cache_namespace, cached_payload):
-                response = jsonify(cached_payload)
-                response.headers["X-Cache"] = "HIT"
+            def compute():
+                response = make_response(func(*args, **kwargs))
+                if response.status_code == 200 and response.is_json:
+                    body = response.get_json(silent=True)
+                    if body is not None and _is_valid_analysis_cache_payload(cache_namespace, body):
+                        stored = analytics_response_cache.set(
+                            cache_key, version_tag, response.get_data(), ttl
+                        )
+                        return _encoded_body_response(stored, response)
                 return response
 
-            result = func(*args, **kwargs)
-            response = make_response(result)
-            if response.status_code == 200 and response.is_json:
-                body = response.get_json(silent=True)
-                if body is not None and _is_valid_analysis_cache_payload(cache_namespace, body):
-                    _cache_set(cache_key, body, ttl)
+            cached_body, state = analytics_response_cache.get(cache_key, version_tag)
+            if state == "stale" and stale_while_revalidate:
+                @copy_current_request_context
+                def revalidate():
+                    with analytics_response_cache.single_flight(cache_key, version_tag) as filled:
+                        if filled is None:
+                            compute()
+
+                analytics_response_cache.refresh_in_background(cache_key, revalidate)
+                return _cached_body_response(cached_body, "STALE")
+            if state == "hit":
+                return _cached_body_response(cached_body, "HIT")
+
+            with analytics_response_cache.single_flight(cache_key, version_tag) as filled:
+                if filled is not None:
+                    return _cached_body_response(filled, "HIT")
+                response = compute()
             response.headers["X-Cache"] = "MISS"
             return response
 
@@ -345,6 +485,71 @@ def cached_json_response(cache_namespace: str, ttl_seconds: Optional[int] = None
     return decorator
 
 
+def _render_materialized_analysis(cache_namespace: str, func) -> Optional[bytes]:
+    """Run an analysis view for its default request; ``None`` unless it produced a healthy payload."""
+    path = next(app.url_map.iter_rules(func.__name__)).rule
+    with app.test_request_context(path):
+        response = make_response(func())
+    if response.status_code != 200 or not response.is_json:
+        return None
+    if not _is_valid_analysis_cache_payload(cache_namespace, response.get_json(silent=True)):
+        return None
+    return response.get_data()
+
+
+def _compose_materialized_analysis(
+    cache_namespace: str, parts: Tuple[str, ...], bodies: Dict[str, bytes]
+) -> Optional[bytes]:
+    """The complete-analysis payload from the materialized per-analyzer bodies."""
+    payload = {}
+    for part in parts:
+        key = part[len("analysis_"):]
+        payload[key] = json.loads(bodies[part])
+    # The composite endpoints default to the background summary without details.
+    payload["background"].pop("background_details", None)
+    if payload["background"].get("error"):
+        return None
+    payload["totalSurveys"] = len(survey_snapshot)
+    if not _is_valid_analysis_cache_payload(cache_namespace, payload):
+        return None
+    with app.app_context():
+        return jsonify(payload).get_data()
+
+
+def _materialized_data_version() -> str:
+    # Refresh first so the version matches the frame the views are about to read.
+    get_survey_data()
+    return survey_snapshot.data_version
+
+
+def _cached_body_response(body: EncodedBody, cache_state: str):
+    # Stored bytes were validated on the way in and are served as-is.
+    response = _encoded_body_response(body)
+    response.headers["X-Cache"] = cache_state
+    return response
+
+
+def _encoded_body_response(body: EncodedBody, response=None):
+    """
+    Serve stored JSON with its ETag: ``304`` when the client already has it,
+    otherwise in the best precompressed encoding it accepts.
+    """
+    if response is None:
+        response = app.response_class(mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+    encoding, data, etag = body.negotiate(request.headers.get("Accept-Encoding"))
+    response.headers["ETag"] = etag
+    if body.matches(request.headers.get("If-None-Match")):
+        _request_metrics["not_modified_responses"] += 1
+        response.status_code = 304
+        response.set_data(b"")
+        return response
+    response.set_data(data)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
 def rate_limited(scope: str):
     def decorator(func):
         @wraps(func)
@@ -507,6 +712,9 @@ def metrics():
         "# HELP visionary_request_error_ratio Request error ratio",
         "# TYPE visionary_request_error_ratio gauge",
         f"visionary_request_error_ratio {error_ratio:.6f}",
+        "# HELP visionary_not_modified_responses_total Conditional analytics requests answered with 304",
+        "# TYPE visionary_not_modified_responses_total counter",
+        f"visionary_not_modified_responses_total {_request_metrics['not_modified_responses']}",
         "# HELP visionary_request_latency_ms_avg Average request latency in ms",
         "# TYPE visionary_request_latency_ms_avg gauge",
         f"visionary_request_latency_ms_avg {avg_latency:.3f}",
@@ -525,14 +733,176 @@ def metrics():
             f'visionary_endpoint_request_latency_ms_avg{{path="{safe_label}"}} {endpoint_avg:.3f}'
         )
 
+    feature_cache_stats = getattr(behavioral, "feature_profile_cache_stats", None)
+    if callable(feature_cache_stats):
+        cache_stats = feature_cache_stats()
+        lines.extend(
+            [
+                "# HELP visionary_behavioral_feature_cache_hits_total Feature-profile cache hits",
+                "# TYPE visionary_behavioral_feature_cache_hits_total counter",
+                f"visionary_behavioral_feature_cache_hits_total {cache_stats['hits']}",
+                "# HELP visionary_behavioral_feature_cache_misses_total Feature-profile cache misses",
+                "# TYPE visionary_behavioral_feature_cache_misses_total counter",
+                f"visionary_behavioral_feature_cache_misses_total {cache_stats['misses']}",
+                "# HELP visionary_behavioral_feature_cache_size Cached feature profiles",
+                "# TYPE visionary_behavioral_feature_cache_size gauge",
+                f"visionary_behavioral_feature_cache_size {cache_stats['size']}",
+            ]
+        )
+
+    model_registry_stats = getattr(behavioral, "behavioral_model_registry_stats", None)
+    if callable(model_registry_stats):
+        registry_stats = model_registry_stats()
+        lines.extend(
+            [
+                "# HELP visionary_behavioral_model_parameters Parameters in the served behavioral model",
+                "# TYPE visionary_behavioral_model_parameters gauge",
+                f"visionary_behavioral_model_parameters {registry_stats['parameter_count']}",
+                "# HELP visionary_behavioral_model_reloads_total Behavioral checkpoint reloads",
+                "# TYPE visionary_behavioral_model_reloads_total counter",
+                f"visionary_behavioral_model_reloads_total {registry_stats['reloads']}",
+            ]
+        )
+        if registry_stats["version"] is not None:
+            lines.extend(
+                [
+                    "# HELP visionary_behavioral_model_version Promoted behavioral model version",
+                    "# TYPE visionary_behavioral_model_version gauge",
+                    f"visionary_behavioral_model_version {registry_stats['version']}",
+                    "# HELP visionary_behavioral_model_loaded_timestamp_seconds When the served model was loaded",
+                    "# TYPE visionary_behavioral_model_loaded_timestamp_seconds gauge",
+                    f"visionary_behavioral_model_loaded_timestamp_seconds {registry_stats['loaded_at']:.3f}",
+                ]
+            )
+
+    learning_stats = rl_learning_pipeline.stats()
+    lines.extend(
+        [
+            "# HELP visionary_rl_learning_pending_experiences RL experiences queued by score-only reads",
+            "# TYPE visionary_rl_learning_pending_experiences gauge",
+            f"visionary_rl_learning_pending_experiences {learning_stats['pending']}",
+            "# HELP visionary_rl_learning_experiences_applied_total RL experiences applied by the learning pipeline",
+            "# TYPE visionary_rl_learning_experiences_applied_total counter",
+            f"visionary_rl_learning_experiences_applied_total {learning_stats['experiences_applied']}",
+        ]
+    )
+
+    alert_stats = data_quality_alert_outbox.stats()
+    lines.extend(
+        [
+            "# HELP visionary_dq_alert_deliveries_pending Data-quality alert deliveries waiting in the outbox",
+            "# TYPE visionary_dq_alert_deliveries_pending gauge",
+            f"visionary_dq_alert_deliveries_pending {alert_stats['pending']}",
+            "# HELP visionary_dq_alert_deliveries_delivered_total Data-quality alert deliveries that succeeded",
+            "# TYPE visionary_dq_alert_deliveries_delivered_total counter",
+            f"visionary_dq_alert_deliveries_delivered_total {alert_stats['delivered']}",
+            "# HELP visionary_dq_alert_deliveries_retried_total Failed data-quality alert attempts scheduled for retry",
+            "# TYPE visionary_dq_alert_deliveries_retried_total counter",
+            f"visionary_dq_alert_deliveries_retried_total {alert_stats['retried']}",
+            "# HELP visionary_dq_alert_deliveries_failed_total Data-quality alert deliveries abandoned after the last retry",
+            "# TYPE visionary_dq_alert_deliveries_failed_total counter",
+            f"visionary_dq_alert_deliveries_failed_total {alert_stats['failed']}",
+        ]
+    )
+
+    response_cache_stats = analytics_response_cache.stats()
+    lines.extend(
+        [
+            "# HELP visionary_analytics_cache_local_hits_total Analytics responses served from the in-process cache",
+            "# TYPE visionary_analytics_cache_local_hits_total counter",
+            f"visionary_analytics_cache_local_hits_total {response_cache_stats['local_hits']}",
+            "# HELP visionary_analytics_cache_redis_hits_total Analytics responses served from Redis",
+            "# TYPE visionary_analytics_cache_redis_hits_total counter",
+            f"visionary_analytics_cache_redis_hits_total {response_cache_stats['redis_hits']}",
+            "# HELP visionary_analytics_cache_stale_hits_total Outdated analytics responses served while they were recomputed",
+            "# TYPE visionary_analytics_cache_stale_hits_total counter",
+            f"visionary_analytics_cache_stale_hits_total {response_cache_stats['stale_hits']}",
+            "# HELP visionary_analytics_cache_coalesced_total Cache misses answered by another request's computation",
+            "# TYPE visionary_analytics_cache_coalesced_total counter",
+            f"visionary_analytics_cache_coalesced_total {response_cache_stats['coalesced']}",
+            "# HELP visionary_analytics_cache_misses_total Analytics responses computed on a cache miss",
+            "# TYPE visionary_analytics_cache_misses_total counter",
+            f"visionary_analytics_cache_misses_total {response_cache_stats['misses']}",
+            "# HELP visionary_analytics_cache_local_evictions_total In-process analytics cache evictions",
+            "# TYPE visionary_analytics_cache_local_evictions_total counter",
+            f"visionary_analytics_cache_local_evictions_total {response_cache_stats['evictions']}",
+            "# HELP visionary_analytics_cache_local_bytes Bytes held by the in-process analytics cache",
+            "# TYPE visionary_analytics_cache_local_bytes gauge",
+            f"visionary_analytics_cache_local_bytes {response_cache_stats['bytes']}",
+        ]
+    )
+
+    pool_stats = db_pool.stats()
+    lines.extend(
+        [
+            "# HELP visionary_sqlite_pool_checkouts_total SQLite connection checkouts",
+            "# TYPE visionary_sqlite_pool_checkouts_total counter",
+            f"visionary_sqlite_pool_checkouts_total {pool_stats['checkouts']}",
+            "# HELP visionary_sqlite_pool_connection_open_seconds_total Time spent opening and configuring SQLite connections",
+            "# TYPE visionary_sqlite_pool_connection_open_seconds_total counter",
+            f"visionary_sqlite_pool_connection_open_seconds_total {pool_stats['connection_open_seconds']:.6f}",
+            "# HELP visionary_sqlite_pool_connections_opened_total SQLite connections opened",
+            "# TYPE visionary_sqlite_pool_connections_opened_total counter",
+            f"visionary_sqlite_pool_connections_opened_total {pool_stats['connections_opened']}",
+            "# HELP visionary_sqlite_pool_open_connections Pooled SQLite connections currently open",
+            "# TYPE visionary_sqlite_pool_open_connections gauge",
+            f"visionary_sqlite_pool_open_connections {pool_stats['open_connections']}",
+            "# HELP visionary_sqlite_pool_stale_transactions_rolled_back_total Uncommitted transactions discarded at checkout",
+            "# TYPE visionary_sqlite_pool_stale_transactions_rolled_back_total counter",
+            f"visionary_sqlite_pool_stale_transactions_rolled_back_total {pool_stats['stale_transactions_rolled_back']}",
+        ]
+    )
+
+    aggregate_stats = analysis_aggregates.stats()
+    lines.extend(
+        [
+            "# HELP visionary_analysis_aggregate_rows_folded_total Survey rows folded into running analyzer counters",
+            "# TYPE visionary_analysis_aggregate_rows_folded_total counter",
+            f"visionary_analysis_aggregate_rows_folded_total {aggregate_stats['rows_folded']}",
+            "# HELP visionary_analysis_aggregate_rebuilds_total Running analyzer counters rebuilt from scratch",
+            "# TYPE visionary_analysis_aggregate_rebuilds_total counter",
+            f"visionary_analysis_aggregate_rebuilds_total {aggregate_stats['rebuilds']}",
+        ]
+    )
+
+    materializer_stats = analysis_materializer.stats()
+    lines.extend(
+        [
+            "# HELP visionary_analysis_materializations_total Materialization runs after survey data changed",
+            "# TYPE visionary_analysis_materializations_total counter",
+            f"visionary_analysis_materializations_total {materializer_stats['runs']}",
+            "# HELP visionary_analysis_materialized_payloads_total Analysis payloads recomputed and stored",
+            "# TYPE visionary_analysis_materialized_payloads_total counter",
+            f"visionary_analysis_materialized_payloads_total {materializer_stats['payloads_rendered']}",
+            "# HELP visionary_analysis_materialized_adopted_total Stored analysis payloads taken over from another process",
+            "# TYPE visionary_analysis_materialized_adopted_total counter",
+            f"visionary_analysis_materialized_adopted_total {materializer_stats['payloads_adopted']}",
+            "# HELP visionary_analysis_materialize_failures_total Analysis payloads that could not be materialized",
+            "# TYPE visionary_analysis_materialize_failures_total counter",
+            f"visionary_analysis_materialize_failures_total {materializer_stats['failures']}",
+            "# HELP visionary_analysis_materialize_duration_seconds Duration of the last materialization run",
+            "# TYPE visionary_analysis_materialize_duration_seconds gauge",
+            f"visionary_analysis_materialize_duration_seconds {materializer_stats['last_duration_seconds']:.6f}",
+        ]
+    )
+
+    role_model_stats = getattr(rolemodels, "role_model_weights_stats", None)
+    if callable(role_model_stats):
+        weights_stats = role_model_stats()
+        lines.extend(
+            [
+                "# HELP visionary_role_model_weights_persisted_version Role-model RL weight versions written to disk",
+                "# TYPE visionary_role_model_weights_persisted_version counter",
+                f"visionary_role_model_weights_persisted_version {weights_stats['persisted_version']}",
+            ]
+        )
+
     return ("\n".join(lines) + "\n", 200, {"Content-Type": "text/plain; version=0.0.4"})
 
 
 def get_db_connection():
-    """Create a new SQLite connection for the authentication store."""
-    conn = sqlite3.connect(settings.database_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """This thread's pooled SQLite connection (use as ``with get_db_connection() as conn``)."""
+    return db_pool.connection()
 
 
 def init_auth_db():
@@ -788,44 +1158,32 @@ def compute_survey_row_hash(row: dict) -> str:
     return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
+# Batch ingestion and the legacy seed hash and insert rows in bulk.
+survey_bulk_ingestor = SurveyBulkIngestor(
+    SURVEY_COLUMNS,
+    chunk_size=settings.survey_ingest_chunk_size,
+)
+
+
 def seed_surveys_from_dataframe(df: Optional[pd.DataFrame]):
     """Populate the surveys table with surveys sourced from the legacy Excel file."""
     if df is None or df.empty:
         return
 
     records = df.to_dict("records")
-    inserted = 0
 
     try:
+        normalized_rows = [
+            {column: _normalize_survey_value(record.get(column)) for column in SURVEY_COLUMNS}
+            for record in records
+        ]
+        seeded_at = datetime.utcnow().isoformat()
+        timestamps = [
+            _normalize_survey_value(record.get("timestamp")) or seeded_at
+            for record in records
+        ]
         with get_db_connection() as conn:
-            for record in records:
-                normalized_row = {
-                    column: _normalize_survey_value(record.get(column))
-                    for column in SURVEY_COLUMNS
-                }
-                survey_hash = compute_survey_row_hash(normalized_row)
-                timestamp_value = (
-                    _normalize_survey_value(record.get("timestamp"))
-                    or datetime.utcnow().isoformat()
-                )
-
-                placeholders = ",".join(["?"] * (len(SURVEY_COLUMNS) + 3))
-                columns_sql = ",".join(f'"{col}"' for col in SURVEY_COLUMNS)
-
-                cursor = conn.execute(
-                    f"""
-                    INSERT OR IGNORE INTO surveys ({columns_sql}, "timestamp", unique_hash, source)
-                    VALUES ({placeholders})
-                    """,
-                    [
-                        *(normalized_row.get(col) for col in SURVEY_COLUMNS),
-                        timestamp_value,
-                        survey_hash,
-                        "legacy",
-                    ],
-                )
-                inserted += cursor.rowcount or 0
-
+            inserted = survey_bulk_ingestor.insert(conn, normalized_rows, timestamps, "legacy")
             conn.commit()
             if inserted:
                 print(f"Seeded {inserted} survey records into SQLite.")
@@ -843,6 +1201,35 @@ DATA_QUALITY_NUMERIC_COLUMNS = {
 }
 
 
+def init_analysis_results_table():
+    """Ensure the tables holding materialized analysis payloads and render claims exist."""
+    try:
+        with get_db_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS analysis_results (
+                    name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    data_version TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    computed_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS analysis_render_claims (
+                    data_version TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    claimed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+    except sqlite3.Error as exc:
+        print(f"Error initializing analysis results table: {exc}")
+
+
 def init_data_quality_tables():
     """Create tables for data quality monitoring and alerting."""
     try:
@@ -909,6 +1296,34 @@ def init_data_quality_tables():
                 )
                 """
             )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS data_quality_alert_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    batch_id TEXT NOT NULL,
+                    channel TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL,
+                    last_error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    FOREIGN KEY(batch_id) REFERENCES data_quality_batches(batch_id) ON DELETE CASCADE
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS data_quality_outlier_sketches (
+                    field_name TEXT PRIMARY KEY,
+                    sketch TEXT NOT NULL,
+                    value_count INTEGER NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
 
             default_config = (
                 1,
@@ -942,6 +1357,14 @@ def init_data_quality_tables():
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_data_quality_alerts_batch_id ON data_quality_alerts(batch_id)"
             )
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_data_quality_field_metrics_batch_field "
+                "ON data_quality_field_metrics(batch_id, field_name)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_data_quality_alert_outbox_due "
+                "ON data_quality_alert_outbox(status, next_attempt_at)"
+            )
             conn.commit()
     except Exception as exc:
         print(f"Error initializing data quality tables: {exc}")
@@ -957,96 +1380,44 @@ def _safe_float(value):
         return None
 
 
-def _calculate_outlier_counts(normalized_rows: List[dict]):
-    field_outlier_counts = {field: 0 for field in DATA_QUALITY_NUMERIC_COLUMNS.keys()}
-    row_outlier_count = 0
+# Outlier bounds come from quantile sketches persisted across batches.
+data_quality_outlier_engine = IQROutlierEngine(
+    DATA_QUALITY_NUMERIC_COLUMNS,
+    parse_number=_safe_float,
+    sketch_k=settings.dq_outlier_sketch_k,
+    bounds_scope=settings.dq_outlier_bounds_scope,
+)
+
 
+def _calculate_outlier_counts(
+    normalized_rows: List[dict], conn: Optional[sqlite3.Connection] = None
+):
+    """Rows with any outlier and per-field counts; ``conn`` also updates the stored population."""
     if not normalized_rows:
-        return row_outlier_count, field_outlier_counts
-
-    value_buckets = {field: [] for field in DATA_QUALITY_NUMERIC_COLUMNS.keys()}
-    row_numeric_values = []
-
-    for row in normalized_rows:
-        numeric_snapshot = {}
-        for field in DATA_QUALITY_NUMERIC_COLUMNS.keys():
-            parsed = _safe_float(row.get(field))
-            numeric_snapshot[field] = parsed
-            if parsed is not None:
-                value_buckets[field].append(parsed)
-        row_numeric_values.append(numeric_snapshot)
-
-    iqr_bounds = {}
-    for field, values in value_buckets.items():
-        if len(values) >= 4:
-            series = pd.Series(values, dtype=float)
-            q1 = float(series.quantile(0.25))
-            q3 = float(series.quantile(0.75))
-            iqr = q3 - q1
-            iqr_bounds[field] = (q1 - 1.5 * iqr, q3 + 1.5 * iqr)
-
-    for numeric_snapshot in row_numeric_values:
-        row_has_outlier = False
-        for field, limits in DATA_QUALITY_NUMERIC_COLUMNS.items():
-            value = numeric_snapshot.get(field)
-            if value is None:
-                continue
-
-            static_outlier = value < limits["min"] or value > limits["max"]
-            iqr_outlier = False
-            if field in iqr_bounds:
-                lower, upper = iqr_bounds[field]
-                iqr_outlier = value < lower or value > upper
-
-            if static_outlier or iqr_outlier:
-                field_outlier_counts[field] += 1
-                row_has_outlier = True
-
-        if row_has_outlier:
-            row_outlier_count += 1
-
-    return row_outlier_count, field_outlier_counts
-
-
-def compute_batch_quality_metrics(normalized_rows: List[dict], inserted_rows: int):
-    total_rows = len(normalized_rows)
-    total_cells = total_rows * len(SURVEY_COLUMNS)
-    missing_cells = 0
-    field_metrics = []
-
-    outlier_rows, field_outlier_counts = _calculate_outlier_counts(normalized_rows)
-
-    for field in SURVEY_COLUMNS:
-        missing_count = 0
-        for row in normalized_rows:
-            if _normalize_survey_value(row.get(field)) is None:
-                missing_count += 1
-        missing_cells += missing_count
-        total_count = total_rows
-        completeness_ratio = (
-            (total_count - missing_count) / total_count if total_count else 1.0
-        )
-        field_metrics.append(
-            {
-                "field_name": field,
-                "total_count": total_count,
-                "missing_count": missing_count,
-                "completeness_ratio": round(completeness_ratio, 4),
-                "outlier_count": int(field_outlier_counts.get(field, 0)),
-            }
-        )
+        return 0, {field: 0 for field in DATA_QUALITY_NUMERIC_COLUMNS.keys()}
+    return data_quality_outlier_engine.count_outliers(normalized_rows, conn)
+
 
-    completeness_score = (
-        (total_cells - missing_cells) / total_cells if total_cells else 1.0
+def compute_batch_quality_metrics(
+    normalized_rows: List[dict],
+    inserted_rows: int,
+    conn: Optional[sqlite3.Connection] = None,
+):
+    total_rows = len(normalized_rows)
+    outlier_rows, field_outlier_counts = _calculate_outlier_counts(normalized_rows, conn)
+    field_metrics, completeness_score = completeness_summary(
+        SURVEY_COLUMNS,
+        missing_counts(normalized_rows, SURVEY_COLUMNS),
+        total_rows,
+        field_outlier_counts,
     )
-    duplicate_rows = max(total_rows - inserted_rows, 0)
 
     return {
         "total_rows": total_rows,
         "inserted_rows": inserted_rows,
-        "duplicate_rows": duplicate_rows,
+        "duplicate_rows": max(total_rows - inserted_rows, 0),
         "outlier_rows": outlier_rows,
-        "completeness_score": round(completeness_score, 4),
+        "completeness_score": completeness_score,
         "field_metrics": field_metrics,
     }
 
@@ -1126,18 +1497,18 @@ def save_data_quality_batch(
         ),
     )
 
-    for item in metrics["field_metrics"]:
-        conn.execute(
-            """
-            INSERT INTO data_quality_field_metrics (
-                batch_id,
-                field_name,
-                total_count,
-                missing_count,
-                completeness_ratio,
-                outlier_count
-            ) VALUES (?, ?, ?, ?, ?, ?)
-            """,
+    conn.executemany(
+        """
+        INSERT INTO data_quality_field_metrics (
+            batch_id,
+            field_name,
+            total_count,
+            missing_count,
+            completeness_ratio,
+            outlier_count
+        ) VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        [
             (
                 batch_id,
                 item["field_name"],
@@ -1145,8 +1516,10 @@ def save_data_quality_batch(
                 item["missing_count"],
                 item["completeness_ratio"],
                 item["outlier_count"],
-            ),
-        )
+            )
+            for item in metrics["field_metrics"]
+        ],
+    )
 
 
 def backfill_data_quality_from_surveys():
@@ -1189,6 +1562,7 @@ def backfill_data_quality_from_surveys():
             metrics = compute_batch_quality_metrics(
                 normalized_rows=normalized_rows,
                 inserted_rows=len(normalized_rows),
+                conn=conn,
             )
             save_data_quality_batch(
                 conn=conn,
@@ -1206,6 +1580,27 @@ def backfill_data_quality_from_surveys():
         print(f"Error backfilling data quality data: {exc}")
 
 
+def seed_data_quality_outlier_population():
+    """Build the outlier population sketches from stored surveys when none are persisted yet."""
+    try:
+        with get_db_connection() as conn:
+            if conn.execute("SELECT 1 FROM data_quality_outlier_sketches LIMIT 1").fetchone():
+                return
+            columns_sql = ",".join(f'"{column}"' for column in DATA_QUALITY_NUMERIC_COLUMNS)
+            survey_rows = conn.execute(f"SELECT {columns_sql} FROM surveys").fetchall()
+            if not survey_rows:
+                return
+            population = data_quality_outlier_engine.new_sketches()
+            data_quality_outlier_engine.add_to_sketches(
+                population,
+                data_quality_outlier_engine.numeric_matrix([dict(row) for row in survey_rows]),
+            )
+            data_quality_outlier_engine.save_population(conn, population)
+            conn.commit()
+    except Exception as exc:
+        print(f"Error seeding data quality outlier sketches: {exc}")
+
+
 def evaluate_data_quality_alerts(metrics: dict, config: dict):
     fired = []
 
@@ -1279,10 +1674,8 @@ def _post_json(url: str, payload: dict):
         return False, str(exc)
 
 
-def dispatch_data_quality_alerts(batch_id: str, alerts: List[dict], config: dict):
-    if not alerts:
-        return {"email": [], "webhook": [], "slack": []}
-
+def build_data_quality_alert_messages(batch_id: str, alerts: List[dict], config: dict):
+    """``(channel, target, payload)`` for every configured alert target."""
     batch_link = f"{settings.frontend_base_url.rstrip('/')}/monitoring?batchId={batch_id}"
     alert_lines = "\n".join(f"- {item['message']}" for item in alerts)
     plain_message = (
@@ -1291,16 +1684,14 @@ def dispatch_data_quality_alerts(batch_id: str, alerts: List[dict], config: dict
         f"{alert_lines}"
     )
 
-    delivery = {"email": [], "webhook": [], "slack": []}
-
+    messages = []
     for email in config.get("email_recipients", []):
-        success, error = send_generic_email(
-            email,
-            f"Data Quality Alert - Batch {batch_id}",
-            plain_message,
-        )
-        delivery["email"].append(
-            {"target": email, "success": bool(success), "error": error}
+        messages.append(
+            (
+                "email",
+                email,
+                {"subject": f"Data Quality Alert - Batch {batch_id}", "body": plain_message},
+            )
         )
 
     webhook_payload = {
@@ -1310,28 +1701,108 @@ def dispatch_data_quality_alerts(batch_id: str, alerts: List[dict], config: dict
         "alerts": alerts,
     }
     for url in config.get("webhook_urls", []):
-        success, error = _post_json(url, webhook_payload)
-        delivery["webhook"].append(
-            {"target": url, "success": bool(success), "error": error}
-        )
+        messages.append(("webhook", url, webhook_payload))
 
     slack_url = config.get("slack_webhook_url")
     if slack_url:
-        success, error = _post_json(
-            slack_url,
-            {
-                "text": (
-                    f":warning: Data quality threshold breached for batch `{batch_id}`.\n"
-                    f"{alert_lines}\n"
-                    f"Review: {batch_link}"
-                )
-            },
-        )
-        delivery["slack"].append(
-            {"target": slack_url, "success": bool(success), "error": error}
+        messages.append(
+            (
+                "slack",
+                slack_url,
+                {
+                    "text": (
+                        f":warning: Data quality threshold breached for batch `{batch_id}`.\n"
+                        f"{alert_lines}\n"
+                        f"Review: {batch_link}"
+                    )
+                },
+            )
         )
 
-    return delivery
+    return messages
+
+
+# Alert emails and webhooks are delivered from this outbox, off the request path.
+data_quality_alert_outbox = AlertOutbox(
+    connection_provider=lambda: get_db_connection(),
+    senders={
+        "email": lambda target, payload: send_generic_email(
+            target, payload["subject"], payload["body"]
+        ),
+        "webhook": lambda target, payload: _post_json(target, payload),
+        "slack": lambda target, payload: _post_json(target, payload),
+    },
+    poll_interval_seconds=settings.dq_alert_poll_seconds,
+    max_attempts=settings.dq_alert_max_attempts,
+    retry_base_seconds=settings.dq_alert_retry_base_seconds,
+    target_concurrency=settings.dq_alert_target_concurrency,
+    max_workers=settings.dq_alert_delivery_workers,
+    on_settled=lambda _batch_id: invalidate_cached_responses(CACHE_TAG_DQ_ALERTS),
+)
+
+
+def queue_data_quality_alerts(
+    conn: sqlite3.Connection,
+    batch_id: str,
+    alerts: List[dict],
+    config: dict,
+):
+    """Record ``alerts`` and queue their deliveries in the caller's transaction."""
+    if not alerts:
+        return empty_alert_channels()
+
+    channels = data_quality_alert_outbox.enqueue(
+        conn, batch_id, build_data_quality_alert_messages(batch_id, alerts, config)
+    )
+    persist_data_quality_alerts(conn=conn, batch_id=batch_id, alerts=alerts, channels=channels)
+    return channels
+
+
+# Single submissions share rolling data-quality batches instead of one batch each.
+submission_batch_coalescer = SubmissionBatchCoalescer(
+    SURVEY_COLUMNS,
+    window_seconds=settings.dq_single_batch_window_seconds,
+    max_rows=settings.dq_single_batch_max_rows,
+)
+
+
+def record_submission_quality(
+    conn: sqlite3.Connection,
+    normalized_submission: dict,
+    inserted_rows: int,
+    ingested_at: str,
+):
+    """
+    Fold one submission into its rolling quality batch and queue alerts for the
+    batch's running metrics. A metric alerts at most once per batch.
+
+    Returns ``(batch_id, submission_metrics, alerts)``.
+    """
+    metrics = compute_batch_quality_metrics([normalized_submission], inserted_rows, conn)
+    batch_id = submission_batch_coalescer.batch_id_for(conn)
+    batch_metrics = submission_batch_coalescer.fold(
+        conn,
+        batch_id=batch_id,
+        schema_version=settings.data_quality_default_schema_version or "v1",
+        source="submit_survey",
+        ingested_at=ingested_at,
+        metrics=metrics,
+    )
+    alert_config = get_data_quality_alert_config(conn)
+    alerted_metrics = {
+        row["metric_name"]
+        for row in conn.execute(
+            "SELECT DISTINCT metric_name FROM data_quality_alerts WHERE batch_id = ?",
+            (batch_id,),
+        )
+    }
+    alerts = [
+        item
+        for item in evaluate_data_quality_alerts(batch_metrics, alert_config)
+        if item["metric_name"] not in alerted_metrics
+    ]
+    queue_data_quality_alerts(conn, batch_id, alerts, alert_config)
+    return batch_id, metrics, alerts
 
 
 def persist_data_quality_alerts(
@@ -1585,6 +2056,65 @@ def generate_pdf_task(title: str, sections: Optional[List[dict]] = None):
     }
 
 
+@celery_app.task(name="tasks.compact_survey_excel")
+def compact_survey_excel_task():
+    return {"success": True, "rows": survey_excel_mirror.compact()}
+
+
+@celery_app.task(name="tasks.train_behavioral_model")
+def train_behavioral_model_task(records: List[dict]):
+    return behavioral.train_behavioral_from_records(records)
+
+
+behavioral_training_scheduler = BackgroundTrainingScheduler(
+    train_fn_provider=lambda: behavioral.train_behavioral_from_records,
+    backend=settings.behavioral_training_backend,
+    celery_task=train_behavioral_model_task,
+)
+
+
+def _training_records(frame: pd.DataFrame) -> List[dict]:
+    """JSON-safe copy of the snapshot rows handed to the background trainer."""
+    return frame.astype(object).where(pd.notnull(frame), None).to_dict("records")
+
+
+def _rl_learner(name: str):
+    module = {"rolemodel": rolemodels, "income": income, "background": background}.get(name)
+    return getattr(module, "learn_from_experiences", None)
+
+
+def _analysis_process_executor() -> Executor:
+    # Spawned like the training workers: no torch state is forked out of the web process.
+    return ProcessPoolExecutor(
+        max_workers=settings.analytics_process_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# /api/analysis/complete* run the analyzers through this, timing each stage.
+composite_analysis_executor = CompositeAnalysisExecutor(
+    process_executor_factory=(
+        _analysis_process_executor if settings.analytics_process_workers > 0 else None
+    )
+)
+
+# Score-only analytics reads queue their RL experiences here; learning runs in batches.
+rl_learning_pipeline = RLLearningPipeline(
+    learner_provider=_rl_learner,
+    flush_interval_seconds=settings.rl_learning_flush_seconds,
+)
+
+
+def _rl_read_options(name: str) -> dict:
+    """Analyzer kwargs for GET endpoints: read the RL models, queue the learning."""
+    if settings.analytics_rl_mode != "score_only":
+        return {}
+    return {
+        "score_only": True,
+        "experience_sink": rl_learning_pipeline.sink(name, dedupe_key=survey_snapshot.data_version),
+    }
+
+
 @app.errorhandler(HTTPException)
 def handle_http_exception(exc: HTTPException):
     response = exc.get_response()
@@ -1635,17 +2165,7 @@ def normalize_date_of_birth(date_value) -> Optional[str]:
         raise ValueError("Date of Birth must be in YYYY-MM-DD format.")
 
 
-def ingest_survey_batch_records(
-    records: List[dict],
-    schema_version: Optional[str] = None,
-    source: str = "api_batch",
-    batch_id: Optional[str] = None,
-):
-    if not isinstance(records, list) or not records:
-        raise ValueError("Records must be a non-empty array.")
-
-    normalized_rows = []
-    inserted_rows = 0
+def _new_batch_identity(schema_version: Optional[str], batch_id: Optional[str]):
     batch_identifier = str(batch_id).strip() if batch_id is not None else ""
     if not batch_identifier:
         batch_identifier = f"batch_{uuid4().hex[:12]}"
@@ -1654,63 +2174,47 @@ def ingest_survey_batch_records(
         or settings.data_quality_default_schema_version
         or "v1"
     )
-    ingested_at = datetime.utcnow().isoformat()
-    columns_sql = ",".join(f'"{col}"' for col in SURVEY_COLUMNS)
-    placeholders = ",".join(["?"] * (len(SURVEY_COLUMNS) + 3))
+    return batch_identifier, schema
 
-    with get_db_connection() as conn:
-        for record in records:
-            if not isinstance(record, dict):
-                raise ValueError("Each record must be an object.")
-
-            normalized_row = {
-                column: _normalize_survey_value(record.get(column))
-                for column in SURVEY_COLUMNS
-            }
-            normalized_rows.append(normalized_row)
-            survey_hash = compute_survey_row_hash(normalized_row)
-            timestamp_value = (
-                _normalize_survey_value(record.get("timestamp")) or ingested_at
-            )
 
-            cursor = conn.execute(
-                f"""
-                INSERT OR IGNORE INTO surveys ({columns_sql}, "timestamp", unique_hash, source)
-                VALUES ({placeholders})
-                """,
-                [
-                    *(normalized_row.get(col) for col in SURVEY_COLUMNS),
-                    timestamp_value,
-                    survey_hash,
-                    f"batch:{batch_identifier}:{source}",
-                ],
-            )
-            inserted_rows += cursor.rowcount or 0
-
-        metrics = compute_batch_quality_metrics(normalized_rows, inserted_rows)
-        config = get_data_quality_alert_config(conn)
-        save_data_quality_batch(
-            conn=conn,
-            batch_id=batch_identifier,
-            schema_version=schema,
-            source=source,
-            ingested_at=ingested_at,
-            metrics=metrics,
-        )
-        alerts = evaluate_data_quality_alerts(metrics, config)
-        conn.commit()
+def _normalize_batch_chunk(records: List[dict], ingested_at: str):
+    if not all(isinstance(record, dict) for record in records):
+        raise ValueError("Each record must be an object.")
+    normalized_rows = [
+        {column: _normalize_survey_value(record.get(column)) for column in SURVEY_COLUMNS}
+        for record in records
+    ]
+    timestamps = [
+        _normalize_survey_value(record.get("timestamp")) or ingested_at for record in records
+    ]
+    return normalized_rows, timestamps
 
-    delivery = dispatch_data_quality_alerts(batch_identifier, alerts, config)
 
+def _finish_ingested_batch(
+    conn: sqlite3.Connection,
+    batch_identifier: str,
+    schema: str,
+    source: str,
+    ingested_at: str,
+    metrics: dict,
+):
+    """Record the batch's metrics and queue its data-quality alerts, then commit."""
+    config = get_data_quality_alert_config(conn)
+    save_data_quality_batch(
+        conn=conn,
+        batch_id=batch_identifier,
+        schema_version=schema,
+        source=source,
+        ingested_at=ingested_at,
+        metrics=metrics,
+    )
+    alerts = evaluate_data_quality_alerts(metrics, config)
+    delivery = queue_data_quality_alerts(conn, batch_identifier, alerts, config)
+    conn.commit()
     if alerts:
-        with get_db_connection() as conn:
-            persist_data_quality_alerts(
-                conn=conn,
-                batch_id=batch_identifier,
-                alerts=alerts,
-                channels=delivery,
-            )
-            conn.commit()
+        data_quality_alert_outbox.wake()
+    if metrics["inserted_rows"]:
+        survey_snapshot.sync(conn)
 
     return {
         "batchId": batch_identifier,
@@ -1723,6 +2227,73 @@ def ingest_survey_batch_records(
     }
 
 
+def ingest_survey_batch_records(
+    records: List[dict],
+    schema_version: Optional[str] = None,
+    source: str = "api_batch",
+    batch_id: Optional[str] = None,
+):
+    if not isinstance(records, list) or not records:
+        raise ValueError("Records must be a non-empty array.")
+
+    batch_identifier, schema = _new_batch_identity(schema_version, batch_id)
+    ingested_at = datetime.utcnow().isoformat()
+    normalized_rows, timestamps = _normalize_batch_chunk(records, ingested_at)
+
+    with get_db_connection() as conn:
+        inserted_rows = survey_bulk_ingestor.insert(
+            conn, normalized_rows, timestamps, f"batch:{batch_identifier}:{source}"
+        )
+        metrics = compute_batch_quality_metrics(normalized_rows, inserted_rows, conn)
+        return _finish_ingested_batch(
+            conn, batch_identifier, schema, source, ingested_at, metrics
+        )
+
+
+def ingest_survey_record_stream(
+    records: Iterable[dict],
+    schema_version: Optional[str] = None,
+    source: str = "api_stream",
+    batch_id: Optional[str] = None,
+):
+    """
+    Ingest records from an iterator (e.g. a streamed request body) in chunks.
+
+    Only one chunk is held in memory at a time; data-quality metrics are
+    accumulated with ``StreamingQualityMetrics``. The records are read, parsed
+    and spooled to a temporary file first, so the write transaction only
+    opens once the whole body has arrived and a slow upload never holds the
+    database lock. The batch is still one transaction, and a malformed record
+    is rejected before anything is inserted.
+    """
+    batch_identifier, schema = _new_batch_identity(schema_version, batch_id)
+    ingested_at = datetime.utcnow().isoformat()
+    row_source = f"batch:{batch_identifier}:{source}"
+    quality = StreamingQualityMetrics(SURVEY_COLUMNS, data_quality_outlier_engine)
+    spool = NormalizedChunkSpool()
+    try:
+        for chunk in chunked(records, survey_bulk_ingestor.chunk_size):
+            normalized_rows, timestamps = _normalize_batch_chunk(chunk, ingested_at)
+            spool.add(normalized_rows, timestamps)
+            quality.add_rows(normalized_rows)
+        if quality.total_rows == 0:
+            raise ValueError("Request body must contain at least one record.")
+
+        with get_db_connection() as conn:
+            inserted_rows = 0
+            for normalized_rows, timestamps in spool.chunks():
+                inserted_rows += survey_bulk_ingestor.insert(
+                    conn, normalized_rows, timestamps, row_source
+                )
+            metrics = quality.finalize(inserted_rows, conn)
+            return _finish_ingested_batch(
+                conn, batch_identifier, schema, source, ingested_at, metrics
+            )
+    finally:
+        spool.close()
+        quality.close()
+
+
 def _candidate_paths(filename: str):
     if filename.lower() == "childsurvey.xlsx":
         return [SURVEY_EXCEL_PATH]
@@ -1732,6 +2303,10 @@ def _candidate_paths(filename: str):
 
 def _load_from_known_locations():
     """Load survey data from Excel from likely backend/runtime paths."""
+    try:
+        survey_excel_mirror.compact()
+    except Exception as e:
+        print(f"Failed compacting pending survey rows: {e}")
     excel_candidates = _candidate_paths('Childsurvey.xlsx')
 
     for path in excel_candidates:
@@ -1748,10 +2323,10 @@ def _load_from_known_locations():
 
 def append_submission_to_excel(submission: dict, created_at: Optional[str] = None):
     """
-    Mirror a submitted survey row into backend/Childsurvey.xlsx.
-    Keeps existing columns intact and appends missing columns when needed.
+    Queue a submitted survey row for backend/Childsurvey.xlsx.
+    The row lands in the workbook on the next compaction, which keeps existing
+    columns intact and appends missing columns when needed.
     """
-    excel_path = SURVEY_EXCEL_PATH
     row_timestamp = created_at or datetime.utcnow().isoformat()
 
     row_payload = {
@@ -1765,25 +2340,7 @@ def append_submission_to_excel(submission: dict, created_at: Optional[str] = Non
     )
     row_payload["timestamp"] = row_timestamp
 
-    preferred_columns = ["Timestamp", *SURVEY_COLUMNS, "Date of Birth", "timestamp"]
-    if os.path.exists(excel_path):
-        existing_df = pd.read_excel(excel_path, sheet_name=0)
-    else:
-        existing_df = pd.DataFrame(columns=preferred_columns)
-
-    for column in row_payload.keys():
-        if column not in existing_df.columns:
-            existing_df[column] = None
-
-    ordered_columns = list(existing_df.columns)
-    if "timestamp" not in ordered_columns:
-        ordered_columns.append("timestamp")
-
-    append_df = pd.DataFrame(
-        [{column: _lookup_payload_value(row_payload, column) for column in ordered_columns}]
-    )
-    updated_df = pd.concat([existing_df, append_df], ignore_index=True)
-    updated_df.to_excel(excel_path, index=False)
+    survey_excel_mirror.append(row_payload)
 
 
 def load_initial_data():
@@ -1792,14 +2349,63 @@ def load_initial_data():
     if data is None:
         print("No initial data loaded. Place Childsurvey.xlsx in the backend directory.")
 
+
+def load_survey_snapshot():
+    """Populate the in-memory snapshot from SQLite, falling back to the workbook."""
+    global data
+    last_rowid = None
+    try:
+        with get_db_connection() as conn:
+            survey_snapshot.sync(conn)
+            last_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM surveys").fetchone()[0]
+    except sqlite3.Error as exc:
+        print(f"Failed to load survey snapshot from database: {exc}")
+
+    if survey_snapshot.is_empty and data is not None:
+        # The workbook already covers the rows seeded from it; later syncs add only newer ones.
+        survey_snapshot.load_frame(data, last_rowid=last_rowid)
+    if not survey_snapshot.is_empty:
+        data = survey_snapshot.frame()
+
+
+def get_survey_data() -> Optional[pd.DataFrame]:
+    """Return the current survey frame, or None when no surveys are available."""
+    global data
+    try:
+        survey_snapshot.refresh_if_due(get_db_connection)
+    except sqlite3.Error as exc:
+        print(f"Survey snapshot refresh failed: {exc}")
+
+    if survey_snapshot.is_empty:
+        return None
+    data = survey_snapshot.frame()
+    return data
+
+
+def get_prepared_survey_data() -> Optional[PreparedSurveyFrame]:
+    """Like ``get_survey_data``, with the analyzers' shared preprocessing for that version.
+
+    Use ``prepared.data`` as the frame so both always come from the same snapshot version.
+    """
+    if get_survey_data() is None:
+        return None
+    return survey_snapshot.derived(PreparedSurveyFrame)
+
+
 # Load data once at startup
 load_initial_data()
 init_surveys_table()
 seed_surveys_from_dataframe(data)
+load_survey_snapshot()
 init_auth_db()
 init_assessments_db()
 init_data_quality_tables()
 backfill_data_quality_from_surveys()
+seed_data_quality_outlier_population()
+data_quality_alert_outbox.resume_pending()
+init_analysis_results_table()
+analysis_materializer.load_latest()
+analysis_materializer.schedule()
 
 
 def readiness_report():
@@ -2216,100 +2822,189 @@ def verify_account(verification_token: str):
 
 @app.route('/api/analysis/background', methods=['GET'])
 @rate_limited("analysis")
-@cached_json_response("analysis_background")
+@cached_json_response("analysis_background", stale_while_revalidate=True, materialized=True)
 def get_background_analysis():
-    global data
-    latest_data = _load_from_known_locations()
-    if latest_data is not None:
-        data = latest_data
-    if data is None:
-        load_initial_data()
-    if data is None or len(data) == 0:
+    prepared = get_prepared_survey_data()
+    frame = prepared.data if prepared is not None else None
+    if frame is None or len(frame) == 0:
         return jsonify(_empty_background_analysis_result("Data not loaded")), 200
     
     try:
         # Get include_details parameter (default to True for backward compatibility)
         include_details = request.args.get('include_details', 'true').lower() == 'true'
-        results, _error = _run_background_analysis(include_details)
+        results, _error = _run_background_analysis(frame, include_details, prepared)
         return jsonify(results)
     except Exception as e:
         logger.exception("background_analysis_route_failed")
         return jsonify(_empty_background_analysis_result(str(e))), 200
 
+def _behavioral_full_mode() -> bool:
+    return request.args.get('full', 'false').lower() == 'true'
+
+
 @app.route('/api/analysis/behavioral', methods=['GET'])
 @rate_limited("analysis")
-@cached_json_response("analysis_behavioral")
+@cached_json_response(
+    "analysis_behavioral",
+    stale_while_revalidate=True,
+    materialized=True,
+    # Full mode reports the live training job, which must not be frozen in a cached body.
+    bypass_when=_behavioral_full_mode,
+)
 def get_behavioral_analysis():
-    if data is None:
+    prepared = get_prepared_survey_data()
+    frame = prepared.data if prepared is not None else None
+    if frame is None:
         return jsonify({"error": "Data not loaded"}), 500
     
     try:
-        full_mode = request.args.get('full', 'false').lower() == 'true'
+        full_mode = _behavioral_full_mode()
         # Default to responsive mode so one heavy request does not block overview APIs.
+        # Full mode serves the promoted model and leaves training to the background trainer.
         results = behavioral.analyze_behavioral_impact(
-            data,
-            allow_training=full_mode,
+            frame,
+            allow_training=False,
             lightweight=not full_mode,
+            prepared=prepared,
         )
+        if full_mode:
+            results["training_job"] = behavioral_training_scheduler.schedule(
+                lambda: _training_records(frame)
+            )
         return jsonify(results)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/analysis/rolemodel', methods=['GET'])
 @rate_limited("analysis")
-@cached_json_response("analysis_rolemodel")
+@cached_json_response("analysis_rolemodel", stale_while_revalidate=True, materialized=True)
 def get_rolemodel_analysis():
-    if data is None:
+    prepared = get_prepared_survey_data()
+    frame = prepared.data if prepared is not None else None
+    if frame is None:
         return jsonify({"error": "Data not loaded"}), 500
     
     try:
-        results = rolemodels.analyze_role_model(data)
+        results = rolemodels.analyze_role_model(
+            frame, prepared=prepared, **_rl_read_options("rolemodel")
+        )
         return jsonify(results)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/analysis/income', methods=['GET'])
 @rate_limited("analysis")
-@cached_json_response("analysis_income")
+@cached_json_response("analysis_income", stale_while_revalidate=True, materialized=True)
 def get_income_analysis():
-    if data is None:
+    prepared = get_prepared_survey_data()
+    frame = prepared.data if prepared is not None else None
+    if frame is None:
         return jsonify({"error": "Data not loaded"}), 500
     
     try:
-        results = income.get_income_sentiment(data)
+        results = income.get_income_sentiment(
+            frame, prepared=prepared, **_rl_read_options("income")
+        )
         return jsonify(results)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/analysis/home-problems', methods=['GET'])
 @rate_limited("analysis")
-@cached_json_response("analysis_home_problems")
+@cached_json_response("analysis_home_problems", stale_while_revalidate=True, materialized=True)
 def get_home_problems_analysis():
-    if data is None:
+    prepared = get_prepared_survey_data()
+    frame = prepared.data if prepared is not None else None
+    if frame is None:
         return jsonify({"error": "Data not loaded"}), 500
 
     try:
-        results = home_problems.analyze_problems_in_home(data)
+        results = home_problems.analyze_problems_in_home(frame, prepared=prepared)
         return jsonify(results)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Built from the individual payloads, so materializing them runs no analyzer twice.
+COMPOSITE_ANALYSIS_PARTS = (
+    "analysis_background",
+    "analysis_behavioral",
+    "analysis_rolemodel",
+    "analysis_income",
+    "analysis_home_problems",
+)
+
+
+def _composite_analysis_response(
+    prepared: PreparedSurveyFrame, include_details: bool, log_label: str
+):
+    """Run the five analyzers and merge them into the complete-analysis payload."""
+    frame = prepared.data
+    stages = {
+        "background": lambda: _run_background_analysis(frame, include_details, prepared),
+        "rolemodel": lambda: rolemodels.analyze_role_model(
+            frame, prepared=prepared, **_rl_read_options("rolemodel")
+        ),
+        "income": lambda: income.get_income_sentiment(
+            frame, prepared=prepared, **_rl_read_options("income")
+        ),
+        "home_problems": lambda: home_problems.analyze_problems_in_home(
+            frame, prepared=prepared
+        ),
+    }
+    # Use full dataset for complete overview while keeping lightweight mode for speed.
+    # Behavioral needs no RL sink, so it can go to a worker process (shipped as the
+    # frame alone: the prepared frame holds a lock and is rebuilt there).
+    behavioral_stage = partial(
+        behavioral.analyze_behavioral_impact, frame, allow_training=False, lightweight=True
+    )
+    process_stages = {}
+    if composite_analysis_executor.offloads:
+        process_stages["behavioral"] = behavioral_stage
+    else:
+        stages["behavioral"] = partial(behavioral_stage, prepared=prepared)
+    outcome = composite_analysis_executor.run(stages, process_stages)
+
+    analysis_errors = {}
+    background_results, background_error = outcome.results.get(
+        "background", (_empty_background_analysis_result("Background analysis failed"), None)
+    )
+    if background_error:
+        analysis_errors["background"] = background_error
+    for name, error in outcome.errors.items():
+        print(f"{log_label} {name} error: {error}")
+        analysis_errors[name] = str(error)
+
+    payload = {
+        "background": background_results,
+        "behavioral": outcome.results.get("behavioral", {}),
+        "rolemodel": outcome.results.get("rolemodel", {}),
+        "income": outcome.results.get("income", {}),
+        "home_problems": outcome.results.get("home_problems", {}),
+        "totalSurveys": len(frame)
+    }
+    if analysis_errors:
+        payload["analysis_errors"] = analysis_errors
+    response = jsonify(payload)
+    response.headers["Server-Timing"] = outcome.server_timing()
+    return response
+
 @app.route('/api/analysis/complete', methods=['GET'])
 @rate_limited("analysis")
-@cached_json_response("analysis_complete")
+@cached_json_response(
+    "analysis_complete",
+    stale_while_revalidate=True,
+    materialized=True,
+    materialized_from=COMPOSITE_ANALYSIS_PARTS,
+)
 def get_complete_analysis():
-    # If not loaded yet, attempt to load; otherwise respond with empty analysis
-    global data
-    latest_data = _load_from_known_locations()
-    if latest_data is not None:
-        data = latest_data
-    if data is None:
-        load_initial_data()
+    # Respond with an empty analysis until surveys are available
+    prepared = get_prepared_survey_data()
+    frame = prepared.data if prepared is not None else None
 
     # Get include_details parameter (default to false to exclude background details)
     include_details = request.args.get('include_details', 'false').lower() == 'true'
 
-    if data is None or len(data) == 0:
+    if frame is None or len(frame) == 0:
         empty_resp = {
             "background": _empty_background_analysis_result("Data not loaded"),
             "behavioral": {},
@@ -2320,111 +3015,39 @@ def get_complete_analysis():
         }
         return jsonify(empty_resp)
 
-    analysis_errors = {}
-
-    bg, background_error = _run_background_analysis(include_details)
-    if background_error:
-        analysis_errors["background"] = background_error
-
-    try:
-        # Use full dataset for complete overview while keeping lightweight mode for speed.
-        beh = behavioral.analyze_behavioral_impact(data, allow_training=False, lightweight=True)
-    except Exception as e:
-        print(f"complete analysis behavioral error: {e}")
-        beh = {}
-        analysis_errors["behavioral"] = str(e)
-
-    try:
-        rm = rolemodels.analyze_role_model(data)
-    except Exception as e:
-        print(f"complete analysis rolemodel error: {e}")
-        rm = {}
-        analysis_errors["rolemodel"] = str(e)
-
-    try:
-        inc = income.get_income_sentiment(data)
-    except Exception as e:
-        print(f"complete analysis income error: {e}")
-        inc = {}
-        analysis_errors["income"] = str(e)
-
-    try:
-        home = home_problems.analyze_problems_in_home(data)
-    except Exception as e:
-        print(f"complete analysis home problems error: {e}")
-        home = {}
-        analysis_errors["home_problems"] = str(e)
-
-    response_payload = {
-        "background": bg,
-        "behavioral": beh,
-        "rolemodel": rm,
-        "income": inc,
-        "home_problems": home,
-        "totalSurveys": len(data)
-    }
-    if analysis_errors:
-        response_payload["analysis_errors"] = analysis_errors
-    return jsonify(response_payload)
+    return _composite_analysis_response(prepared, include_details, "complete analysis")
 
 @app.route('/api/analysis/complete-summary', methods=['GET'])
 @rate_limited("analysis")
-@cached_json_response("analysis_complete_summary")
+@cached_json_response(
+    "analysis_complete_summary",
+    stale_while_revalidate=True,
+    materialized=True,
+    materialized_from=COMPOSITE_ANALYSIS_PARTS,
+)
 def get_complete_summary():
     """New endpoint that returns all analyses without detailed background data"""
-    global data
-    latest_data = _load_from_known_locations()
-    if latest_data is not None:
-        data = latest_data
-    if data is None:
+    prepared = get_prepared_survey_data()
+    frame = prepared.data if prepared is not None else None
+    if frame is None:
         return jsonify({"error": "Data not loaded"}), 500
     
-    analysis_errors = {}
+    return _composite_analysis_response(prepared, False, "complete-summary")
 
-    background_results, background_error = _run_background_analysis(include_details=False)
-    if background_error:
-        analysis_errors["background"] = background_error
-
-    try:
-        behavioral_results = behavioral.analyze_behavioral_impact(
-            data, allow_training=False, lightweight=True
-        )
-    except Exception as e:
-        print(f"complete-summary behavioral error: {e}")
-        behavioral_results = {}
-        analysis_errors["behavioral"] = str(e)
-
-    try:
-        rolemodel_results = rolemodels.analyze_role_model(data)
-    except Exception as e:
-        print(f"complete-summary rolemodel error: {e}")
-        rolemodel_results = {}
-        analysis_errors["rolemodel"] = str(e)
 
-    try:
-        income_results = income.get_income_sentiment(data)
-    except Exception as e:
-        print(f"complete-summary income error: {e}")
-        income_results = {}
-        analysis_errors["income"] = str(e)
-
-    try:
-        home_problem_results = home_problems.analyze_problems_in_home(data)
-    except Exception as e:
-        print(f"complete-summary home problems error: {e}")
-        home_problem_results = {}
-        analysis_errors["home_problems"] = str(e)
-
-    payload = {
-        "background": background_results,
-        "behavioral": behavioral_results,
-        "rolemodel": rolemodel_results,
-        "income": income_results,
-        "home_problems": home_problem_results,
-        "totalSurveys": len(data)
-    }
-    if analysis_errors:
-        payload["analysis_errors"] = analysis_errors
+@app.route('/api/analysis/counters', methods=['GET'])
+@rate_limited("analysis")
+def get_analysis_counters():
+    """
+    Summary counters from the incrementally maintained aggregates, in O(1) of
+    the survey count. The other analysis endpoints keep computing from the
+    snapshot: their payloads include per-row details and model metadata that
+    the counters do not hold.
+    """
+    get_survey_data()
+    generation, frame = survey_snapshot.view()
+    payload = analysis_aggregates.summaries(generation, frame)
+    payload["totalSurveys"] = len(frame)
     return jsonify(payload)
 
 
@@ -2479,7 +3102,7 @@ def ingest_surveys_batch():
             source=source,
             batch_id=batch_id,
         )
-        _bump_cache_version()
+        _invalidate_after_ingest(result)
         return jsonify({"success": True, **result}), 201
     except ValueError as exc:
         return jsonify({"error": str(exc)}), 400
@@ -2490,9 +3113,68 @@ def ingest_surveys_batch():
         return jsonify({"error": "Unable to ingest batch."}), 500
 
 
+STREAM_INGEST_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+@app.route('/api/data-quality/ingest-surveys-stream', methods=['POST'])
+@rate_limited("ingestion")
+def ingest_surveys_stream():
+    """
+    Streaming variant of ``ingest-surveys-batch`` for large uploads.
+
+    The body is NDJSON (one record per line) or CSV with a header row, chosen by
+    Content-Type or ``?format=ndjson|csv``; ``batchId``, ``schemaVersion`` and
+    ``source`` come from the query string. The response matches the batch endpoint.
+    """
+    user, error_response = authenticate_request()
+    if error_response:
+        payload, status_code = error_response
+        return jsonify(payload), status_code
+
+    role_error = require_role(user, {"school_admin"})
+    if role_error:
+        payload, status_code = role_error
+        return jsonify(payload), status_code
+
+    body_format = (
+        request.args.get("format") or STREAM_INGEST_FORMATS.get(request.mimetype, "")
+    ).strip().lower()
+    if body_format == "csv":
+        records = iter_csv_records(request.stream, numeric_columns=DATA_QUALITY_NUMERIC_COLUMNS)
+    elif body_format == "ndjson":
+        records = iter_ndjson_records(request.stream)
+    else:
+        return jsonify({"error": "Send NDJSON (application/x-ndjson) or CSV (text/csv)."}), 415
+
+    try:
+        result = ingest_survey_record_stream(
+            records,
+            schema_version=request.args.get("schemaVersion"),
+            source=str(request.args.get("source") or "api_stream").strip(),
+            batch_id=request.args.get("batchId"),
+        )
+        _invalidate_after_ingest(result)
+        return jsonify({"success": True, **result}), 201
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except sqlite3.IntegrityError:
+        return jsonify({"error": "batchId already exists. Use a unique batchId."}), 409
+    except Exception as exc:
+        logger.error("stream_ingestion_failed", extra={"error": str(exc)})
+        return jsonify({"error": "Unable to ingest batch."}), 500
+
+
 @app.route('/api/data-quality/monitoring', methods=['GET'])
 @rate_limited("analytics_reads")
-@cached_json_response("data_quality_monitoring")
+@cached_json_response(
+    "data_quality_monitoring",
+    depends_on=(CACHE_TAG_DQ_BATCHES, CACHE_TAG_DQ_ALERTS, CACHE_TAG_DQ_ALERT_CONFIG),
+)
 def get_data_quality_monitoring():
     user, error_response = authenticate_request()
     if error_response:
@@ -2590,7 +3272,10 @@ def get_data_quality_monitoring():
 
 @app.route('/api/data-quality/batches/<batch_id>', methods=['GET'])
 @rate_limited("analytics_reads")
-@cached_json_response("data_quality_batch_details")
+@cached_json_response(
+    "data_quality_batch_details",
+    depends_on=(CACHE_TAG_DQ_BATCHES, CACHE_TAG_DQ_ALERTS),
+)
 def get_data_quality_batch_details(batch_id: str):
     user, error_response = authenticate_request()
     if error_response:
@@ -2821,6 +3506,7 @@ def update_data_quality_alert_config_route():
         )
         conn.commit()
         updated_config = get_data_quality_alert_config(conn)
+    invalidate_cached_responses(CACHE_TAG_DQ_ALERT_CONFIG)
 
     return jsonify(
         {
@@ -2967,52 +3653,36 @@ def submit_survey():
             print(f"Failed to persist assessment: {exc}")
             return jsonify({"error": "Unable to save assessment."}), 500
         
-        # Reload the data to include the new entry (search known locations)
-        data = _load_from_known_locations()
+        # Pull the new row into the shared snapshot instead of re-reading the workbook
+        try:
+            with get_db_connection() as conn:
+                survey_snapshot.sync(conn)
+        except sqlite3.Error as exc:
+            print(f"Failed to refresh survey snapshot: {exc}")
+        data = get_survey_data()
 
         inserted_rows = 0 if pre_existing else 1
-        single_batch_metrics = compute_batch_quality_metrics(
-            [normalized_submission],
-            inserted_rows,
-        )
-        single_batch_id = f"single_{uuid4().hex[:12]}"
-        single_schema_version = settings.data_quality_default_schema_version or "v1"
-        single_source = "submit_survey"
-        single_ingested_at = created_at
+        single_batch_id = None
         alerts = []
-        alert_delivery = {"email": [], "webhook": [], "slack": []}
 
         try:
             with get_db_connection() as conn:
-                save_data_quality_batch(
-                    conn=conn,
-                    batch_id=single_batch_id,
-                    schema_version=single_schema_version,
-                    source=single_source,
-                    ingested_at=single_ingested_at,
-                    metrics=single_batch_metrics,
+                single_batch_id, single_batch_metrics, alerts = record_submission_quality(
+                    conn, normalized_submission, inserted_rows, created_at
                 )
-                alert_config = get_data_quality_alert_config(conn)
-                alerts = evaluate_data_quality_alerts(single_batch_metrics, alert_config)
                 conn.commit()
-
-            alert_delivery = dispatch_data_quality_alerts(
-                single_batch_id, alerts, alert_config
-            )
             if alerts:
-                with get_db_connection() as conn:
-                    persist_data_quality_alerts(
-                        conn=conn,
-                        batch_id=single_batch_id,
-                        alerts=alerts,
-                        channels=alert_delivery,
-                    )
-                    conn.commit()
+                data_quality_alert_outbox.wake()
         except Exception as quality_exc:
             logger.error(
                 "single_submission_quality_failed",
                 extra={"error": str(quality_exc)},
             )
+            # Batch-only metrics, since the quality store is unavailable.
+            single_batch_metrics = compute_batch_quality_metrics(
+                [normalized_submission],
+                inserted_rows,
+            )
         
         # Return the analysis results
         response = {
@@ -3028,12 +3698,16 @@ def submit_survey():
         # Emit real-time update to all connected clients
         socketio.emit('survey_submitted', {
             'analysis': analysis_results,
-            'totalSurveys': len(data)
+            'totalSurveys': len(survey_snapshot)
         })
 
 
 
-        _bump_cache_version()
+        invalidate_cached_responses(
+            CACHE_TAG_SURVEYS,
+            CACHE_TAG_DQ_BATCHES,
+            *([CACHE_TAG_DQ_ALERTS] if alerts else []),
+        )
         return jsonify({"success": True, **response})
     
     except Exception as e:
@@ -3472,27 +4146,23 @@ def get_trait_explanations():
 
 @app.route('/api/get-surveys', methods=['GET'])
 def get_surveys():
-    global data
     user, error_response = authenticate_request()
     if error_response:
         payload, status_code = error_response
         return jsonify(payload), status_code
 
-    if data is None:
-        return jsonify({"error": "Data not loaded"}), 500
-    
     try:
-        # Reload data to ensure we have the latest
-        data = _load_from_known_locations()
-        if data is None:
-            return jsonify({"error": "Unable to load survey data"}), 500
+        frame = get_survey_data()
+        if frame is None:
+            return jsonify({"error": "Data not loaded"}), 500
         
-        # Replace NaN values with None (null in JSON) and convert to records
-        data = data.replace({pd.NA: None})  # Replace pandas NA
-        data = data.where(pd.notnull(data), None)  # Replace numpy NaN
+        # Only the latest row is returned, so avoid converting the whole snapshot
+        latest = frame.tail(1)
+        latest = latest.replace({pd.NA: None})  # Replace pandas NA
+        latest = latest.where(pd.notnull(latest), None)  # Replace numpy NaN
         
         # Convert the data to a list of dictionaries and clean the data
-        records = data.to_dict('records')
+        records = latest.to_dict('records')
         if not records:
             return jsonify([])
 
@@ -11,9 +11,8 @@ from sentiment_analysis_background import (
     BackgroundSentimentRL,
     NORMALIZED_BACKGROUND_PRIORS,
     _normalize_background_label,
-    _resolve_column,
-    _to_academic_scale,
 )
+from survey_preprocessing import resolve_column as _resolve_column, to_academic_scale as _to_academic_scale
 
 
 def _clamp_score(value: float) -> float:
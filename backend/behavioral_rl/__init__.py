@@ -1,4 +1,5 @@
 from .embedding import SentenceEmbeddingEncoder
+from .embedding_cache import EmbeddingCache
 from .evaluate import (
     build_distribution_stats,
     compute_regression_metrics,
@@ -6,6 +7,7 @@ from .evaluate import (
     determine_correlation_reason,
 )
 from .model import BehavioralScoreNet
+from .registry import BehavioralModelRegistry, LoadedBehavioralModel, build_model_from_checkpoint
 from .train import (
     TrainingConfig,
     load_checkpoint,
@@ -16,7 +18,11 @@ from .train import (
 
 __all__ = [
     "SentenceEmbeddingEncoder",
+    "EmbeddingCache",
     "BehavioralScoreNet",
+    "BehavioralModelRegistry",
+    "LoadedBehavioralModel",
+    "build_model_from_checkpoint",
     "TrainingConfig",
     "prepare_training_data",
     "train_behavioral_model",
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+import numpy as np
+
+try:  # POSIX only; other platforms rely on the in-process lock.
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class EmbeddingCache:
+    """
+    Persistent sentence-embedding store keyed by (model name, text hash).
+
+    Vectors live in an append-only float32 matrix that is memory-mapped for
+    reads, with a parallel file of text hashes as the row index. ``encode``
+    has the same contract as ``SentenceEmbeddingEncoder.encode`` but only runs
+    the underlying encoder (created lazily) for texts it has not seen before.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, encoder_factory: Callable[[], object]):
+        self.model_name = model_name
+        model_slug = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:12]
+        self.cache_dir = os.path.join(cache_dir, model_slug)
+        self._encoder_factory = encoder_factory
+        self._encoder = None
+        self._lock = threading.RLock()
+        self._index: dict[str, int] = {}
+        self._keys_offset = 0
+        self._dim: int | None = None
+        self._vectors: np.ndarray | None = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.cache_dir, "vectors.f32")
+
+    @property
+    def keys_path(self) -> str:
+        return os.path.join(self.cache_dir, "keys.txt")
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.cache_dir, "meta.json")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def encode(self, texts: list[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        keys = [self.text_key(text) for text in texts]
+        with self._lock:
+            self._refresh()
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._index and key not in missing:
+                    missing[key] = text
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+            if missing:
+                self._encode_and_store(missing, batch_size)
+            rows = np.fromiter((self._index[key] for key in keys), dtype=np.int64, count=len(keys))
+            return np.asarray(self._vectors[rows], dtype=np.float32)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._index)}
+
+    def _get_encoder(self):
+        if self._encoder is None:
+            self._encoder = self._encoder_factory()
+        return self._encoder
+
+    def _encode_and_store(self, missing: dict[str, str], batch_size: int) -> None:
+        embeddings = self._get_encoder().encode(list(missing.values()), batch_size=batch_size)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._file_lock():
+            # Another worker may have stored some of these while we were encoding.
+            self._refresh()
+            if self._dim is None:
+                self._dim = int(embeddings.shape[1])
+                with open(self.meta_path, "w", encoding="utf-8") as handle:
+                    json.dump({"model_name": self.model_name, "dim": self._dim}, handle)
+            new_rows = [
+                (key, row) for key, row in zip(missing.keys(), embeddings) if key not in self._index
+            ]
+            if new_rows:
+                # Vectors are written before keys so the index never points past the data;
+                # drop any unindexed rows left behind by a writer that died in between.
+                row_bytes = self._dim * np.dtype(np.float32).itemsize
+                if os.path.exists(self.vectors_path):
+                    os.truncate(self.vectors_path, len(self._index) * row_bytes)
+                with open(self.vectors_path, "ab") as handle:
+                    handle.write(np.stack([row for _, row in new_rows]).tobytes())
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                with open(self.keys_path, "a", encoding="utf-8") as handle:
+                    handle.write("".join(f"{key}\n" for key, _ in new_rows))
+            self._refresh()
+
+    def _refresh(self) -> None:
+        """Pick up rows appended since the last read (by this or another process)."""
+        if self._dim is None:
+            if not os.path.exists(self.meta_path):
+                return
+            with open(self.meta_path, "r", encoding="utf-8") as handle:
+                self._dim = int(json.load(handle)["dim"])
+
+        if not os.path.exists(self.keys_path):
+            return
+        with open(self.keys_path, "r", encoding="utf-8") as handle:
+            handle.seek(self._keys_offset)
+            appended = handle.read()
+        # Ignore a trailing partial line from a writer that has not finished.
+        complete, _, _ = appended.rpartition("\n")
+        if complete:
+            self._keys_offset += len(complete) + 1
+            for key in complete.split("\n"):
+                self._index.setdefault(key, len(self._index))
+
+        row_bytes = self._dim * np.dtype(np.float32).itemsize
+        available_rows = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+        row_count = min(len(self._index), available_rows)
+        if self._vectors is None or self._vectors.shape[0] != row_count:
+            self._vectors = (
+                np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(row_count, self._dim))
+                if row_count
+                else np.empty((0, self._dim), dtype=np.float32)
+            )
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.cache_dir, "write.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
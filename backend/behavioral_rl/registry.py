@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from .model import BehavioralScoreNet
+from .train import load_checkpoint
+
+
+def build_model_from_checkpoint(ckpt: dict) -> BehavioralScoreNet:
+    config = ckpt.get("config", {})
+    model = BehavioralScoreNet(
+        input_dim=int(ckpt["input_dim"]),
+        hidden_dim=int(config.get("hidden_dim", 128)),
+        dropout=float(config.get("dropout", 0.15)),
+    )
+    model.load_state_dict(ckpt["state_dict"])
+    model.eval()
+    return model
+
+
+@dataclass(frozen=True)
+class LoadedBehavioralModel:
+    model: BehavioralScoreNet
+    version: int
+    residual_std: float
+    train_history: dict
+    loaded_at: float
+    parameter_count: int
+
+
+class BehavioralModelRegistry:
+    """
+    Keeps the promoted checkpoint's model in memory.
+
+    ``get`` stats the checkpoint file (inode, size, mtime) and only deserializes
+    it when that signature changes, e.g. after the trainer's atomic rename.
+    The new model is built off to the side and swapped in with a single
+    reference assignment, so concurrent readers always see a complete model.
+    """
+
+    def __init__(self, checkpoint_path: str, embedding_model_name: str) -> None:
+        self.checkpoint_path = checkpoint_path
+        self.embedding_model_name = embedding_model_name
+        self._lock = threading.Lock()
+        self._current: LoadedBehavioralModel | None = None
+        self._signature = None
+        self.reloads = 0
+
+    def get(self) -> LoadedBehavioralModel | None:
+        signature = self._file_signature()
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._current = self._load() if signature is not None else None
+                    self._signature = signature
+        return self._current
+
+    def stats(self) -> dict:
+        current = self._current
+        return {
+            "version": None if current is None else current.version,
+            "loaded_at": None if current is None else current.loaded_at,
+            "parameter_count": 0 if current is None else current.parameter_count,
+            "reloads": self.reloads,
+        }
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.checkpoint_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _load(self) -> LoadedBehavioralModel | None:
+        ckpt = load_checkpoint(self.checkpoint_path, map_location="cpu")
+        if not ckpt or ckpt.get("embedding_model_name") != self.embedding_model_name:
+            return None
+        model = build_model_from_checkpoint(ckpt)
+        self.reloads += 1
+        return LoadedBehavioralModel(
+            model=model,
+            version=int(ckpt.get("model_version") or 0),
+            residual_std=float(ckpt.get("residual_std", 0.35)),
+            train_history=ckpt.get("train_history") or {},
+            loaded_at=time.time(),
+            parameter_count=sum(param.numel() for param in model.parameters()),
+        )
@@ -215,6 +215,7 @@ def save_checkpoint(
     input_dim: int,
     residual_std: float,
     train_history: dict[str, list[float]],
+    model_version: int | None = None,
 ) -> None:
     payload = {
         "state_dict": model.state_dict(),
@@ -223,9 +224,17 @@ def save_checkpoint(
         "input_dim": input_dim,
         "residual_std": residual_std,
         "train_history": train_history,
+        "model_version": model_version,
     }
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    torch.save(payload, path)
+    # Write then rename so readers never load a half-written checkpoint.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        torch.save(payload, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 def load_checkpoint(path: str, map_location: str | torch.device = "cpu") -> dict | None:
@@ -12,6 +12,13 @@ class Settings:
             os.path.join(base_dir, "surveys.db"),
         )
 
+        # SQLite per-thread connection pool (WAL, busy timeout, memory-mapped reads)
+        self.sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        self.sqlite_mmap_size_bytes: int = int(
+            os.getenv("SQLITE_MMAP_SIZE_BYTES", str(256 * 1024 * 1024))
+        )
+        self.sqlite_cached_statements: int = int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))
+
         # Postgres + pgvector configuration (optional; used for mentor matching)
         self.pg_dsn: Optional[str] = os.getenv("PG_DSN")
         self.pg_vector_dim: int = int(os.getenv("PG_VECTOR_DIM", "384"))
@@ -58,6 +65,12 @@ class Settings:
         self.dq_threshold_outliers_max: int = int(
             os.getenv("DQ_THRESHOLD_OUTLIERS_MAX", "5")
         )
+        # IQR outlier bounds from the stored survey population ("population") or
+        # from each batch alone ("batch"); both keep the population sketches current.
+        self.dq_outlier_bounds_scope: str = os.getenv(
+            "DQ_OUTLIER_BOUNDS_SCOPE", "population"
+        ).strip().lower()
+        self.dq_outlier_sketch_k: int = int(os.getenv("DQ_OUTLIER_SKETCH_K", "200"))
         self.dq_alert_email_to = [
             email.strip()
             for email in os.getenv("DQ_ALERT_EMAIL_TO", "").split(",")
@@ -69,6 +82,27 @@ class Settings:
             if url.strip()
         ]
         self.dq_alert_slack_webhook: Optional[str] = os.getenv("DQ_ALERT_SLACK_WEBHOOK")
+        # /api/submit-survey folds submissions into one data-quality batch per window,
+        # rolling over after max rows; a window of 0 keeps one batch per submission.
+        self.dq_single_batch_window_seconds: float = float(
+            os.getenv("DQ_SINGLE_BATCH_WINDOW_SECONDS", "60")
+        )
+        self.dq_single_batch_max_rows: int = int(
+            os.getenv("DQ_SINGLE_BATCH_MAX_ROWS", "500")
+        )
+        # Alert deliveries go through a SQLite outbox drained by a background thread;
+        # 0 disables the thread. Failures retry with exponential backoff.
+        self.dq_alert_poll_seconds: float = float(os.getenv("DQ_ALERT_POLL_SECONDS", "5"))
+        self.dq_alert_max_attempts: int = int(os.getenv("DQ_ALERT_MAX_ATTEMPTS", "5"))
+        self.dq_alert_retry_base_seconds: float = float(
+            os.getenv("DQ_ALERT_RETRY_BASE_SECONDS", "30")
+        )
+        self.dq_alert_target_concurrency: int = int(
+            os.getenv("DQ_ALERT_TARGET_CONCURRENCY", "1")
+        )
+        self.dq_alert_delivery_workers: int = int(
+            os.getenv("DQ_ALERT_DELIVERY_WORKERS", "4")
+        )
 
         # Analytics API performance controls
         self.analytics_cache_ttl_seconds: int = int(
@@ -77,6 +111,35 @@ class Settings:
         self.analytics_cache_enabled: bool = (
             os.getenv("ANALYTICS_CACHE_ENABLED", "true").lower() == "true"
         )
+        # Per-process LRU of serialized analytics responses in front of Redis, and how
+        # often the cache version is re-read when Redis pub/sub is unavailable.
+        self.analytics_local_cache_max_entries: int = int(
+            os.getenv("ANALYTICS_LOCAL_CACHE_MAX_ENTRIES", "512")
+        )
+        self.analytics_local_cache_max_bytes: int = int(
+            os.getenv("ANALYTICS_LOCAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+        )
+        # Analysis responses outdated by new data (or expired) are served for this long
+        # while one request recomputes them; concurrent misses wait up to the fill lock.
+        self.analytics_cache_stale_seconds: float = float(
+            os.getenv("ANALYTICS_CACHE_STALE_SECONDS", "300")
+        )
+        self.analytics_cache_fill_lock_seconds: float = float(
+            os.getenv("ANALYTICS_CACHE_FILL_LOCK_SECONDS", "30")
+        )
+        self.analytics_cache_version_poll_seconds: float = float(
+            os.getenv("ANALYTICS_CACHE_VERSION_POLL_SECONDS", "1")
+        )
+        # Cached analytics bodies at least this large also keep gzip (and brotli) copies,
+        # compressed once when stored.
+        self.analytics_compress_min_bytes: int = int(
+            os.getenv("ANALYTICS_COMPRESS_MIN_BYTES", "1024")
+        )
+        # Worker processes that run the behavioral stage of /api/analysis/complete* while
+        # the other analyzers run in the request; 0 keeps every stage in the request.
+        self.analytics_process_workers: int = int(
+            os.getenv("ANALYTICS_PROCESS_WORKERS", "1")
+        )
         self.analytics_max_page_size: int = int(
             os.getenv("ANALYTICS_MAX_PAGE_SIZE", "100")
         )
@@ -90,6 +153,44 @@ class Settings:
             os.getenv("ANALYTICS_RATE_LIMIT_WINDOW_SECONDS", "60")
         )
 
+        # Rows per executemany chunk when bulk-inserting survey batches.
+        self.survey_ingest_chunk_size: int = int(
+            os.getenv("SURVEY_INGEST_CHUNK_SIZE", "5000")
+        )
+
+        # In-memory survey snapshot; other workers' writes are picked up on this interval.
+        self.survey_snapshot_refresh_seconds: float = float(
+            os.getenv("SURVEY_SNAPSHOT_REFRESH_SECONDS", "5")
+        )
+
+        # Analysis payloads re-materialized once no survey has arrived for the debounce
+        # (or after the max delay during a steady stream); 0 disables materialization.
+        self.analysis_materialize_debounce_seconds: float = float(
+            os.getenv("ANALYSIS_MATERIALIZE_DEBOUNCE_SECONDS", "2")
+        )
+        self.analysis_materialize_max_delay_seconds: float = float(
+            os.getenv("ANALYSIS_MATERIALIZE_MAX_DELAY_SECONDS", "30")
+        )
+
+        # Childsurvey.xlsx write-behind compaction; 0 disables the background compactor.
+        self.survey_excel_compaction_seconds: float = float(
+            os.getenv("SURVEY_EXCEL_COMPACTION_SECONDS", "30")
+        )
+
+        # Behavioral model training runs off the request path: "local" or "celery".
+        self.behavioral_training_backend: str = os.getenv(
+            "BEHAVIORAL_TRAINING_BACKEND", "local"
+        ).strip().lower()
+
+        # Analytics GETs only score with the RL models ("score_only") and queue the
+        # learning, or update the models inline as before ("inline").
+        self.analytics_rl_mode: str = os.getenv(
+            "ANALYTICS_RL_MODE", "score_only"
+        ).strip().lower()
+        self.rl_learning_flush_seconds: float = float(
+            os.getenv("RL_LEARNING_FLUSH_SECONDS", "60")
+        )
+
         # Operational readiness signals
         self.monitoring_slow_request_ms: int = int(
             os.getenv("MONITORING_SLOW_REQUEST_MS", "1500")
@@ -0,0 +1,321 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+ALERT_CHANNELS = ("email", "webhook", "slack")
+
+# A claimed delivery that is not settled within this window (e.g. its worker
+# died) becomes due again.
+_SEND_LEASE_SECONDS = 120.0
+
+
+def empty_alert_channels() -> Dict[str, list]:
+    return {channel: [] for channel in ALERT_CHANNELS}
+
+
+class AlertOutbox:
+    """
+    SQLite outbox for data-quality alert deliveries.
+
+    ``enqueue`` writes one ``data_quality_alert_outbox`` row per (channel,
+    target) on the caller's connection, so alerts are queued in the same
+    transaction as their batch and the request never waits on SMTP or
+    webhooks. A daemon thread claims due rows and sends them on a small pool,
+    with at most ``target_concurrency`` deliveries in flight per target. Failed
+    attempts are retried with exponential backoff until ``max_attempts``.
+    After every attempt the batch's delivery status is written back to
+    ``data_quality_alerts.channels`` and ``on_settled(batch_id)`` is called. Claims are conditional updates with a
+    lease, so several app processes can share one outbox.
+    """
+
+    def __init__(
+        self,
+        connection_provider: Callable[[], sqlite3.Connection],
+        senders: Mapping[str, Callable[[str, dict], Tuple[bool, Optional[str]]]],
+        poll_interval_seconds: float = 5,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 30,
+        retry_max_seconds: float = 3600,
+        target_concurrency: int = 1,
+        max_workers: int = 4,
+        on_settled: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._connection_provider = connection_provider
+        self._senders = dict(senders)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.target_concurrency = max(1, target_concurrency)
+        self.max_workers = max(1, max_workers)
+        self._on_settled = on_settled
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, int] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._worker: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.attempts = 0
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+
+    def enqueue(
+        self,
+        conn: sqlite3.Connection,
+        batch_id: str,
+        messages: Iterable[Tuple[str, str, dict]],
+    ) -> Dict[str, list]:
+        """Queue ``(channel, target, payload)`` messages; returns the initial channel status."""
+        now = datetime.utcnow().isoformat()
+        due_at = time.time()
+        channels = empty_alert_channels()
+        for channel, target, payload in messages:
+            conn.execute(
+                """
+                INSERT INTO data_quality_alert_outbox (
+                    batch_id, channel, target, payload, status, attempts,
+                    next_attempt_at, last_error, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, 'pending', 0, ?, NULL, ?, ?)
+                """,
+                (batch_id, channel, target, json.dumps(payload), due_at, now, now),
+            )
+            channels.setdefault(channel, []).append(_channel_entry(target, "pending", 0, None))
+        return channels
+
+    def wake(self) -> None:
+        """Nudge the worker after new deliveries were committed."""
+        if self.poll_interval_seconds <= 0:
+            return
+        self._ensure_worker()
+        self._wake.set()
+
+    def resume_pending(self) -> None:
+        """Start the worker at boot if deliveries are left over from a previous run."""
+        if self.stats()["pending"]:
+            self.wake()
+
+    def deliver_due(self, wait: bool = True) -> int:
+        """Claim and send every delivery that is due; returns how many were started."""
+        futures = []
+        with self._connection_provider() as conn:
+            due = conn.execute(
+                """
+                SELECT id, target
+                FROM data_quality_alert_outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id
+                LIMIT ?
+                """,
+                (time.time(), self.max_workers * self.target_concurrency * 4),
+            ).fetchall()
+            for delivery_id, target in due:
+                if not self._reserve_target(target):
+                    continue
+                claimed = self._claim(conn, delivery_id)
+                if claimed is None:
+                    self._release_target(target)
+                    continue
+                futures.append(self._get_executor().submit(self._send, claimed))
+        if wait:
+            for future in futures:
+                future.result()
+        return len(futures)
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the next queued delivery is due, or ``None`` if nothing is queued."""
+        with self._connection_provider() as conn:
+            row = conn.execute(
+                """
+                SELECT MIN(next_attempt_at)
+                FROM data_quality_alert_outbox
+                WHERE status IN ('pending', 'sending')
+                """
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def stats(self) -> dict:
+        with self._connection_provider() as conn:
+            counts = dict(
+                conn.execute(
+                    "SELECT status, COUNT(*) FROM data_quality_alert_outbox GROUP BY status"
+                ).fetchall()
+            )
+        return {
+            "pending": counts.get("pending", 0) + counts.get("sending", 0),
+            "attempts": self.attempts,
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _claim(self, conn: sqlite3.Connection, delivery_id: int) -> Optional[tuple]:
+        now = time.time()
+        cursor = conn.execute(
+            """
+            UPDATE data_quality_alert_outbox
+            SET status = 'sending', attempts = attempts + 1, next_attempt_at = ?, updated_at = ?
+            WHERE id = ? AND status IN ('pending', 'sending') AND next_attempt_at <= ?
+            """,
+            (now + _SEND_LEASE_SECONDS, datetime.utcnow().isoformat(), delivery_id, now),
+        )
+        conn.commit()
+        if cursor.rowcount != 1:
+            return None
+        return conn.execute(
+            """
+            SELECT id, batch_id, channel, target, payload, attempts
+            FROM data_quality_alert_outbox
+            WHERE id = ?
+            """,
+            (delivery_id,),
+        ).fetchone()
+
+    def _send(self, claimed: tuple) -> None:
+        delivery_id, batch_id, channel, target, payload, attempts = claimed
+        try:
+            sender = self._senders.get(channel)
+            if sender is None:
+                success, error = False, f"No sender for channel '{channel}'."
+            else:
+                try:
+                    success, error = sender(target, json.loads(payload))
+                except Exception as exc:
+                    success, error = False, str(exc)
+            self._settle(delivery_id, batch_id, attempts, bool(success), error)
+        except Exception as exc:
+            print(f"Error delivering data quality alert {delivery_id}: {exc}")
+        finally:
+            self._release_target(target)
+
+    def _settle(
+        self, delivery_id: int, batch_id: str, attempts: int, success: bool, error: Optional[str]
+    ) -> None:
+        if success:
+            status, next_attempt_at = "delivered", None
+        elif attempts >= self.max_attempts:
+            status, next_attempt_at = "failed", None
+        else:
+            backoff = min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+            status, next_attempt_at = "pending", time.time() + backoff
+
+        with self._connection_provider() as conn:
+            conn.execute(
+                """
+                UPDATE data_quality_alert_outbox
+                SET status = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (status, next_attempt_at, None if success else error, datetime.utcnow().isoformat(), delivery_id),
+            )
+            self._write_back_channels(conn, batch_id)
+            conn.commit()
+        if self._on_settled is not None:
+            self._on_settled(batch_id)
+
+        with self._lock:
+            self.attempts += 1
+            if status == "delivered":
+                self.delivered += 1
+            elif status == "failed":
+                self.failed += 1
+            else:
+                self.retried += 1
+        if status == "pending":
+            self._wake.set()
+
+    @staticmethod
+    def _write_back_channels(conn: sqlite3.Connection, batch_id: str) -> None:
+        channels = empty_alert_channels()
+        rows = conn.execute(
+            """
+            SELECT channel, target, status, attempts, last_error
+            FROM data_quality_alert_outbox
+            WHERE batch_id = ?
+            ORDER BY id
+            """,
+            (batch_id,),
+        ).fetchall()
+        for channel, target, status, attempts, last_error in rows:
+            channels.setdefault(channel, []).append(_channel_entry(target, status, attempts, last_error))
+        conn.execute(
+            "UPDATE data_quality_alerts SET channels = ? WHERE batch_id = ?",
+            (json.dumps(channels), batch_id),
+        )
+
+    def _reserve_target(self, target: str) -> bool:
+        with self._lock:
+            if self._in_flight.get(target, 0) >= self.target_concurrency:
+                return False
+            self._in_flight[target] = self._in_flight.get(target, 0) + 1
+            return True
+
+    def _release_target(self, target: str) -> None:
+        with self._lock:
+            remaining = self._in_flight.get(target, 0) - 1
+            if remaining > 0:
+                self._in_flight[target] = remaining
+            else:
+                self._in_flight.pop(target, None)
+        self._wake.set()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="dq-alert-delivery",
+                )
+            return self._executor
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run_worker,
+                name="dq-alert-outbox",
+                daemon=True,
+            )
+            self._worker.start()
+
+    def _run_worker(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                started = self.deliver_due(wait=False)
+                next_due = self.next_due_in()
+            except Exception as exc:
+                print(f"Error in data quality alert outbox: {exc}")
+                started, next_due = 0, None
+            if next_due is None or (next_due <= 0 and not started):
+                # Nothing queued, or every due delivery waits on a busy target;
+                # a finishing delivery wakes us.
+                timeout = self.poll_interval_seconds
+            else:
+                timeout = min(next_due, self.poll_interval_seconds)
+            self._wake.wait(timeout)
+
+
+def _channel_entry(target: str, status: str, attempts: int, error: Optional[str]) -> dict:
+    return {
+        "target": target,
+        "status": status,
+        "success": status == "delivered",
+        "attempts": attempts,
+        "error": error,
+    }
@@ -0,0 +1,60 @@
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def missing_mask(rows: Sequence[Mapping], columns: Sequence[str]) -> np.ndarray:
+    """
+    (rows × columns) boolean mask of missing cells.
+
+    A cell is missing when it is absent, null/NaN, or a blank string, the same
+    cells for which ``_normalize_survey_value`` returns ``None``. Each column
+    is factorized, so only its distinct values are inspected in Python.
+    """
+    columns = list(columns)
+    if not rows:
+        return np.zeros((0, len(columns)), dtype=bool)
+    frame = pd.DataFrame.from_records(rows, columns=columns)
+    mask = np.empty(frame.shape, dtype=bool)
+    for index, column in enumerate(columns):
+        # Classify each distinct value once; nulls get code -1 (the trailing slot).
+        codes, uniques = pd.factorize(frame[column], use_na_sentinel=True)
+        lookup = np.fromiter(
+            (isinstance(value, str) and not value.strip() for value in uniques),
+            dtype=bool,
+            count=len(uniques),
+        )
+        mask[:, index] = np.append(lookup, True)[codes]
+    return mask
+
+
+def completeness_summary(
+    columns: Sequence[str],
+    field_missing_counts: Mapping[str, int],
+    total_rows: int,
+    field_outlier_counts: Mapping[str, int],
+) -> Tuple[List[dict], float]:
+    """Per-field metric dicts and the overall completeness score (both rounded to 4 places)."""
+    field_metrics = []
+    for field in columns:
+        missing_count = int(field_missing_counts.get(field, 0))
+        completeness_ratio = (total_rows - missing_count) / total_rows if total_rows else 1.0
+        field_metrics.append(
+            {
+                "field_name": field,
+                "total_count": total_rows,
+                "missing_count": missing_count,
+                "completeness_ratio": round(completeness_ratio, 4),
+                "outlier_count": int(field_outlier_counts.get(field, 0)),
+            }
+        )
+    total_cells = total_rows * len(columns)
+    missing_cells = sum(int(field_missing_counts.get(field, 0)) for field in columns)
+    completeness_score = (total_cells - missing_cells) / total_cells if total_cells else 1.0
+    return field_metrics, round(completeness_score, 4)
+
+
+def missing_counts(rows: Sequence[Mapping], columns: Sequence[str]) -> Dict[str, int]:
+    counts = missing_mask(rows, columns).sum(axis=0)
+    return {column: int(count) for column, count in zip(columns, counts)}
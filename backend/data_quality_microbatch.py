@@ -0,0 +1,180 @@
+import sqlite3
+import time
+from datetime import datetime
+from typing import Optional, Sequence
+from uuid import uuid4
+
+
+class SubmissionBatchCoalescer:
+    """
+    Folds single survey submissions into rolling data-quality batches.
+
+    Instead of one ``data_quality_batches`` row (plus a field-metric row per
+    column) per submission, submissions landing in the same
+    ``window_seconds`` window are added into one batch, started afresh every
+    ``max_rows`` submissions. Counts are summed in SQL with upserts, so
+    several app processes can fold into the same batch; the completeness
+    ratios are recomputed from the summed missing counts. With
+    ``window_seconds <= 0`` every submission gets its own batch as before.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        window_seconds: float = 60,
+        max_rows: int = 500,
+        prefix: str = "single",
+    ) -> None:
+        self.columns = list(columns)
+        self.window_seconds = window_seconds
+        self.max_rows = max(1, max_rows)
+        self.prefix = prefix
+
+    def batch_id_for(self, conn: sqlite3.Connection, now: Optional[float] = None) -> str:
+        """Batch that the next submission folds into."""
+        if self.window_seconds <= 0:
+            return f"{self.prefix}_{uuid4().hex[:12]}"
+
+        now = time.time() if now is None else now
+        window_start = int(now // self.window_seconds * self.window_seconds)
+        window_prefix = f"{self.prefix}_{datetime.utcfromtimestamp(window_start):%Y%m%dT%H%M%S}_"
+        latest = conn.execute(
+            """
+            SELECT batch_id, total_rows
+            FROM data_quality_batches
+            WHERE batch_id > ? AND batch_id < ?
+            ORDER BY batch_id DESC
+            LIMIT 1
+            """,
+            (window_prefix, window_prefix + "~"),
+        ).fetchone()
+        if latest is None:
+            return f"{window_prefix}0001"
+        if int(latest[1]) < self.max_rows:
+            return latest[0]
+        return f"{window_prefix}{int(latest[0][len(window_prefix):]) + 1:04d}"
+
+    def fold(
+        self,
+        conn: sqlite3.Connection,
+        batch_id: str,
+        schema_version: str,
+        source: str,
+        ingested_at: str,
+        metrics: dict,
+    ) -> dict:
+        """Add one submission's ``metrics`` to ``batch_id``; returns the batch's running metrics."""
+        conn.execute(
+            """
+            INSERT INTO data_quality_batches (
+                batch_id,
+                schema_version,
+                source,
+                ingested_at,
+                total_rows,
+                inserted_rows,
+                duplicate_rows,
+                outlier_rows,
+                completeness_score,
+                created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(batch_id) DO UPDATE SET
+                ingested_at = excluded.ingested_at,
+                total_rows = total_rows + excluded.total_rows,
+                inserted_rows = inserted_rows + excluded.inserted_rows,
+                duplicate_rows = duplicate_rows + excluded.duplicate_rows,
+                outlier_rows = outlier_rows + excluded.outlier_rows
+            """,
+            (
+                batch_id,
+                schema_version,
+                source,
+                ingested_at,
+                metrics["total_rows"],
+                metrics["inserted_rows"],
+                metrics["duplicate_rows"],
+                metrics["outlier_rows"],
+                metrics["completeness_score"],
+                datetime.utcnow().isoformat(),
+            ),
+        )
+        conn.executemany(
+            """
+            INSERT INTO data_quality_field_metrics (
+                batch_id,
+                field_name,
+                total_count,
+                missing_count,
+                completeness_ratio,
+                outlier_count
+            ) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(batch_id, field_name) DO UPDATE SET
+                total_count = total_count + excluded.total_count,
+                missing_count = missing_count + excluded.missing_count,
+                completeness_ratio = ROUND(
+                    CAST(
+                        (total_count + excluded.total_count) - (missing_count + excluded.missing_count)
+                        AS REAL
+                    ) / (total_count + excluded.total_count),
+                    4
+                ),
+                outlier_count = outlier_count + excluded.outlier_count
+            """,
+            [
+                (
+                    batch_id,
+                    item["field_name"],
+                    item["total_count"],
+                    item["missing_count"],
+                    item["completeness_ratio"],
+                    item["outlier_count"],
+                )
+                for item in metrics["field_metrics"]
+            ],
+        )
+
+        field_rows = conn.execute(
+            """
+            SELECT field_name, total_count, missing_count, completeness_ratio, outlier_count
+            FROM data_quality_field_metrics
+            WHERE batch_id = ?
+            """,
+            (batch_id,),
+        ).fetchall()
+        total_cells = sum(int(row[1]) for row in field_rows)
+        missing_cells = sum(int(row[2]) for row in field_rows)
+        completeness_score = round(
+            (total_cells - missing_cells) / total_cells if total_cells else 1.0, 4
+        )
+        conn.execute(
+            "UPDATE data_quality_batches SET completeness_score = ? WHERE batch_id = ?",
+            (completeness_score, batch_id),
+        )
+
+        batch = conn.execute(
+            """
+            SELECT total_rows, inserted_rows, duplicate_rows, outlier_rows
+            FROM data_quality_batches
+            WHERE batch_id = ?
+            """,
+            (batch_id,),
+        ).fetchone()
+        by_field = {row[0]: row for row in field_rows}
+        return {
+            "total_rows": int(batch[0]),
+            "inserted_rows": int(batch[1]),
+            "duplicate_rows": int(batch[2]),
+            "outlier_rows": int(batch[3]),
+            "completeness_score": completeness_score,
+            "field_metrics": [
+                {
+                    "field_name": field,
+                    "total_count": int(by_field[field][1]),
+                    "missing_count": int(by_field[field][2]),
+                    "completeness_ratio": float(by_field[field][3]),
+                    "outlier_count": int(by_field[field][4]),
+                }
+                for field in self.columns
+                if field in by_field
+            ],
+        }
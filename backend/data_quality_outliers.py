@@ -0,0 +1,123 @@
+import json
+import sqlite3
+from datetime import datetime
+from typing import Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from quantile_sketch import KLLSketch
+
+OUTLIER_BOUND_SCOPES = {"population", "batch"}
+
+
+class IQROutlierEngine:
+    """
+    Static-range plus 1.5×IQR outlier counts for the numeric data-quality fields.
+
+    Each batch is parsed into one (rows × fields) float matrix and flagged with
+    array comparisons. Quartiles come from a mergeable ``KLLSketch`` per field.
+    Given a connection, the batch sketches are merged into the population
+    sketches stored in ``data_quality_outlier_sketches`` (inside the caller's
+    transaction). With ``bounds_scope="population"`` the IQR bounds come from
+    that merged population instead of the batch alone, so small batches and
+    single submissions are judged against every survey seen so far.
+    """
+
+    def __init__(
+        self,
+        numeric_limits: Mapping[str, dict],
+        parse_number: Callable[[object], Optional[float]],
+        sketch_k: int = 200,
+        bounds_scope: str = "population",
+    ) -> None:
+        self.numeric_limits = dict(numeric_limits)
+        self.fields = list(self.numeric_limits)
+        self.parse_number = parse_number
+        self.sketch_k = sketch_k
+        self.bounds_scope = bounds_scope if bounds_scope in OUTLIER_BOUND_SCOPES else "population"
+        self._static_lower = np.array([limits["min"] for limits in self.numeric_limits.values()], dtype=float)
+        self._static_upper = np.array([limits["max"] for limits in self.numeric_limits.values()], dtype=float)
+
+    def numeric_matrix(self, rows: Sequence[Mapping]) -> np.ndarray:
+        """Parsed numeric fields of ``rows``; missing or unparseable values are NaN."""
+        matrix = np.array(
+            [[self.parse_number(row.get(field)) for field in self.fields] for row in rows],
+            dtype=float,
+        )
+        return matrix.reshape(len(rows), len(self.fields))
+
+    def new_sketches(self) -> Dict[str, KLLSketch]:
+        return {field: KLLSketch(k=self.sketch_k, seed=index) for index, field in enumerate(self.fields)}
+
+    def add_to_sketches(self, sketches: Dict[str, KLLSketch], values: np.ndarray) -> None:
+        for index, field in enumerate(self.fields):
+            sketches[field].update_many(values[:, index])
+
+    def resolve_bounds(
+        self, batch_sketches: Dict[str, KLLSketch], conn: Optional[sqlite3.Connection] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """IQR bounds for this batch; with ``conn``, also folds the batch into the stored population."""
+        reference = batch_sketches
+        if conn is not None:
+            population = self.load_population(conn)
+            for field in self.fields:
+                population[field].merge(batch_sketches[field])
+            self.save_population(conn, population)
+            if self.bounds_scope == "population":
+                reference = population
+
+        lower = np.full(len(self.fields), -np.inf)
+        upper = np.full(len(self.fields), np.inf)
+        for index, field in enumerate(self.fields):
+            sketch = reference[field]
+            if len(sketch) >= 4:
+                q1, q3 = sketch.quantile(0.25), sketch.quantile(0.75)
+                iqr = q3 - q1
+                lower[index] = q1 - 1.5 * iqr
+                upper[index] = q3 + 1.5 * iqr
+        return lower, upper
+
+    def flag(self, values: np.ndarray, iqr_lower: np.ndarray, iqr_upper: np.ndarray):
+        """Rows with any outlier and per-field outlier counts for a block of ``values``."""
+        # NaN (missing) compares False everywhere, so it is never an outlier.
+        flagged = (
+            (values < self._static_lower)
+            | (values > self._static_upper)
+            | (values < iqr_lower)
+            | (values > iqr_upper)
+        )
+        return int(flagged.any(axis=1).sum()), flagged.sum(axis=0)
+
+    def count_outliers(self, rows: Sequence[Mapping], conn: Optional[sqlite3.Connection] = None):
+        values = self.numeric_matrix(rows)
+        sketches = self.new_sketches()
+        self.add_to_sketches(sketches, values)
+        row_count, field_counts = self.flag(values, *self.resolve_bounds(sketches, conn))
+        return row_count, dict(zip(self.fields, (int(count) for count in field_counts)))
+
+    def load_population(self, conn: sqlite3.Connection) -> Dict[str, KLLSketch]:
+        population = self.new_sketches()
+        rows = conn.execute("SELECT field_name, sketch FROM data_quality_outlier_sketches").fetchall()
+        for field_name, payload in rows:
+            if field_name in population:
+                population[field_name] = KLLSketch.from_dict(
+                    json.loads(payload), seed=self.fields.index(field_name)
+                )
+        return population
+
+    def save_population(self, conn: sqlite3.Connection, population: Dict[str, KLLSketch]) -> None:
+        updated_at = datetime.utcnow().isoformat()
+        conn.executemany(
+            """
+            INSERT INTO data_quality_outlier_sketches (field_name, sketch, value_count, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(field_name) DO UPDATE SET
+                sketch = excluded.sketch,
+                value_count = excluded.value_count,
+                updated_at = excluded.updated_at
+            """,
+            [
+                (field, json.dumps(sketch.to_dict()), sketch.n, updated_at)
+                for field, sketch in population.items()
+            ],
+        )
@@ -0,0 +1,131 @@
+import math
+import threading
+from typing import Callable, Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from survey_preprocessing import PreparedSurveyFrame
+
+
+class RunningMoments:
+    """Sufficient statistics for a Pearson correlation: n, Σx, Σy, Σxy, Σx², Σy²."""
+
+    __slots__ = ("n", "sum_x", "sum_y", "sum_xy", "sum_xx", "sum_yy")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self.sum_xx = 0.0
+        self.sum_yy = 0.0
+
+    def add(self, xs, ys) -> None:
+        x = np.asarray(xs, dtype=float)
+        y = np.asarray(ys, dtype=float)
+        self.n += int(x.size)
+        self.sum_x += float(x.sum())
+        self.sum_y += float(y.sum())
+        self.sum_xy += float((x * y).sum())
+        self.sum_xx += float((x * x).sum())
+        self.sum_yy += float((y * y).sum())
+
+    def add_sums(self, n: int, sum_x: float, sum_y: float, sum_xy: float, sum_xx: float, sum_yy: float) -> None:
+        """Fold in pre-aggregated sums (e.g. one group whose x values are all equal)."""
+        self.n += int(n)
+        self.sum_x += sum_x
+        self.sum_y += sum_y
+        self.sum_xy += sum_xy
+        self.sum_xx += sum_xx
+        self.sum_yy += sum_yy
+
+    def correlation(self) -> float:
+        """Pearson r, or 0.0 with fewer than two pairs or a constant side (like ``np.std == 0``)."""
+        if self.n < 2:
+            return 0.0
+        var_x = self.sum_xx - self.sum_x * self.sum_x / self.n
+        var_y = self.sum_yy - self.sum_y * self.sum_y / self.n
+        # Cancellation leaves tiny non-zero residues for constant inputs.
+        if var_x <= 1e-12 * max(self.sum_xx, 1.0) or var_y <= 1e-12 * max(self.sum_yy, 1.0):
+            return 0.0
+        cov = self.sum_xy - self.sum_x * self.sum_y / self.n
+        return float(max(-1.0, min(1.0, cov / math.sqrt(var_x * var_y))))
+
+
+class _AggregateEntry:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.key = None
+        self.rows = 0
+        self.state = None
+
+
+class IncrementalAggregates:
+    """
+    Running per-analyzer summaries over the append-only survey snapshot.
+
+    An analyzer module takes part by defining ``new_aggregate_state()``,
+    ``fold_aggregate_rows(state, data, prepared)`` and
+    ``summarize_aggregate_state(state)``, plus an optional
+    ``aggregate_fingerprint()`` for model state baked into the folded rows.
+    ``update`` folds only the rows appended since the last call, so keeping
+    the summaries current costs O(new rows) per ingest and reading them costs
+    O(1) in the number of surveys. A new snapshot generation or fingerprint
+    rebuilds that analyzer's state from scratch.
+    """
+
+    def __init__(self, analyzers: Mapping[str, Callable[[], object]]) -> None:
+        self._analyzers = dict(analyzers)
+        self._entries: Dict[str, _AggregateEntry] = {name: _AggregateEntry() for name in self._analyzers}
+        self.rebuilds = 0
+        self.rows_folded = 0
+
+    def update(self, generation: int, frame: pd.DataFrame) -> None:
+        for name in self._analyzers:
+            self._update_one(name, generation, frame)
+
+    def summaries(self, generation: int, frame: pd.DataFrame) -> Dict[str, dict]:
+        results = {}
+        for name in self._analyzers:
+            module = self._participating_module(name)
+            if module is None:
+                continue
+            entry = self._update_one(name, generation, frame)
+            with entry.lock:
+                results[name] = module.summarize_aggregate_state(entry.state)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "rows": {name: entry.rows for name, entry in self._entries.items()},
+            "rebuilds": self.rebuilds,
+            "rows_folded": self.rows_folded,
+        }
+
+    def _participating_module(self, name: str):
+        module = self._analyzers[name]()
+        if callable(getattr(module, "fold_aggregate_rows", None)):
+            return module
+        return None
+
+    def _update_one(self, name: str, generation: int, frame: pd.DataFrame) -> _AggregateEntry:
+        entry = self._entries[name]
+        module = self._participating_module(name)
+        if module is None:
+            return entry
+
+        fingerprint_fn: Optional[Callable] = getattr(module, "aggregate_fingerprint", None)
+        key = (generation, fingerprint_fn() if callable(fingerprint_fn) else None)
+        with entry.lock:
+            if entry.key != key or entry.rows > len(frame):
+                entry.key = key
+                entry.rows = 0
+                entry.state = module.new_aggregate_state()
+                self.rebuilds += 1
+            if entry.rows < len(frame):
+                delta = frame.iloc[entry.rows:]
+                module.fold_aggregate_rows(entry.state, delta, PreparedSurveyFrame(delta))
+                self.rows_folded += len(delta)
+                entry.rows = len(frame)
+        return entry
@@ -0,0 +1,136 @@
+import math
+import random
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+
+class KLLSketch:
+    """
+    Mergeable KLL streaming quantile sketch (Karnin, Lang & Liberty).
+
+    Keeps O(k log(n/k)) values however many are added; items at level ``h``
+    stand for ``2**h`` inputs. Sketches of separate batches ``merge`` into a
+    sketch of their union and round-trip through ``to_dict``/``from_dict``.
+    Until the first compaction every value is still present, and ``quantile``
+    interpolates linearly like ``pandas.Series.quantile``, so small batches
+    get exact answers. After that the rank error is about
+    1.7/k (roughly 1% at the default ``k=200``).
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None) -> None:
+        self.k = max(8, int(k))
+        self.n = 0
+        self.min_value: Optional[float] = None
+        self.max_value: Optional[float] = None
+        self._levels: List[List[float]] = [[]]
+        self._compacted = False
+        self._random = random.Random(seed)
+
+    def update(self, value: float) -> None:
+        value = float(value)
+        if math.isnan(value):
+            return
+        self.n += 1
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+        self._levels[0].append(value)
+        if len(self._levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def update_many(self, values: Iterable[float]) -> None:
+        array = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=float)
+        array = array[~np.isnan(array)]
+        if array.size == 0:
+            return
+        self.n += int(array.size)
+        low, high = float(array.min()), float(array.max())
+        self.min_value = low if self.min_value is None else min(self.min_value, low)
+        self.max_value = high if self.max_value is None else max(self.max_value, high)
+        start = 0
+        while start < array.size:
+            room = max(1, self._capacity(0) - len(self._levels[0]))
+            self._levels[0].extend(array[start:start + room].tolist())
+            start += room
+            if len(self._levels[0]) >= self._capacity(0):
+                self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Fold ``other`` into this sketch (``other`` is left unchanged)."""
+        if other.n == 0:
+            return
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        for level, items in enumerate(other._levels):
+            self._levels[level].extend(items)
+        self.n += other.n
+        self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+        self.max_value = other.max_value if self.max_value is None else max(self.max_value, other.max_value)
+        self._compacted = self._compacted or other._compacted
+        self._compress()
+
+    def to_dict(self) -> dict:
+        return {
+            "k": self.k,
+            "n": self.n,
+            "min": self.min_value,
+            "max": self.max_value,
+            "compacted": self._compacted,
+            "levels": [list(items) for items in self._levels],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict, seed: Optional[int] = None) -> "KLLSketch":
+        sketch = cls(k=int(payload.get("k", 200)), seed=seed)
+        sketch.n = int(payload.get("n", 0))
+        sketch.min_value = payload.get("min")
+        sketch.max_value = payload.get("max")
+        sketch._compacted = bool(payload.get("compacted", False))
+        sketch._levels = [[float(value) for value in items] for items in payload.get("levels") or [[]]]
+        return sketch
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.n == 0:
+            return None
+        if not self._compacted:
+            return float(np.quantile(np.asarray(self._levels[0], dtype=float), q))
+        values, weights = self._weighted_items()
+        cumulative = np.cumsum(weights)
+        index = int(np.searchsorted(cumulative, q * self.n, side="left"))
+        return float(values[min(index, len(values) - 1)])
+
+    def rank(self, value: float) -> float:
+        """Approximate fraction of inputs ``<= value``."""
+        if self.n == 0:
+            return 0.0
+        values, weights = self._weighted_items()
+        return float(weights[values <= value].sum() / self.n)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self) -> None:
+        for level, items in enumerate(self._levels):
+            if len(items) < self._capacity(level):
+                continue
+            if level + 1 == len(self._levels):
+                self._levels.append([])
+            items.sort()
+            # Odd-sized levels keep one item behind so no weight is lost.
+            leftover = [items.pop()] if len(items) % 2 else []
+            offset = self._random.randint(0, 1)
+            self._levels[level + 1].extend(items[offset::2])
+            self._levels[level] = leftover
+            self._compacted = True
+
+    def _weighted_items(self):
+        values = np.concatenate([np.asarray(items, dtype=float) for items in self._levels])
+        weights = np.concatenate(
+            [np.full(len(items), 2 ** level, dtype=float) for level, items in enumerate(self._levels)]
+        )
+        order = np.argsort(values, kind="mergesort")
+        return values[order], weights[order]
@@ -0,0 +1,397 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+from uuid import uuid4
+
+from response_encoding import EncodedBody
+
+# Deletes a fill lock only if we still own it.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class TwoTierResponseCache:
+    """
+    Serialized JSON responses cached in a per-process LRU in front of Redis.
+
+    Entries are the response body bytes exactly as first sent, so a hit is
+    served without decoding or re-encoding JSON. Each request keeps one entry,
+    labelled with the ``version_tag`` of the data it was computed from. An
+    entry is fresh while its tag is current and its TTL has not run out. After
+    that it stays usable as stale for ``stale_seconds``, so callers can get
+    it at once while ``refresh_in_background`` recomputes it. The local tier is
+    bounded by ``max_entries`` and ``max_bytes``. On a local miss Redis is
+    consulted, and a Redis hit is promoted into the local tier.
+
+    Local entries are held as ``EncodedBody``: the ETag and the compressed
+    copies (for bodies of at least ``compress_min_bytes``) are made once when
+    an entry is stored, and count towards ``max_bytes``.
+
+    ``single_flight`` lets one caller per key compute a missing entry. It is
+    enforced with an in-process lock and, across processes, a short Redis
+    lock. Everyone else waits for that entry instead of recomputing it; a
+    caller in another process stops waiting as soon as the lock is released,
+    and computes the entry itself if none was stored for its tag.
+
+    Invalidation is per dependency tag (e.g. ``"surveys"``): ``versions``
+    gives the current counter of each tag a response depends on, and callers
+    fold them into its ``version_tag``. ``invalidate`` increments only the
+    named tags in Redis and publishes their names on ``channel``. Each process
+    keeps its copies current from that subscription, so a warm local hit makes
+    no network calls. While the subscription is down the versions are re-read
+    from Redis at most every ``version_poll_seconds``. Without Redis the local
+    tier keeps working on its own.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        stale_seconds: float = 0,
+        fill_lock_seconds: float = 30,
+        version_key_prefix: str = "analytics:cache:version",
+        channel: str = "analytics:cache:invalidations",
+        version_poll_seconds: float = 1.0,
+        refresh_workers: int = 2,
+        compress_min_bytes: int = 1024,
+    ) -> None:
+        self._redis = redis_client
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.stale_seconds = stale_seconds
+        self.fill_lock_seconds = fill_lock_seconds
+        self.version_key_prefix = version_key_prefix
+        self.channel = channel
+        self.version_poll_seconds = version_poll_seconds
+        self.refresh_workers = max(1, refresh_workers)
+        self.compress_min_bytes = compress_min_bytes
+        self._lock = threading.Lock()
+        # key -> (version_tag, fresh_until, body)
+        self._entries: "OrderedDict[str, Tuple[str, float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._fills: Dict[str, threading.Event] = {}
+        self._refreshing: Set[str] = set()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        self._versions: Dict[str, int] = {}
+        self._version_checked_at = float("-inf")
+        self._listener: Optional[threading.Thread] = None
+        self._listener_live = False
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.refreshes = 0
+
+    def versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        tags = list(tags)
+        self._ensure_listener()
+        with self._lock:
+            unknown = [tag for tag in tags if tag not in self._versions]
+        now = time.monotonic()
+        if not self._listener_live and now - self._version_checked_at >= self.version_poll_seconds:
+            self._version_checked_at = now
+            with self._lock:
+                unknown = list({*self._versions, *tags})
+        if unknown:
+            self._refresh_versions(unknown)
+        with self._lock:
+            return {tag: self._versions.get(tag, 0) for tag in tags}
+
+    def invalidate(self, *tags: str) -> None:
+        """Outdate responses depending on ``tags``, in this process and (through Redis) all others."""
+        for tag in tags:
+            try:
+                version = int(self._redis.incr(self._version_key(tag)))
+            except Exception:
+                with self._lock:
+                    version = self._versions.get(tag, 0) + 1
+            else:
+                try:
+                    self._redis.publish(self.channel, tag)
+                except Exception:
+                    pass
+            with self._lock:
+                self._versions[tag] = version
+
+    def get(self, key: str, version_tag: str) -> Tuple[Optional[bytes], str]:
+        """``(body, state)`` with state ``"hit"``, ``"stale"`` (body is the previous payload) or ``"miss"``."""
+        body, state, source = self._lookup(key, version_tag)
+        with self._lock:
+            if state == "hit":
+                if source == "local":
+                    self.local_hits += 1
+                else:
+                    self.redis_hits += 1
+            elif state == "stale":
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+        return body, state
+
+    def set(self, key: str, version_tag: str, body: bytes, ttl_seconds: int) -> EncodedBody:
+        """Store ``body``; returns it as the ``EncodedBody`` hits will be served from."""
+        fresh_until = time.time() + ttl_seconds
+        body = self._store_local(key, version_tag, fresh_until, body)
+        try:
+            # Tag and absolute expiry ride along so other processes judge freshness the same way.
+            self._redis.setex(
+                key,
+                int(ttl_seconds + self.stale_seconds),
+                f"{fresh_until:.3f}\n{version_tag}\n{body.decode('utf-8')}",
+            )
+        except Exception:
+            pass
+        return body
+
+    @contextmanager
+    def single_flight(self, key: str, version_tag: str) -> Iterator[Optional[bytes]]:
+        """
+        Yields a fresh body if another caller produced one while we waited,
+        otherwise ``None``, and the caller computes (and ``set``\\s) the entry.
+        """
+        with self._lock:
+            event = self._fills.get(key)
+            leader = event is None
+            if leader:
+                event = self._fills[key] = threading.Event()
+
+        if not leader:
+            event.wait(self.fill_lock_seconds)
+            yield self._coalesced_body(key, version_tag)
+            return
+
+        token = None
+        try:
+            token = self._acquire_fill_lock(key)
+            body = None
+            if token is None:
+                # Another process is computing this entry; wait for it to land,
+                # or compute it here once that process lets go of the lock.
+                deadline = time.monotonic() + self.fill_lock_seconds
+                while body is None and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    body = self._coalesced_body(key, version_tag)
+                    if body is None and not self._fill_lock_held(key):
+                        body = self._coalesced_body(key, version_tag)
+                        break
+            yield body
+        finally:
+            if token is not None:
+                self._release_fill_lock(key, token)
+            with self._lock:
+                self._fills.pop(key, None)
+            event.set()
+
+    def refresh_in_background(self, key: str, refresh: Callable[[], None]) -> bool:
+        """Run ``refresh`` on the refresh pool unless one is already running for ``key``."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers,
+                    thread_name_prefix="analytics-cache-refresh",
+                )
+            executor = self._refresh_executor
+
+        def run():
+            try:
+                refresh()
+            except Exception as exc:
+                print(f"Background analytics cache refresh failed: {exc}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        executor.submit(run)
+        return True
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "versions": dict(self._versions),
+                "listener_live": self._listener_live,
+            }
+
+    def _lookup(self, key: str, version_tag: str) -> Tuple[Optional[bytes], str, str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        state = self._state(entry, version_tag, now)
+        if state == "hit":
+            return entry[2], "hit", "local"
+
+        # Another process may already have refreshed it.
+        remote = self._redis_entry(key)
+        remote_state = self._state(remote, version_tag, now)
+        if remote_state == "hit" or (remote_state == "stale" and state == "miss"):
+            return self._store_local(key, *remote), remote_state, "redis"
+        if state == "stale":
+            return entry[2], "stale", "local"
+        if entry is not None:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._discard_locked(key)
+        return None, "miss", ""
+
+    def _state(self, entry, version_tag: str, now: float) -> str:
+        if entry is None:
+            return "miss"
+        tag, fresh_until, _body = entry
+        if tag == version_tag and fresh_until > now:
+            return "hit"
+        if self.stale_seconds > 0 and fresh_until + self.stale_seconds > now:
+            return "stale"
+        return "miss"
+
+    def _coalesced_body(self, key: str, version_tag: str) -> Optional[bytes]:
+        body, state, _source = self._lookup(key, version_tag)
+        if state != "hit":
+            return None
+        with self._lock:
+            self.coalesced += 1
+        return body
+
+    def _redis_entry(self, key: str) -> Optional[Tuple[str, float, bytes]]:
+        try:
+            raw = self._redis.get(key)
+        except Exception:
+            return None
+        if raw is None:
+            return None
+        fresh_until, _, rest = raw.partition("\n")
+        version_tag, _, body = rest.partition("\n")
+        try:
+            return version_tag, float(fresh_until), body.encode("utf-8")
+        except ValueError:
+            return None
+
+    def _acquire_fill_lock(self, key: str) -> Optional[str]:
+        token = uuid4().hex
+        try:
+            acquired = self._redis.set(
+                f"{key}:fill", token, nx=True, px=int(self.fill_lock_seconds * 1000)
+            )
+        except Exception:
+            # Without Redis only the in-process lock applies.
+            return token
+        return token if acquired else None
+
+    def _fill_lock_held(self, key: str) -> bool:
+        try:
+            return bool(self._redis.exists(f"{key}:fill"))
+        except Exception:
+            return False
+
+    def _release_fill_lock(self, key: str, token: str) -> None:
+        try:
+            self._redis.eval(_RELEASE_LOCK_SCRIPT, 1, f"{key}:fill", token)
+        except Exception:
+            pass
+
+    def _store_local(
+        self, key: str, version_tag: str, fresh_until: float, body: bytes
+    ) -> EncodedBody:
+        body = EncodedBody(body, self.compress_min_bytes)
+        with self._lock:
+            self._discard_locked(key)
+            self._entries[key] = (version_tag, fresh_until, body)
+            self._bytes += body.stored_size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._discard_locked(oldest)
+                self.evictions += 1
+        return body
+
+    def _discard_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2].stored_size
+
+    def _version_key(self, tag: str) -> str:
+        return f"{self.version_key_prefix}:{tag}"
+
+    def _refresh_versions(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            try:
+                version = int(self._redis.get(self._version_key(tag)) or 0)
+            except Exception:
+                with self._lock:
+                    self._versions.setdefault(tag, 0)
+                continue
+            with self._lock:
+                self._versions[tag] = version
+
+    def _ensure_listener(self) -> None:
+        if self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(
+                target=self._listen,
+                name="analytics-cache-invalidations",
+                daemon=True,
+            )
+        self._listener.start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+            except Exception:
+                # Polling covers for us; clients without pub/sub never get a listener.
+                self._listener_live = False
+                if not hasattr(self._redis, "pubsub"):
+                    return
+                time.sleep(max(self.version_poll_seconds, 1.0))
+                continue
+            try:
+                # Catch up on invalidations published while we were not subscribed.
+                with self._lock:
+                    known = list(self._versions)
+                self._refresh_versions(known)
+                self._listener_live = True
+                for message in pubsub.listen():
+                    # Re-read the counter: concurrent invalidations may publish out of order.
+                    self._refresh_versions([str(message["data"])])
+            except Exception:
+                pass
+            finally:
+                self._listener_live = False
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            time.sleep(max(self.version_poll_seconds, 1.0))
@@ -0,0 +1,78 @@
+import gzip
+import hashlib
+from typing import Dict, Optional, Tuple
+
+try:  # Optional; without it clients get gzip.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+# Preferred first when the client accepts several.
+_ENCODINGS = ("br", "gzip")
+
+
+class EncodedBody(bytes):
+    """
+    Response body bytes with their ETag and compressed forms.
+
+    Built once when a body is stored, so serving it costs no hashing or
+    compression. Bodies shorter than ``compress_min_bytes`` are only hashed.
+    Compares and slices like the plain bytes it wraps.
+    """
+
+    etag: str
+    encodings: Dict[str, bytes]
+
+    def __new__(cls, body: bytes, compress_min_bytes: int = 1024) -> "EncodedBody":
+        if isinstance(body, EncodedBody):
+            return body
+        encoded = super().__new__(cls, body)
+        encoded.etag = hashlib.sha256(body).hexdigest()[:32]
+        encoded.encodings = {}
+        if len(body) >= compress_min_bytes:
+            encoded.encodings["gzip"] = gzip.compress(body, compresslevel=6)
+            if brotli is not None:
+                encoded.encodings["br"] = brotli.compress(body, quality=5)
+        return encoded
+
+    @property
+    def stored_size(self) -> int:
+        return len(self) + sum(len(data) for data in self.encodings.values())
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an ``If-None-Match`` header names any representation of this body."""
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate == "*":
+                return True
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate.strip('"').split("-", 1)[0] == self.etag:
+                return True
+        return False
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Tuple[Optional[str], bytes, str]:
+        """``(content_encoding, data, etag)`` for the best encoding the client accepts."""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in _ENCODINGS:
+            if encoding in accepted and encoding in self.encodings:
+                return encoding, self.encodings[encoding], f'"{self.etag}-{encoding}"'
+        return None, bytes(self), f'"{self.etag}"'
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> set:
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class RLLearningPipeline:
+    """
+    Applies RL experiences produced by score-only analytics reads.
+
+    Read endpoints hand their experiences to ``sink(name, dedupe_key)`` instead
+    of updating models inline. ``drain`` applies everything queued per learner
+    in one batch, from the background thread or on demand. Experiences carrying
+    a ``dedupe_key`` (the survey data version) describe a learner's whole
+    snapshot, so a newer keyed batch replaces any still queued for that
+    learner, and a key that was already applied is not queued again. Reads
+    between two drains therefore train each row once, not once per read.
+    """
+
+    def __init__(
+        self,
+        learner_provider: Callable[[str], Optional[Callable[[list], int]]],
+        flush_interval_seconds: float = 0,
+    ) -> None:
+        self._learner_provider = learner_provider
+        self.flush_interval_seconds = flush_interval_seconds
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._pending: "OrderedDict[tuple, list]" = OrderedDict()
+        self._applied_keys: dict = {}
+        self._sequence = 0
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.experiences_applied = 0
+        self.batches_applied = 0
+        self.failures = 0
+
+    def sink(self, name: str, dedupe_key=None) -> Callable[[list], None]:
+        return lambda experiences: self.enqueue(name, experiences, dedupe_key)
+
+    def enqueue(self, name: str, experiences: list, dedupe_key=None) -> None:
+        if not experiences:
+            return
+        with self._lock:
+            if dedupe_key is None:
+                self._sequence += 1
+                queue_key = (name, None, self._sequence)
+            elif self._applied_keys.get(name) == dedupe_key:
+                return
+            else:
+                # Each keyed read covers the whole snapshot: only the newest one is kept.
+                for key in [key for key in self._pending if key[0] == name and key[1] is not None]:
+                    del self._pending[key]
+                queue_key = (name, dedupe_key, None)
+            self._pending[queue_key] = list(experiences)
+        self._ensure_worker()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(experiences) for experiences in self._pending.values())
+
+    def drain(self) -> dict:
+        """Apply all queued experiences; returns the number applied per learner."""
+        with self._drain_lock:
+            with self._lock:
+                pending, self._pending = self._pending, OrderedDict()
+
+            batches: "OrderedDict[str, list]" = OrderedDict()
+            for (name, dedupe_key, _sequence), experiences in pending.items():
+                batches.setdefault(name, []).extend(experiences)
+                if dedupe_key is not None:
+                    with self._lock:
+                        self._applied_keys[name] = dedupe_key
+
+            applied = {}
+            for name, experiences in batches.items():
+                learner = self._learner_provider(name)
+                if learner is None:
+                    continue
+                try:
+                    applied[name] = int(learner(experiences) or 0)
+                except Exception as exc:
+                    print(f"RL learning batch for {name} failed: {exc}")
+                    self.failures += 1
+                    continue
+                self.experiences_applied += applied[name]
+                self.batches_applied += 1
+            return applied
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending_count(),
+            "experiences_applied": self.experiences_applied,
+            "batches_applied": self.batches_applied,
+            "failures": self.failures,
+        }
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _ensure_worker(self) -> None:
+        if self.flush_interval_seconds <= 0:
+            return
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(
+            target=self._run_worker,
+            name="rl-learning-pipeline",
+            daemon=True,
+        )
+        self._worker.start()
+
+    def _run_worker(self) -> None:
+        while not self._stop.wait(self.flush_interval_seconds):
+            self.drain()
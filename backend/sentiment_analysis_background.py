@@ -3,7 +3,8 @@ import json
 import random
 import os
 import numpy as np
-from collections import defaultdict
+
+from survey_preprocessing import PreparedSurveyFrame
 
 # Original dictionary mapping backgrounds to sentiment scores
 background_sentiment = {
@@ -90,80 +91,10 @@ OCCUPATION_SENTIMENT_POLICY = {
     "tailoring assistant": {"prior": 2.8, "cap": 3.2},
 }
 
-ACADEMIC_TEXT_TO_SCORE = {
-    "excellent": 5,
-    "outstanding": 5,
-    "very good": 4.5,
-    "good": 4,
-    "above average": 4,
-    "average": 3,
-    "below average": 2,
-    "weak": 1.5,
-    "poor": 1,
-    "fail": 1
-}
-
-
 def _clamp_score(value, min_score=1, max_score=5):
     return max(min_score, min(max_score, value))
 
 
-def _to_academic_scale(value):
-    """
-    Convert raw academic performance values to a 1-5 scale.
-    Supports numeric values (1-5, 0-10, 0-100) and common text labels.
-    """
-    if value is None or pd.isna(value):
-        return None
-
-    # Numeric conversions
-    if isinstance(value, (int, float, np.number)):
-        numeric = float(value)
-        if numeric < 0:
-            return None
-        if numeric <= 5:
-            # Keep within sentiment range; treat 0 as lowest bound.
-            return _clamp_score(numeric if numeric > 0 else 1)
-        if numeric <= 10:
-            return _clamp_score(numeric / 2.0)
-        if numeric <= 100:
-            return _clamp_score(numeric / 20.0)
-        return _clamp_score(numeric)
-
-    # Text conversions
-    text = str(value).strip().lower()
-    if not text:
-        return None
-
-    grade_map = {"a+": 5, "a": 4.8, "b+": 4.2, "b": 4, "c+": 3.2, "c": 3, "d": 2, "f": 1}
-    if text in grade_map:
-        return grade_map[text]
-
-    for label, score in ACADEMIC_TEXT_TO_SCORE.items():
-        if label in text:
-            return score
-
-    # Attempt numeric extraction from strings like "8/10" or "78%"
-    try:
-        cleaned = text.replace("%", "").replace("/10", "").replace("/5", "")
-        numeric = float(cleaned)
-        return _to_academic_scale(numeric)
-    except Exception:
-        return None
-
-
-def _resolve_column(df, primary_name):
-    """Resolve exact or trimmed column names (handles accidental trailing spaces)."""
-    if primary_name in df.columns:
-        return primary_name
-
-    normalized_target = primary_name.strip().lower()
-    for col in df.columns:
-        if str(col).strip().lower() == normalized_target:
-            return col
-    return None
-
-
 def _normalize_background_label(value):
     """Normalize raw background labels so scoring is learned per job type."""
     normalized = " ".join(str(value).strip().split())
@@ -439,12 +370,72 @@ except Exception as e:
     print(f"Error initializing RL agent: {e}")
     rl_agent = BackgroundSentimentRL()
 
-def get_background_sentiment(data, persist_artifacts=True):
+SENTIMENT_CATEGORIES = ["Highly Positive", "Positive", "Neutral", "Negative", "Highly Negative"]
+_SKIPPED_BACKGROUND_LABELS = {"none", "null", ""}
+_CATEGORY_SUMMARY_KEYS = {
+    "Highly Positive": "highly_positive",
+    "Positive": "positive",
+    "Neutral": "neutral",
+    "Negative": "negative",
+    "Highly Negative": "highly_negative",
+}
+
+
+def _score_category(score):
+    if score >= 4.5:
+        return "Highly Positive"
+    if score >= 3.5:
+        return "Positive"
+    if score >= 2.5:
+        return "Neutral"
+    if score >= 1.5:
+        return "Negative"
+    return "Highly Negative"
+
+
+def learn_from_experiences(experiences):
+    """
+    Apply background training experiences (inline or queued by score-only reads).
+
+    Returns the number of experiences learned from; the active scorer's model
+    is saved once per call.
+    """
+    if not experiences:
+        return 0
+    if BACKGROUND_SCORER == "simple_linear":
+        for experience in experiences:
+            prior_score = NORMALIZED_BACKGROUND_PRIORS.get(experience["job_key"], 3.0)
+            _online_update_simple_linear(prior_score, experience["observed"])
+        _save_simple_linear_params(SIMPLE_LINEAR_PARAMS)
+        return len(experiences)
+
+    # RL fallback path: one batch update over all experiences.
+    for experience in experiences:
+        job_key = experience["job_key"]
+        predicted_score = rl_agent.get_policy_score(job_key)
+        rl_agent.add_experience(
+            job_key, predicted_score, experience["observed"], sample_weight=experience["weight"]
+        )
+    return len(experiences) if rl_agent.update_model() else 0
+
+
+def get_background_sentiment(
+    data,
+    persist_artifacts=True,
+    include_details=True,
+    score_only=False,
+    experience_sink=None,
+    prepared=None,
+):
     """
     Analyze background sentiment from survey data
     
     Parameters:
     - data: DataFrame containing survey responses with 'Background of the Child ' column
+    - include_details: build the per-response ``background_details`` list
+    - score_only: never update the model; training experiences go to ``experience_sink``
+      (applied later by ``learn_from_experiences``)
+    - prepared: shared ``PreparedSurveyFrame`` for ``data`` (built here when omitted)
     
     Returns:
     - Dictionary with sentiment analysis results
@@ -471,159 +462,76 @@ def get_background_sentiment(data, persist_artifacts=True):
         print("Warning: No data provided or DataFrame is empty")
         return default_result
     
+    if prepared is None:
+        prepared = PreparedSurveyFrame(data)
+
     # Check if the required column exists
-    background_column = _resolve_column(data, 'Background of the Child ')
+    background_column = prepared.column('Background of the Child ')
     if background_column not in data.columns:
         print(f"Warning: Column '{background_column}' not found in DataFrame. Available columns: {list(data.columns)}")
         return default_result
 
-    academic_column = _resolve_column(data, 'Academic Performance ')
+    academic_column = prepared.academic_column
     if not academic_column:
         print("Warning: Academic Performance column not found. RL updates will be skipped for this batch.")
-    
-    # Apply sentiment analysis
-    category_counts = {"Highly Positive": 0, "Positive": 0, "Neutral": 0, "Negative": 0, "Highly Negative": 0}
-    positive_count = 0
-    negative_count = 0
-    neutral_count = 0
-    total_score = 0
-    processed_count = 0
-    background_data = []
-    prepared_rows = []
-    raw_label_counts = defaultdict(lambda: defaultdict(int))
-    job_stats = {}
-    academic_scores = []
-    training_samples = 0
 
-    # First pass: gather job-level stats from responses.
-    for idx, row in data.iterrows():
-        # Access column using proper pandas Series indexing
-        background = row[background_column] if background_column in row.index else None
-        
-        # Check if background is None, NaN, or empty string
-        if background is None or pd.isna(background):
-            continue
-        
-        background = str(background).strip()
-        
-        # Skip empty strings
-        if not background or background.lower() in ['none', 'null', '']:
-            continue
-        
-        # Convert observed academic performance to model feedback signal
-        observed_academic = _to_academic_scale(row.get(academic_column)) if academic_column else None
+    training_samples = 0
 
-        try:
-            job_key = _normalize_background_label(background)
-            raw_label_counts[job_key][background] += 1
-
-            if job_key not in job_stats:
-                job_stats[job_key] = {"response_count": 0, "academic_scores": []}
-
-            job_stats[job_key]["response_count"] += 1
-            if observed_academic is not None:
-                job_stats[job_key]["academic_scores"].append(observed_academic)
-
-            prepared_rows.append(
-                {
-                    "background": background,
-                    "job_key": job_key,
-                    "academic_score": observed_academic,
-                }
-            )
-        except Exception as e:
-            print(f"Error processing background '{background}': {e}")
-            continue
+    keep, backgrounds, job_keys, academic_values = _background_rows(data, prepared, background_column)
+    academic = pd.Series(academic_values, index=job_keys.index)
 
-    if BACKGROUND_SCORER == "simple_linear":
-        if BACKGROUND_RL_TRAIN_ON_ANALYSIS:
-            for row_data in prepared_rows:
-                observed = row_data["academic_score"]
-                if observed is None:
-                    continue
-                prior_score = NORMALIZED_BACKGROUND_PRIORS.get(row_data["job_key"], 3.0)
-                _online_update_simple_linear(prior_score, observed)
-                training_samples += 1
-            model_updated = training_samples > 0
-            if model_updated:
-                _save_simple_linear_params(SIMPLE_LINEAR_PARAMS)
-        else:
-            model_updated = False
-    else:
-        # RL fallback path remains available and is also always-on.
-        if BACKGROUND_RL_TRAIN_ON_ANALYSIS:
-            for row_data in prepared_rows:
-                observed = row_data["academic_score"]
-                if observed is None:
-                    continue
-                job_key = row_data["job_key"]
-                count_for_job = job_stats.get(job_key, {}).get("response_count", 1)
-                sample_weight = 1.0 / max(count_for_job, 1)
-                predicted_score = rl_agent.get_policy_score(job_key)
-                rl_agent.add_experience(job_key, predicted_score, observed, sample_weight=sample_weight)
-                training_samples += 1
-            model_updated = rl_agent.update_model() if training_samples > 0 else False
-        else:
-            model_updated = False
+    # Job-level stats in first-appearance order.
+    job_groups = academic.groupby(job_keys, sort=False)
+    job_response_counts = job_groups.size()
+    job_academic_means = job_groups.mean()
 
-    # Cache deterministic score per unique job so repeated rows don't alter job score.
-    job_scores = {job_key: _predict_background_score(job_key, rl_fallback_agent=rl_agent) for job_key in job_stats}
-
-    # Second pass: render response rows using job-level score (frequency doesn't change score).
-    for row_data in prepared_rows:
-        background = row_data["background"]
-        job_key = row_data["job_key"]
-        observed_academic = row_data["academic_score"]
-        score = job_scores.get(job_key, rl_agent.get_policy_score(job_key))
-        total_score += score
-        processed_count += 1
-
-        if score >= 4.5:
-            category = "Highly Positive"
-            positive_count += 1
-        elif score >= 3.5:
-            category = "Positive"
-            positive_count += 1
-        elif score >= 2.5:
-            category = "Neutral"
-            neutral_count += 1
-        elif score >= 1.5:
-            category = "Negative"
-            negative_count += 1
+    model_updated = False
+    if BACKGROUND_RL_TRAIN_ON_ANALYSIS:
+        experiences = []
+        for job_key, observed in zip(job_keys.tolist(), academic_values.tolist()):
+            if np.isnan(observed):
+                continue
+            count_for_job = int(job_response_counts.get(job_key, 1))
+            experiences.append(
+                {"job_key": job_key, "observed": observed, "weight": 1.0 / max(count_for_job, 1)}
+            )
+        training_samples = len(experiences)
+        if score_only:
+            if experiences and experience_sink is not None:
+                experience_sink(experiences)
         else:
-            category = "Highly Negative"
-            negative_count += 1
+            model_updated = learn_from_experiences(experiences) > 0
 
-        category_counts[category] += 1
+    job_scores, job_categories, summary = _summarize_background_jobs(
+        job_response_counts, job_academic_means
+    )
+    processed_count = len(job_keys)
 
-        background_data.append({
-            "background": background,
-            "score": round(score, 2),
-            "category": category,
-            "academic_performance_score": round(observed_academic, 2) if observed_academic is not None else None
-        })
-
-    # Calculate average score
-    avg_score = total_score / processed_count if processed_count > 0 else 0
+    # Render response rows using job-level score (frequency doesn't change score).
+    background_data = []
+    if (include_details or persist_artifacts) and processed_count > 0:
+        row_scores = job_keys.map(
+            {job_key: round(score, 2) for job_key, score in job_scores.items()}
+        )
+        row_categories = job_keys.map(job_categories)
+        background_data = [
+            {
+                "background": background,
+                "score": score,
+                "category": category,
+                "academic_performance_score": academic_score,
+            }
+            for background, score, category, academic_score in zip(
+                backgrounds.tolist(),
+                row_scores.tolist(),
+                row_categories.tolist(),
+                [
+                    None if value is None else round(value, 2)
+                    for value in prepared.academic_scale()[keep].tolist()
+                ],
+            )
+        ]
 
-    # Correlation between learned sentiment score and academic performance
-    academic_correlation = 0
-    model_scores = []
-    academic_scores = []
-    for job_key, stats in job_stats.items():
-        if not stats["academic_scores"]:
-            continue
-        model_scores.append(job_scores.get(job_key, _predict_background_score(job_key, rl_fallback_agent=rl_agent)))
-        academic_scores.append(float(np.mean(stats["academic_scores"])))
-
-    if len(academic_scores) >= 2 and len(model_scores) >= 2:
-        paired_scores = [(m, a) for m, a in zip(model_scores, academic_scores) if a is not None]
-        if len(paired_scores) >= 2:
-            model_vals = np.array([m for m, _ in paired_scores], dtype=float)
-            academic_vals = np.array([a for _, a in paired_scores], dtype=float)
-            if np.std(model_vals) > 0 and np.std(academic_vals) > 0:
-                academic_correlation = float(np.corrcoef(model_vals, academic_vals)[0, 1])
-    
     # Persist Excel/chart artifacts only for offline workflows.
     if persist_artifacts and processed_count > 0:
         try:
@@ -638,8 +546,8 @@ def get_background_sentiment(data, persist_artifacts=True):
             import matplotlib.pyplot as plt
             
             plt.figure(figsize=(10, 6))
-            categories = ["Highly Positive", "Positive", "Neutral", "Negative", "Highly Negative"]
-            values = [category_counts[cat] for cat in categories]
+            categories = SENTIMENT_CATEGORIES
+            values = [summary[_CATEGORY_SUMMARY_KEYS[cat]] for cat in categories]
             colors = ['darkgreen', 'lightgreen', 'gold', 'orangered', 'darkred']
             
             bars = plt.bar(categories, values, color=colors)
@@ -666,22 +574,113 @@ def get_background_sentiment(data, persist_artifacts=True):
     
     # Return structured data for the dashboard
     return {
-        "positive_count": positive_count,
-        "negative_count": negative_count,
-        "neutral_count": neutral_count,
-        "average_score": round(avg_score, 2),
-        "highly_positive": category_counts["Highly Positive"],
-        "positive": category_counts["Positive"],
-        "neutral": category_counts["Neutral"],
-        "negative": category_counts["Negative"],
-        "highly_negative": category_counts["Highly Negative"],
-        "background_details": background_data,  # Added for detailed reporting
-        "academic_correlation": round(academic_correlation, 3),
+        **summary,
+        "background_details": background_data if include_details else [],  # Added for detailed reporting
         "training_samples": training_samples,
         "model_updated": model_updated,
         "scoring_model": BACKGROUND_SCORER,
     }
 
+
+def _background_rows(data, prepared, background_column):
+    """Per-row (keep mask, cleaned labels, job keys, academic scores) for usable background answers."""
+    # Clean and normalize each distinct label once instead of once per response.
+    label_codes, unique_labels = pd.factorize(data[background_column], use_na_sentinel=True)
+    cleaned_labels = [str(label).strip() for label in unique_labels]
+    unique_keep = np.array(
+        [label.lower() not in _SKIPPED_BACKGROUND_LABELS for label in cleaned_labels] + [False],
+        dtype=bool,
+    )
+    # Missing values carry code -1, which indexes the trailing "skip" slot.
+    keep = unique_keep[label_codes]
+    label_codes = label_codes[keep]
+    row_index = data.index[keep]
+    backgrounds = np.array(cleaned_labels, dtype=object)[label_codes]
+    unique_job_keys = np.array(
+        [_normalize_background_label(label) for label in cleaned_labels],
+        dtype=object,
+    )
+    job_keys = pd.Series(unique_job_keys[label_codes], index=row_index)
+    return keep, backgrounds, job_keys, prepared.academic_scores()[keep]
+
+
+def _summarize_background_jobs(job_response_counts, job_academic_means):
+    """Score each job with the current model and roll job-level stats up into the dashboard counts."""
+    # Cache deterministic score per unique job so repeated rows don't alter job score.
+    job_scores = pd.Series(
+        {
+            job_key: _predict_background_score(job_key, rl_fallback_agent=rl_agent)
+            for job_key in job_response_counts.index
+        },
+        dtype=float,
+    )
+    job_categories = pd.Series(
+        [_score_category(score) for score in job_scores.tolist()],
+        index=job_scores.index,
+        dtype=object,
+    )
+
+    processed_count = int(job_response_counts.sum())
+    category_counts = dict.fromkeys(SENTIMENT_CATEGORIES, 0)
+    for category, count in job_response_counts.groupby(job_categories).sum().items():
+        category_counts[category] = int(count)
+
+    total_score = float((job_scores * job_response_counts).sum())
+    avg_score = total_score / processed_count if processed_count > 0 else 0
+
+    # Correlation between learned sentiment score and academic performance
+    academic_correlation = 0
+    scored_jobs = job_academic_means.notna()
+    if int(scored_jobs.sum()) >= 2:
+        model_vals = job_scores[scored_jobs].to_numpy(dtype=float)
+        academic_vals = job_academic_means[scored_jobs].to_numpy(dtype=float)
+        if np.std(model_vals) > 0 and np.std(academic_vals) > 0:
+            academic_correlation = float(np.corrcoef(model_vals, academic_vals)[0, 1])
+
+    summary = {
+        "positive_count": category_counts["Highly Positive"] + category_counts["Positive"],
+        "negative_count": category_counts["Negative"] + category_counts["Highly Negative"],
+        "neutral_count": category_counts["Neutral"],
+        "average_score": round(avg_score, 2),
+        "academic_correlation": round(academic_correlation, 3),
+    }
+    for category, key in _CATEGORY_SUMMARY_KEYS.items():
+        summary[key] = category_counts[category]
+    return job_scores, job_categories, summary
+
+
+def new_aggregate_state():
+    # Insertion-ordered per-job stats, matching the full analysis' first-appearance order.
+    return {"job_counts": {}, "academic_sums": {}, "academic_counts": {}}
+
+
+def fold_aggregate_rows(state, data, prepared):
+    """Add appended survey rows to the running per-job background stats."""
+    background_column = prepared.column('Background of the Child ')
+    if background_column not in data.columns:
+        return
+    _keep, _backgrounds, job_keys, academic_values = _background_rows(data, prepared, background_column)
+    for job_key, observed in zip(job_keys.tolist(), academic_values.tolist()):
+        state["job_counts"][job_key] = state["job_counts"].get(job_key, 0) + 1
+        state["academic_sums"].setdefault(job_key, 0.0)
+        state["academic_counts"].setdefault(job_key, 0)
+        if not np.isnan(observed):
+            state["academic_sums"][job_key] += observed
+            state["academic_counts"][job_key] += 1
+
+
+def summarize_aggregate_state(state):
+    """Dashboard counts from the running stats, scored with the current model (O(distinct jobs))."""
+    job_response_counts = pd.Series(state["job_counts"], dtype="int64")
+    academic_counts = pd.Series(state["academic_counts"], dtype=float)
+    job_academic_means = pd.Series(state["academic_sums"], dtype=float) / academic_counts.where(
+        academic_counts > 0
+    )
+    _job_scores, _job_categories, summary = _summarize_background_jobs(
+        job_response_counts, job_academic_means
+    )
+    return {**summary, "total_responses": int(job_response_counts.sum())}
+
 # For testing the module directly
 if __name__ == "__main__":
     try:
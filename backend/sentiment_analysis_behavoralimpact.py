@@ -1,6 +1,8 @@
 import math
 import os
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import replace
 
 import numpy as np
@@ -8,10 +10,12 @@ import pandas as pd
 import torch
 
 from behavioral_rl import (
+    EmbeddingCache,
     SentenceEmbeddingEncoder,
-    BehavioralScoreNet,
+    BehavioralModelRegistry,
     TrainingConfig,
     build_distribution_stats,
+    build_model_from_checkpoint,
     compute_regression_metrics,
     correlation_summary,
     determine_correlation_reason,
@@ -19,11 +23,16 @@ from behavioral_rl import (
     save_checkpoint,
     train_behavioral_model,
 )
+from survey_preprocessing import PreparedSurveyFrame
 
 
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
 CHECKPOINT_PATH = os.path.join(MODEL_DIR, "behavioral_score_model.pt")
+EMBEDDING_CACHE_DIR = os.getenv(
+    "BEHAVIORAL_EMBEDDING_CACHE_DIR",
+    os.path.join(MODEL_DIR, "embedding_cache"),
+)
 # Keep request-time training short for responsive API calls.
 # Continuous learning still happens because each request warm-starts from checkpoint.
 CONTINUOUS_TRAIN_EPOCHS = int(os.getenv("BEHAVIORAL_CONTINUOUS_TRAIN_EPOCHS", "40"))
@@ -33,75 +42,10 @@ TARGET_CANDIDATE_RMSE = float(os.getenv("BEHAVIORAL_TARGET_CANDIDATE_RMSE", "0.6
 TARGET_CANDIDATE_R2 = float(os.getenv("BEHAVIORAL_TARGET_CANDIDATE_R2", "0.0"))
 HOLDOUT_RATIO = float(os.getenv("BEHAVIORAL_HOLDOUT_RATIO", "0.2"))
 MIN_HOLDOUT_SAMPLES = int(os.getenv("BEHAVIORAL_MIN_HOLDOUT_SAMPLES", "20"))
+FEATURE_PROFILE_CACHE_SIZE = int(os.getenv("BEHAVIORAL_FEATURE_PROFILE_CACHE_SIZE", "20000"))
 _EMBEDDING_ENCODER = None
 
 
-ACADEMIC_TEXT_TO_SCORE = {
-    "excellent": 5,
-    "outstanding": 5,
-    "very good": 4.5,
-    "good": 4,
-    "above average": 4,
-    "average": 3,
-    "below average": 2,
-    "weak": 1.5,
-    "poor": 1,
-    "fail": 1,
-}
-
-
-def clean_text(text):
-    if pd.isna(text):
-        return ""
-    value = str(text).strip().lower()
-    value = " ".join(value.split())
-    return value
-
-
-def _resolve_column(df, candidates):
-    normalized = {str(col).strip().lower(): col for col in df.columns}
-    for candidate in candidates:
-        match = normalized.get(candidate.strip().lower())
-        if match:
-            return match
-    return None
-
-
-def _to_academic_scale(value):
-    if value is None or pd.isna(value):
-        return None
-
-    if isinstance(value, (int, float, np.number)):
-        numeric = float(value)
-        if numeric < 0:
-            return None
-        if numeric <= 5:
-            return max(1.0, min(5.0, numeric if numeric > 0 else 1.0))
-        if numeric <= 10:
-            return max(1.0, min(5.0, numeric / 2.0))
-        if numeric <= 100:
-            return max(1.0, min(5.0, numeric / 20.0))
-        return max(1.0, min(5.0, numeric))
-
-    text = str(value).strip().lower()
-    if not text:
-        return None
-
-    grade_map = {"a+": 5, "a": 4.8, "b+": 4.2, "b": 4, "c+": 3.2, "c": 3, "d": 2, "f": 1}
-    if text in grade_map:
-        return grade_map[text]
-
-    for label, score in ACADEMIC_TEXT_TO_SCORE.items():
-        if label in text:
-            return score
-
-    cleaned = text.replace("%", "").replace("/10", "").replace("/5", "")
-    try:
-        return _to_academic_scale(float(cleaned))
-    except Exception:
-        return None
-
-
 def _score_to_category(score):
     if score is None:
         return "unknown"
@@ -172,6 +116,60 @@ LOW_INFORMATION_PATTERNS = [
 ]
 
 
+class _PatternGroup:
+    """
+    A weighted pattern table compiled once.
+
+    The joined alternation is only a prefilter: a single alternation with named
+    groups would report one group per match position and silently drop
+    overlapping hits (e.g. "domestic violence" vs "violence"), so texts that hit
+    the prefilter are confirmed against the individually compiled patterns.
+    """
+
+    def __init__(self, *tables):
+        entries = [(pattern, weight) for table in tables for pattern, weight in table]
+        self._compiled = [(re.compile(pattern), float(weight)) for pattern, weight in entries]
+        self._prefilter = (
+            re.compile("|".join(f"(?:{pattern})" for pattern, _ in entries)) if entries else None
+        )
+
+    def score(self, lowered: str) -> float:
+        if self._prefilter is None or self._prefilter.search(lowered) is None:
+            return 0.0
+        total = 0.0
+        for compiled, weight in self._compiled:
+            if compiled.search(lowered):
+                total += weight
+        return total
+
+
+def _pattern_tables():
+    return (
+        NEGATIVE_PATTERNS,
+        POSITIVE_PATTERNS,
+        NEUTRAL_PATTERNS,
+        FEATURE_NEGATIVE_PHRASES,
+        FEATURE_POSITIVE_PHRASES,
+        LOW_INFORMATION_PATTERNS,
+    )
+
+
+def _pattern_tables_fingerprint():
+    return hash(tuple(tuple(table) for table in _pattern_tables()))
+
+
+def _compile_pattern_tables():
+    global _KEYWORD_PATTERNS, _PHRASE_PATTERNS, _LOW_INFORMATION_RE, _PATTERN_FINGERPRINT
+    _KEYWORD_PATTERNS = _PatternGroup(NEGATIVE_PATTERNS, POSITIVE_PATTERNS, NEUTRAL_PATTERNS)
+    _PHRASE_PATTERNS = _PatternGroup(FEATURE_NEGATIVE_PHRASES, FEATURE_POSITIVE_PHRASES)
+    _LOW_INFORMATION_RE = re.compile("|".join(f"(?:{pattern})" for pattern in LOW_INFORMATION_PATTERNS))
+    _PATTERN_FINGERPRINT = _pattern_tables_fingerprint()
+
+
+_compile_pattern_tables()
+_WORD_RE = re.compile(r"[a-zA-Z']+")
+
+
 def _keyword_adjustment(text):
     """
     Domain-aware correction for phrases that clearly imply hardship or wellbeing.
@@ -180,20 +178,7 @@ def _keyword_adjustment(text):
     if not text:
         return 0.0
 
-    lowered = str(text).lower()
-    adjustment = 0.0
-
-    for pattern, weight in NEGATIVE_PATTERNS:
-        if re.search(pattern, lowered):
-            adjustment += weight
-
-    for pattern, weight in POSITIVE_PATTERNS:
-        if re.search(pattern, lowered):
-            adjustment += weight
-
-    for pattern, weight in NEUTRAL_PATTERNS:
-        if re.search(pattern, lowered):
-            adjustment += weight
+    adjustment = _KEYWORD_PATTERNS.score(str(text).lower())
 
     # Keep correction bounded so model signal is still preserved.
     return max(-3.0, min(1.0, adjustment))
@@ -203,15 +188,15 @@ def _text_quality_score(text: str):
     if not text:
         return 0.0
     cleaned = str(text).strip().lower()
-    words = re.findall(r"[a-zA-Z']+", cleaned)
-    chars = [ch for ch in cleaned if ch.isalpha()]
+    words = _WORD_RE.findall(cleaned)
     if not words:
         return 0.1
-    if any(re.fullmatch(pattern, cleaned) for pattern in LOW_INFORMATION_PATTERNS):
+    if _LOW_INFORMATION_RE.fullmatch(cleaned):
         return 0.2
 
+    alpha_count = sum(1 for ch in cleaned if ch.isalpha())
     unique_ratio = len(set(words)) / max(1, len(words))
-    alpha_ratio = len(chars) / max(1, len(cleaned))
+    alpha_ratio = alpha_count / max(1, len(cleaned))
     length_factor = min(1.0, len(words) / 10.0)
     quality = 0.45 * length_factor + 0.35 * unique_ratio + 0.20 * alpha_ratio
     return max(0.1, min(1.0, quality))
@@ -220,14 +205,7 @@ def _text_quality_score(text: str):
 def _phrase_feature_adjustment(text: str):
     if not text:
         return 0.0
-    lowered = str(text).lower()
-    score = 0.0
-    for pattern, weight in FEATURE_NEGATIVE_PHRASES:
-        if re.search(pattern, lowered):
-            score += weight
-    for pattern, weight in FEATURE_POSITIVE_PHRASES:
-        if re.search(pattern, lowered):
-            score += weight
+    score = _PHRASE_PATTERNS.score(str(text).lower())
     return max(-2.8, min(1.4, score))
 
 
@@ -248,6 +226,91 @@ def _feature_strength_profile(text: str):
     }
 
 
+class FeatureProfileCache:
+    """
+    Bounded LRU of feature profiles keyed by normalized behavioral text.
+    Entries are tagged with the pattern-table fingerprint they were computed
+    under, so editing any pattern table invalidates the cache on next use.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = max(0, int(maxsize))
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_many(self, texts):
+        self._ensure_current()
+        profiles = {}
+        result = []
+        with self._lock:
+            for text in texts:
+                profile = profiles.get(text)
+                if profile is None:
+                    profile = self._entries.get(text)
+                    if profile is None:
+                        self.misses += 1
+                        profile = _feature_strength_profile(text)
+                        if self.maxsize:
+                            self._entries[text] = profile
+                            if len(self._entries) > self.maxsize:
+                                self._entries.popitem(last=False)
+                    else:
+                        self.hits += 1
+                        self._entries.move_to_end(text)
+                    profiles[text] = profile
+                else:
+                    self.hits += 1
+                result.append(profile)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def _ensure_current(self):
+        fingerprint = _pattern_tables_fingerprint()
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint != _PATTERN_FINGERPRINT:
+                _compile_pattern_tables()
+            self._entries.clear()
+            self._fingerprint = fingerprint
+
+
+_FEATURE_PROFILE_CACHE = FeatureProfileCache(FEATURE_PROFILE_CACHE_SIZE)
+
+
+def score_feature_profiles(texts):
+    """
+    Score a column of cleaned texts in one pass.
+    Each distinct text is profiled at most once; duplicates share the same (read-only) dict.
+    """
+    return _FEATURE_PROFILE_CACHE.get_many(texts)
+
+
+def _cached_feature_profile(text: str):
+    return score_feature_profiles([text])[0]
+
+
+def feature_profile_cache_stats():
+    return _FEATURE_PROFILE_CACHE.stats()
+
+
 def _clamp_score(score, min_value=1.0, max_value=5.0):
     return max(min_value, min(max_value, float(score)))
 
@@ -481,9 +544,14 @@ def _empty_response(reason="insufficient_pairs", error=None):
 
 
 def _get_embedding_encoder():
+    # The cache only loads the sentence-transformer when it meets an unseen text.
     global _EMBEDDING_ENCODER
     if _EMBEDDING_ENCODER is None:
-        _EMBEDDING_ENCODER = SentenceEmbeddingEncoder(model_name=EMBEDDING_MODEL_NAME, device="cpu")
+        _EMBEDDING_ENCODER = EmbeddingCache(
+            cache_dir=EMBEDDING_CACHE_DIR,
+            model_name=EMBEDDING_MODEL_NAME,
+            encoder_factory=lambda: SentenceEmbeddingEncoder(model_name=EMBEDDING_MODEL_NAME, device="cpu"),
+        )
     return _EMBEDDING_ENCODER
 
 
@@ -496,15 +564,15 @@ def _trim_history(history: dict[str, list[float]]):
 
 
 def _build_model_from_checkpoint(ckpt):
-    config = ckpt.get("config", {})
-    model = BehavioralScoreNet(
-        input_dim=int(ckpt["input_dim"]),
-        hidden_dim=int(config.get("hidden_dim", 128)),
-        dropout=float(config.get("dropout", 0.15)),
-    )
-    model.load_state_dict(ckpt["state_dict"])
-    model.eval()
-    return model
+    return build_model_from_checkpoint(ckpt)
+
+
+# Serves the promoted checkpoint from memory; reloads only when the file is swapped.
+_MODEL_REGISTRY = BehavioralModelRegistry(CHECKPOINT_PATH, EMBEDDING_MODEL_NAME)
+
+
+def behavioral_model_registry_stats():
+    return _MODEL_REGISTRY.stats()
 
 
 def _predict_with_model(model, embeddings: np.ndarray):
@@ -540,7 +608,7 @@ def _lightweight_behavioral_response(prepared_rows):
     std_dev = 0.35
 
     for idx, row in enumerate(prepared_rows):
-        feature_profile = row.get("feature_profile") or _feature_strength_profile(row["text"])
+        feature_profile = row.get("feature_profile") or _cached_feature_profile(row["text"])
         score = _clamp_score(3.5 + float(feature_profile["adjustment"]))
         scores.append(score)
         category = _score_to_category(score)
@@ -749,12 +817,11 @@ def _lightweight_behavioral_response(prepared_rows):
     }
 
 
-def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
-    if data is None or data.empty:
-        return _empty_response(reason="insufficient_pairs")
-
-    behavior_column = _resolve_column(
-        data,
+def _prepare_behavioral_rows(data, prepared=None):
+    """Return (prepared_rows, error) for the non-empty behavioral texts in ``data``."""
+    if prepared is None:
+        prepared = PreparedSurveyFrame(data)
+    behavior_column = prepared.column(
         [
             "Behavioral Impact",
             "Behavioral Impact ",
@@ -762,47 +829,32 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
             "behavioural impact",
         ],
     )
-    academic_column = _resolve_column(
-        data,
-        [
-            "Academic Performance",
-            "Academic Performance ",
-            "academic performance",
-        ],
-    )
-
     if not behavior_column:
-        return _empty_response(
-            reason="insufficient_pairs",
-            error="Behavioral Impact column not found",
-        )
-
-    prepared_rows = []
-    for _, row in data.iterrows():
-        text = clean_text(row.get(behavior_column))
-        if not text:
-            continue
-        academic_score = _to_academic_scale(row.get(academic_column)) if academic_column else None
-        feature_profile = _feature_strength_profile(text)
-        prepared_rows.append(
-            {
-                "text": text,
-                "academic_score": academic_score,
-                "feature_profile": feature_profile,
-            }
+        return [], "Behavioral Impact column not found"
+
+    # Texts and academic scores come pre-parsed (once per distinct value) from the shared frame.
+    texts = prepared.normalized_text(behavior_column)
+    keep = texts != ""
+    texts = texts[keep].tolist()
+    academic_scores = prepared.academic_scale()[keep].tolist()
+
+    prepared_rows = [
+        {
+            "text": text,
+            "academic_score": academic_score,
+            "feature_profile": feature_profile,
+        }
+        for text, academic_score, feature_profile in zip(
+            texts, academic_scores, score_feature_profiles(texts)
         )
-
+    ]
     if not prepared_rows:
-        return _empty_response(reason="insufficient_pairs", error="No non-empty behavioral text rows found")
-
-    if lightweight:
-        return _lightweight_behavioral_response(prepared_rows)
+        return [], "No non-empty behavioral text rows found"
+    return prepared_rows, None
 
-    texts = [r["text"] for r in prepared_rows]
-    encoder = _get_embedding_encoder()
-    embeddings = encoder.encode(texts)
 
-    matched_indices = [
+def _training_indices(prepared_rows):
+    return [
         idx
         for idx, r in enumerate(prepared_rows)
         if r["academic_score"] is not None
@@ -811,10 +863,10 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
             or float((r.get("feature_profile") or {}).get("strength", 0.0)) >= 0.55
         )
     ]
-    matched_count = len(matched_indices)
-    academic_matched = np.array([prepared_rows[i]["academic_score"] for i in matched_indices], dtype=np.float32)
 
-    train_config = TrainingConfig(
+
+def _continuous_training_config():
+    return TrainingConfig(
         seed=42,
         hidden_dim=128,
         dropout=0.15,
@@ -829,13 +881,9 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
         min_train_samples=8,
     )
 
-    model = None
-    train_history = {"train_loss": [], "val_loss": []}
-    model_updated = False
-    residual_std = 0.35
-    warm_start_state = None
-    warm_start_history = None
-    promotion_diagnostics = {
+
+def _default_promotion_diagnostics():
+    return {
         "promoted": False,
         "reason": "not_trained",
         "holdout_size": 0,
@@ -844,13 +892,39 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
         "candidate_holdout_metrics": {"mae": None, "rmse": None, "r2": None},
     }
 
+
+def _checkpoint_version(ckpt):
+    """Promoted checkpoints carry an increasing version; older ones report 0."""
+    if not ckpt:
+        return None
+    return int(ckpt.get("model_version") or 0)
+
+
+def _train_and_promote(prepared_rows, embeddings, matched_indices):
+    """
+    Train a warm-started candidate on the matched rows and promote it (atomic
+    checkpoint swap) only if it beats the holdout baseline.
+    """
+    train_config = _continuous_training_config()
+    matched_count = len(matched_indices)
+
+    model = None
+    train_history = {"train_loss": [], "val_loss": []}
+    model_updated = False
+    residual_std = 0.35
+    warm_start_state = None
+    warm_start_history = None
+    promotion_diagnostics = _default_promotion_diagnostics()
+
     existing_ckpt = load_checkpoint(CHECKPOINT_PATH, map_location="cpu")
     if existing_ckpt and existing_ckpt.get("embedding_model_name") == EMBEDDING_MODEL_NAME:
         warm_start_state = existing_ckpt.get("state_dict")
         warm_start_history = _trim_history(existing_ckpt.get("train_history", {}))
     previous_model = _build_model_from_checkpoint(existing_ckpt) if existing_ckpt else None
+    model_version = _checkpoint_version(existing_ckpt)
+    next_version = (model_version or 0) + 1
 
-    if allow_training and matched_count >= 2:
+    if matched_count >= 2:
         effective_config = train_config
         if matched_count < train_config.min_train_samples:
             effective_config = replace(train_config, min_train_samples=2)
@@ -901,7 +975,7 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
                 candidate_raw_holdout, _ = _predict_with_model(candidate_model, holdout_embeddings)
                 candidate_holdout = []
                 for local_idx, row_idx in enumerate(holdout_indices):
-                    fp = prepared_rows[row_idx].get("feature_profile") or _feature_strength_profile(prepared_rows[row_idx]["text"])
+                    fp = prepared_rows[row_idx].get("feature_profile") or _cached_feature_profile(prepared_rows[row_idx]["text"])
                     candidate_holdout.append(
                         _clamp_score(float(candidate_raw_holdout[local_idx]) + float(fp.get("adjustment", 0.0)))
                     )
@@ -967,7 +1041,9 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
                     input_dim=training_output["input_dim"],
                     residual_std=residual_std,
                     train_history=train_history,
+                    model_version=next_version,
                 )
+                model_version = next_version
             else:
                 model = previous_model if previous_model is not None else candidate_model
                 train_history = train_history_candidate
@@ -977,12 +1053,84 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
             model = None
             promotion_diagnostics["reason"] = "training_exception"
 
+    return {
+        "model": model,
+        "train_history": train_history,
+        "residual_std": residual_std,
+        "model_updated": model_updated,
+        "model_version": model_version,
+        "promotion_diagnostics": promotion_diagnostics,
+    }
+
+
+def train_behavioral_from_records(records):
+    """
+    Background-trainer entry point: train on a survey snapshot (list of row
+    dicts) and report the promotion outcome. Never called from a request.
+    """
+    data = pd.DataFrame.from_records(records)
+    prepared_rows, error = _prepare_behavioral_rows(data)
+    if error:
+        diagnostics = _default_promotion_diagnostics()
+        diagnostics["reason"] = error
+        diagnostics["model_version"] = _checkpoint_version(load_checkpoint(CHECKPOINT_PATH))
+        return diagnostics
+
+    matched_indices = _training_indices(prepared_rows)
+    embeddings = _get_embedding_encoder().encode([r["text"] for r in prepared_rows])
+    outcome = _train_and_promote(prepared_rows, embeddings, matched_indices)
+    diagnostics = dict(outcome["promotion_diagnostics"])
+    diagnostics["model_version"] = outcome["model_version"]
+    diagnostics["matched_pairs_count"] = len(matched_indices)
+    return diagnostics
+
+
+def analyze_behavioral_impact(data, allow_training=True, lightweight=False, prepared=None):
+    """
+    ``allow_training`` trains in-process and is meant for offline scripts; the
+    API serves inference only and hands training to the background trainer.
+    ``prepared`` is an optional shared ``PreparedSurveyFrame`` for ``data``.
+    """
+    if data is None or data.empty:
+        return _empty_response(reason="insufficient_pairs")
+
+    prepared_rows, error = _prepare_behavioral_rows(data, prepared)
+    if error:
+        return _empty_response(reason="insufficient_pairs", error=error)
+
+    if lightweight:
+        return _lightweight_behavioral_response(prepared_rows)
+
+    texts = [r["text"] for r in prepared_rows]
+    encoder = _get_embedding_encoder()
+    embeddings = encoder.encode(texts)
+
+    matched_indices = _training_indices(prepared_rows)
+    matched_count = len(matched_indices)
+
+    model = None
+    train_history = {"train_loss": [], "val_loss": []}
+    model_updated = False
+    residual_std = 0.35
+    model_version = None
+    promotion_diagnostics = _default_promotion_diagnostics()
+
+    if allow_training:
+        outcome = _train_and_promote(prepared_rows, embeddings, matched_indices)
+        model = outcome["model"]
+        train_history = outcome["train_history"]
+        residual_std = outcome["residual_std"]
+        model_updated = outcome["model_updated"]
+        model_version = outcome["model_version"]
+        promotion_diagnostics = outcome["promotion_diagnostics"]
+
     if model is None:
-        ckpt = load_checkpoint(CHECKPOINT_PATH, map_location="cpu")
-        if ckpt and ckpt.get("embedding_model_name") == EMBEDDING_MODEL_NAME:
-            model = _build_model_from_checkpoint(ckpt)
-            residual_std = float(ckpt.get("residual_std", 0.35))
-            train_history = _trim_history(ckpt.get("train_history", train_history))
+        promoted = _MODEL_REGISTRY.get()
+        if promoted is not None:
+            model = promoted.model
+            residual_std = promoted.residual_std
+            train_history = _trim_history(promoted.train_history)
+            model_version = promoted.version
 
     if model is None:
         # If no trainable data/checkpoint exists, return transparent diagnostics.
@@ -993,6 +1141,7 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
         response["total_responses"] = len(prepared_rows)
         response["matched_pairs_count"] = matched_count
         response["training_samples"] = matched_count
+        response["model_version"] = None
         response["prediction_details"] = [
             {
                 "text": item["text"],
@@ -1016,7 +1165,7 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
 
     for idx, row in enumerate(prepared_rows):
         raw_score = float(pred_scores[idx])
-        feature_profile = row.get("feature_profile") or _feature_strength_profile(row["text"])
+        feature_profile = row.get("feature_profile") or _cached_feature_profile(row["text"])
         score = _clamp_score(raw_score + float(feature_profile["adjustment"]))
         std_dev = float(pred_stds[idx]) if idx < len(pred_stds) else residual_std
 
@@ -1213,6 +1362,7 @@ def analyze_behavioral_impact(data, allow_training=True, lightweight=False):
         "academic_correlation": round(academic_correlation, 3),
         "correlation_reason": correlation_reason,
         "model_updated": model_updated,
+        "model_version": model_version,
         "mae": None if reg["mae"] is None else round(float(reg["mae"]), 4),
         "rmse": None if reg["rmse"] is None else round(float(reg["rmse"]), 4),
         "r2": None if reg["r2"] is None else round(float(reg["r2"]), 4),
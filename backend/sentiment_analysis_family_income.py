@@ -5,6 +5,9 @@ from datetime import datetime
 import numpy as np
 import pandas as pd
 
+from incremental_aggregates import RunningMoments
+from survey_preprocessing import PreparedSurveyFrame, to_academic_scale as _to_academic_scale
+
 CATEGORY_ORDER = [
     "below_poverty_line",
     "low_income",
@@ -22,75 +25,11 @@ CATEGORY_TO_SCORE = {
 BOUNDARY_KEYS = ["poverty_line", "low_income", "below_average", "average"]
 INCOME_RL_TRAIN_ON_ANALYSIS = os.getenv("INCOME_RL_TRAIN_ON_ANALYSIS", "0").lower() in {"1", "true", "yes"}
 
-ACADEMIC_TEXT_TO_SCORE = {
-    "excellent": 5,
-    "outstanding": 5,
-    "very good": 4.5,
-    "good": 4,
-    "above average": 4,
-    "average": 3,
-    "below average": 2,
-    "weak": 1.5,
-    "poor": 1,
-    "fail": 1,
-}
-
-
-def _resolve_column(df, primary_name):
-    """Resolve exact or trimmed column names (handles trailing spaces)."""
-    if primary_name in df.columns:
-        return primary_name
-
-    normalized_target = primary_name.strip().lower()
-    for col in df.columns:
-        if str(col).strip().lower() == normalized_target:
-            return col
-    return None
-
 
 def _clamp(value, min_value, max_value):
     return max(min_value, min(max_value, value))
 
 
-def _to_academic_scale(value):
-    """
-    Convert raw academic performance values to a 1-5 scale.
-    Supports numeric values (1-5, 0-10, 0-100) and common text labels.
-    """
-    if value is None or pd.isna(value):
-        return None
-
-    if isinstance(value, (int, float, np.number)):
-        numeric = float(value)
-        if numeric < 0:
-            return None
-        if numeric <= 5:
-            return _clamp(numeric if numeric > 0 else 1, 1, 5)
-        if numeric <= 10:
-            return _clamp(numeric / 2.0, 1, 5)
-        if numeric <= 100:
-            return _clamp(numeric / 20.0, 1, 5)
-        return _clamp(numeric, 1, 5)
-
-    text = str(value).strip().lower()
-    if not text:
-        return None
-
-    grade_map = {"a+": 5, "a": 4.8, "b+": 4.2, "b": 4, "c+": 3.2, "c": 3, "d": 2, "f": 1}
-    if text in grade_map:
-        return grade_map[text]
-
-    for label, score in ACADEMIC_TEXT_TO_SCORE.items():
-        if label in text:
-            return score
-
-    try:
-        cleaned = text.replace("%", "").replace("/10", "").replace("/5", "")
-        return _to_academic_scale(float(cleaned))
-    except Exception:
-        return None
-
-
 class IncomeCategoryRL:
     """RL agent for optimizing income category thresholds."""
 
@@ -374,8 +313,14 @@ def _safe_correlation(x_values, y_values):
     return float(np.corrcoef(x_arr, y_arr)[0, 1])
 
 
-def get_income_sentiment(data):
-    """Analyze family income and estimate its RL-based relation with academics."""
+def get_income_sentiment(data, score_only=False, experience_sink=None, prepared=None):
+    """
+    Analyze family income and estimate its RL-based relation with academics.
+
+    With ``score_only`` the RL models are only read: experiences go to
+    ``experience_sink`` (see ``learn_from_experiences``) and no chart is written.
+    ``prepared`` is an optional shared ``PreparedSurveyFrame`` for ``data``.
+    """
     default_result = {
         "below_poverty_line": 0,
         "low_income": 0,
@@ -398,13 +343,14 @@ def get_income_sentiment(data):
     if data is None or data.empty:
         return default_result
 
-    income_column = _resolve_column(data, "Family Income ")
+    if prepared is None:
+        prepared = PreparedSurveyFrame(data)
+    income_column = prepared.column("Family Income ")
     if not income_column:
         print("Warning: Family Income column not found in DataFrame.")
         return default_result
 
-    academic_column = _resolve_column(data, "Academic Performance ")
-    if not academic_column:
+    if not prepared.academic_column:
         print("Warning: Academic Performance column not found. Correlation metrics will be limited.")
 
     counts = {category: 0 for category in CATEGORY_ORDER}
@@ -417,59 +363,62 @@ def get_income_sentiment(data):
     }
     records_with_academic = []
 
-    for _, row in data.iterrows():
-        raw_income = row.get(income_column)
-        if raw_income is None or pd.isna(raw_income):
+    # Unparseable incomes come back as NaN and are skipped like missing ones.
+    for income_value, academic_score in zip(
+        prepared.numeric(income_column).tolist(), prepared.academic_scale().tolist()
+    ):
+        if np.isnan(income_value):
             continue
 
-        try:
-            income_value = float(raw_income)
-            category = income_rl_agent.categorize_income(income_value)
-            academic_score = (
-                _to_academic_scale(row.get(academic_column)) if academic_column else None
-            )
+        category = income_rl_agent.categorize_income(income_value)
 
-            counts[category] += 1
-            total_income += income_value
-            processed_count += 1
-
-            category_stats[category]["count"] += 1
-            category_stats[category]["income_values"].append(income_value)
-            if academic_score is not None:
-                category_stats[category]["academic_values"].append(academic_score)
-                records_with_academic.append(
-                    {
-                        "category": category,
-                        "income": income_value,
-                        "academic": academic_score,
-                    }
-                )
+        counts[category] += 1
+        total_income += income_value
+        processed_count += 1
 
-            income_details.append(
+        category_stats[category]["count"] += 1
+        category_stats[category]["income_values"].append(income_value)
+        if academic_score is not None:
+            category_stats[category]["academic_values"].append(academic_score)
+            records_with_academic.append(
                 {
-                    "income": income_value,
                     "category": category,
-                    "income_score": CATEGORY_TO_SCORE.get(category, 3.0),
-                    "academic_performance_score": round(academic_score, 2)
-                    if academic_score is not None
-                    else None,
+                    "income": income_value,
+                    "academic": academic_score,
                 }
             )
-        except Exception as e:
-            print(f"Error processing income value '{raw_income}': {e}")
+
+        income_details.append(
+            {
+                "income": income_value,
+                "category": category,
+                "income_score": CATEGORY_TO_SCORE.get(category, 3.0),
+                "academic_performance_score": round(academic_score, 2)
+                if academic_score is not None
+                else None,
+            }
+        )
 
     training_samples = 0
     model_updated = False
     if INCOME_RL_TRAIN_ON_ANALYSIS:
+        experiences = []
         for record in records_with_academic:
             category = record["category"]
             count_for_category = max(category_stats[category]["count"], 1)
-            sample_weight = 1.0 / count_for_category
-            income_academic_rl_agent.add_experience(
-                category, record["academic"], sample_weight=sample_weight
+            experiences.append(
+                {
+                    "category": category,
+                    "academic": record["academic"],
+                    "weight": 1.0 / count_for_category,
+                }
             )
-            training_samples += 1
-        model_updated = income_academic_rl_agent.update_model() if training_samples > 0 else False
+        training_samples = len(experiences)
+        if score_only:
+            if experiences and experience_sink is not None:
+                experience_sink(experiences)
+        else:
+            model_updated = learn_from_experiences(experiences) > 0
 
     rl_predicted_scores = []
     observed_scores = []
@@ -487,47 +436,49 @@ def get_income_sentiment(data):
     average_income = round(total_income / processed_count, 2) if processed_count > 0 else 0
 
     # Visualization remains lightweight so dashboard behavior stays unchanged.
-    try:
-        import matplotlib.pyplot as plt
-
-        categories = [
-            "Below Poverty Line",
-            "Low Income",
-            "Below Average",
-            "Average",
-            "Above Average",
-        ]
-        values = [
-            counts["below_poverty_line"],
-            counts["low_income"],
-            counts["below_average"],
-            counts["average"],
-            counts["above_average"],
-        ]
-        colors = ["darkred", "orangered", "gold", "lightgreen", "darkgreen"]
-
-        plt.figure(figsize=(10, 6))
-        bars = plt.bar(categories, values, color=colors)
-        plt.title("Family Income Distribution")
-        plt.xlabel("Income Category")
-        plt.ylabel("Number of Households")
-        plt.xticks(rotation=45)
-
-        for bar in bars:
-            height = bar.get_height()
-            plt.text(
-                bar.get_x() + bar.get_width() / 2.0,
-                height + 0.1,
-                f"{int(height)}",
-                ha="center",
-                va="bottom",
-            )
+    # Score-only reads skip it: pyplot state is process-global and it writes a file.
+    if not score_only:
+        try:
+            import matplotlib.pyplot as plt
+
+            categories = [
+                "Below Poverty Line",
+                "Low Income",
+                "Below Average",
+                "Average",
+                "Above Average",
+            ]
+            values = [
+                counts["below_poverty_line"],
+                counts["low_income"],
+                counts["below_average"],
+                counts["average"],
+                counts["above_average"],
+            ]
+            colors = ["darkred", "orangered", "gold", "lightgreen", "darkgreen"]
+
+            plt.figure(figsize=(10, 6))
+            bars = plt.bar(categories, values, color=colors)
+            plt.title("Family Income Distribution")
+            plt.xlabel("Income Category")
+            plt.ylabel("Number of Households")
+            plt.xticks(rotation=45)
+
+            for bar in bars:
+                height = bar.get_height()
+                plt.text(
+                    bar.get_x() + bar.get_width() / 2.0,
+                    height + 0.1,
+                    f"{int(height)}",
+                    ha="center",
+                    va="bottom",
+                )
 
-        plt.tight_layout()
-        plt.savefig("income_distribution.png")
-        plt.close()
-    except Exception as e:
-        print(f"Error creating visualization: {e}")
+            plt.tight_layout()
+            plt.savefig("income_distribution.png")
+            plt.close()
+        except Exception as e:
+            print(f"Error creating visualization: {e}")
 
     income_academic_profile = []
     for category in CATEGORY_ORDER:
@@ -571,6 +522,114 @@ def get_income_sentiment(data):
     }
 
 
+def learn_from_experiences(experiences):
+    """Apply income-academic experiences queued by score-only analyses."""
+    for experience in experiences:
+        income_academic_rl_agent.add_experience(
+            experience["category"], experience["academic"], sample_weight=experience["weight"]
+        )
+    if experiences and income_academic_rl_agent.update_model():
+        return len(experiences)
+    return 0
+
+
+def aggregate_fingerprint():
+    # Folded rows were categorized with these thresholds; new ones mean a rebuild.
+    return tuple(income_rl_agent.thresholds[key] for key in BOUNDARY_KEYS)
+
+
+def new_aggregate_state():
+    return {
+        "categories": {
+            category: {
+                "count": 0,
+                "income_sum": 0.0,
+                "academic_count": 0,
+                "academic_sum": 0.0,
+                "academic_sq_sum": 0.0,
+            }
+            for category in CATEGORY_ORDER
+        },
+        "total_income": 0.0,
+        "processed_count": 0,
+        "income_academic": RunningMoments(),
+    }
+
+
+def fold_aggregate_rows(state, data, prepared):
+    """Add appended survey rows to the running per-category income stats."""
+    income_column = prepared.column("Family Income ")
+    if not income_column:
+        return
+    paired_incomes = []
+    paired_academics = []
+    for income_value, academic_score in zip(
+        prepared.numeric(income_column).tolist(), prepared.academic_scale().tolist()
+    ):
+        if np.isnan(income_value):
+            continue
+        stat = state["categories"][income_rl_agent.categorize_income(income_value)]
+        stat["count"] += 1
+        stat["income_sum"] += income_value
+        state["total_income"] += income_value
+        state["processed_count"] += 1
+        if academic_score is not None:
+            stat["academic_count"] += 1
+            stat["academic_sum"] += academic_score
+            stat["academic_sq_sum"] += academic_score * academic_score
+            paired_incomes.append(income_value)
+            paired_academics.append(academic_score)
+    state["income_academic"].add(paired_incomes, paired_academics)
+
+
+def summarize_aggregate_state(state):
+    """Income counters from the running stats, using the current RL expectations per category."""
+    # The RL prediction is constant within a category, so its correlation with
+    # academics needs only per-category n, Σy and Σy².
+    rl_moments = RunningMoments()
+    income_academic_profile = []
+    for category in CATEGORY_ORDER:
+        stat = state["categories"][category]
+        expected = income_academic_rl_agent.get_expected_score(category)
+        rl_moments.add_sums(
+            stat["academic_count"],
+            expected * stat["academic_count"],
+            stat["academic_sum"],
+            expected * stat["academic_sum"],
+            expected * expected * stat["academic_count"],
+            stat["academic_sq_sum"],
+        )
+        if stat["count"] == 0:
+            continue
+        avg_academic = stat["academic_sum"] / stat["academic_count"] if stat["academic_count"] else None
+        income_academic_profile.append(
+            {
+                "category": category,
+                "households": stat["count"],
+                "avg_income": round(stat["income_sum"] / stat["count"], 2),
+                "avg_academic_score": round(avg_academic, 3) if avg_academic is not None else None,
+                "rl_expected_academic_score": round(expected, 3),
+            }
+        )
+
+    processed_count = state["processed_count"]
+    summary = {category: state["categories"][category]["count"] for category in CATEGORY_ORDER}
+    summary.update(
+        {
+            "averageIncome": round(state["total_income"] / processed_count, 2) if processed_count > 0 else 0,
+            "total_households": processed_count,
+            "current_thresholds": income_rl_agent.thresholds,
+            "academic_correlation": round(rl_moments.correlation(), 3),
+            "income_academic_correlation": round(state["income_academic"].correlation(), 3),
+            "income_academic_profile": income_academic_profile,
+            "rl_expected_academic_by_category": {
+                k: round(v, 3) for k, v in income_academic_rl_agent.category_scores.items()
+            },
+        }
+    )
+    return summary
+
+
 def add_income_feedback(income, predicted_category, correct_category):
     """
     Add feedback to improve income category threshold policy.
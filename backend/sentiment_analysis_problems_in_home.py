@@ -4,19 +4,9 @@ from collections import defaultdict
 import numpy as np
 import pandas as pd
 
+from incremental_aggregates import RunningMoments
+from survey_preprocessing import PreparedSurveyFrame
 
-ACADEMIC_TEXT_TO_SCORE = {
-    "excellent": 5,
-    "outstanding": 5,
-    "very good": 4.5,
-    "good": 4,
-    "above average": 4,
-    "average": 3,
-    "below average": 2,
-    "weak": 1.5,
-    "poor": 1,
-    "fail": 1,
-}
 
 THEME_PATTERNS = [
     ("financial_stress", r"\b(no money|money problem|financial|debt|loan|poverty|income issue|can't afford)\b", -1.1),
@@ -62,54 +52,11 @@ RELATION_PROBLEM_CONTEXT = re.compile(
 RELATION_SUPPORT_CONTEXT = re.compile(r"\b(support|care|help|encourage|peaceful|understanding|guidance)\b")
 
 
-def _resolve_column(df, primary_name):
-    if primary_name in df.columns:
-        return primary_name
-
-    normalized_target = primary_name.strip().lower()
-    for col in df.columns:
-        if str(col).strip().lower() == normalized_target:
-            return col
-    return None
-
-
 def _clamp(value, min_value=1.0, max_value=5.0):
     return max(min_value, min(max_value, float(value)))
 
 
-def _to_academic_scale(value):
-    if value is None or pd.isna(value):
-        return None
-
-    if isinstance(value, (int, float, np.number)):
-        numeric = float(value)
-        if numeric < 0:
-            return None
-        if numeric <= 5:
-            return _clamp(numeric if numeric > 0 else 1.0)
-        if numeric <= 10:
-            return _clamp(numeric / 2.0)
-        if numeric <= 100:
-            return _clamp(numeric / 20.0)
-        return _clamp(numeric)
-
-    text = str(value).strip().lower()
-    if not text:
-        return None
-
-    grade_map = {"a+": 5, "a": 4.8, "b+": 4.2, "b": 4, "c+": 3.2, "c": 3, "d": 2, "f": 1}
-    if text in grade_map:
-        return grade_map[text]
-
-    for label, score in ACADEMIC_TEXT_TO_SCORE.items():
-        if label in text:
-            return score
-
-    try:
-        cleaned = text.replace("%", "").replace("/10", "").replace("/5", "")
-        return _to_academic_scale(float(cleaned))
-    except Exception:
-        return None
+SENTIMENT_CATEGORIES = ["Highly Positive", "Positive", "Neutral", "Negative", "Highly Negative"]
 
 
 def _sentiment_bucket(score):
@@ -171,7 +118,8 @@ def _safe_correlation(x_values, y_values):
     return float(np.corrcoef(x_arr, y_arr)[0, 1])
 
 
-def analyze_problems_in_home(data):
+def analyze_problems_in_home(data, prepared=None):
+    """``prepared`` is an optional shared ``PreparedSurveyFrame`` for ``data``."""
     default_result = {
         "highly_positive_count": 0,
         "positive_count": 0,
@@ -189,21 +137,16 @@ def analyze_problems_in_home(data):
     if data is None or data.empty:
         return default_result
 
-    problems_column = _resolve_column(data, "Problems in Home ")
-    academic_column = _resolve_column(data, "Academic Performance ")
+    if prepared is None:
+        prepared = PreparedSurveyFrame(data)
+    problems_column = prepared.column("Problems in Home ")
 
     if not problems_column:
         payload = default_result.copy()
         payload["error"] = "Problems in Home column not found"
         return payload
 
-    counts = {
-        "Highly Positive": 0,
-        "Positive": 0,
-        "Neutral": 0,
-        "Negative": 0,
-        "Highly Negative": 0,
-    }
+    counts = dict.fromkeys(SENTIMENT_CATEGORIES, 0)
     theme_counts = defaultdict(int)
     total_score = 0.0
     processed_count = 0
@@ -211,19 +154,15 @@ def analyze_problems_in_home(data):
     academic_for_pairs = []
     details = []
 
-    for _, row in data.iterrows():
-        raw_problem = row.get(problems_column)
-        if raw_problem is None or pd.isna(raw_problem):
-            continue
-
-        problem_text = str(raw_problem).strip()
-        if not problem_text:
-            continue
-
-        sentiment_score, theme, matched_relations, relation_impact = _score_problem_text(problem_text)
-        category = _sentiment_bucket(sentiment_score)
-        academic_score = _to_academic_scale(row.get(academic_column)) if academic_column else None
-
+    for (
+        problem_text,
+        sentiment_score,
+        category,
+        theme,
+        matched_relations,
+        relation_impact,
+        academic_score,
+    ) in _scored_problem_rows(prepared, problems_column):
         counts[category] += 1
         theme_counts[theme] += 1
         processed_count += 1
@@ -253,11 +192,43 @@ def analyze_problems_in_home(data):
         print(f"Error saving home problems analysis: {exc}")
 
     academic_correlation = _safe_correlation(sentiment_for_pairs, academic_for_pairs)
+    summary = _home_problems_summary(
+        counts, theme_counts, total_score, processed_count, len(academic_for_pairs), academic_correlation
+    )
+    return {**summary, "problems_details": details}
+
+
+def _scored_problem_rows(prepared, problems_column):
+    """Yield (text, score, category, theme, relations, relation impact, academic score) per answer."""
+    for raw_problem, academic_score in zip(
+        prepared.values(problems_column), prepared.academic_scale()
+    ):
+        if raw_problem is None or pd.isna(raw_problem):
+            continue
+
+        problem_text = str(raw_problem).strip()
+        if not problem_text:
+            continue
+
+        sentiment_score, theme, matched_relations, relation_impact = _score_problem_text(problem_text)
+        yield (
+            problem_text,
+            sentiment_score,
+            _sentiment_bucket(sentiment_score),
+            theme,
+            matched_relations,
+            relation_impact,
+            academic_score,
+        )
+
+
+def _home_problems_summary(
+    counts, theme_counts, total_score, processed_count, matched_pairs_count, academic_correlation
+):
     theme_distribution = [
         {"theme": theme, "count": count}
         for theme, count in sorted(theme_counts.items(), key=lambda item: item[1], reverse=True)
     ]
-
     return {
         "highly_positive_count": counts["Highly Positive"],
         "positive_count": counts["Positive"],
@@ -266,9 +237,49 @@ def analyze_problems_in_home(data):
         "highly_negative_count": counts["Highly Negative"],
         "average_score": round(total_score / processed_count, 3) if processed_count else 0,
         "total_responses": processed_count,
-        "matched_pairs_count": len(academic_for_pairs),
+        "matched_pairs_count": matched_pairs_count,
         "academic_correlation": round(academic_correlation, 3),
         "theme_distribution": theme_distribution,
-        "problems_details": details,
     }
 
+
+def new_aggregate_state():
+    return {
+        "counts": dict.fromkeys(SENTIMENT_CATEGORIES, 0),
+        "theme_counts": {},
+        "total_score": 0.0,
+        "processed_count": 0,
+        "pairs": RunningMoments(),
+    }
+
+
+def fold_aggregate_rows(state, data, prepared):
+    """Add appended survey rows to the running home-problems summary."""
+    problems_column = prepared.column("Problems in Home ")
+    if not problems_column:
+        return
+    sentiments = []
+    academics = []
+    for _text, sentiment_score, category, theme, _relations, _impact, academic_score in _scored_problem_rows(
+        prepared, problems_column
+    ):
+        state["counts"][category] += 1
+        state["theme_counts"][theme] = state["theme_counts"].get(theme, 0) + 1
+        state["processed_count"] += 1
+        state["total_score"] += sentiment_score
+        if academic_score is not None:
+            sentiments.append(sentiment_score)
+            academics.append(academic_score)
+    state["pairs"].add(sentiments, academics)
+
+
+def summarize_aggregate_state(state):
+    return _home_problems_summary(
+        state["counts"],
+        state["theme_counts"],
+        state["total_score"],
+        state["processed_count"],
+        state["pairs"].n,
+        state["pairs"].correlation(),
+    )
+
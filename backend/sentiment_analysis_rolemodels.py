@@ -3,7 +3,15 @@ import numpy as np
 import os
 import pickle
 import re
+import threading
+import time
 from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+from survey_preprocessing import PreparedSurveyFrame
+
+# 0 keeps unbatched updates write-through; batched analyses always persist once at the end.
+ROLE_MODEL_AUTOSAVE_SECONDS = float(os.getenv("ROLE_MODEL_RL_AUTOSAVE_SECONDS", "0"))
 
 # Define role model traits and their impact scores (keeping the existing structure)
 role_model_traits = {
@@ -46,6 +54,12 @@ class RoleModelRLAgent:
         models_dir = os.path.join(os.path.dirname(__file__), "models")
         os.makedirs(models_dir, exist_ok=True)
         self.model_file = os.path.join(models_dir, 'role_model_rl_weights.pkl')
+        self.autosave_interval_seconds = ROLE_MODEL_AUTOSAVE_SECONDS
+        self.persisted_version = 0
+        self._dirty = False
+        self._batch_depth = 0
+        self._last_saved_at = time.monotonic()
+        self._lock = threading.RLock()
         self._load_model()
     
     def _initialize_weights(self):
@@ -70,6 +84,7 @@ class RoleModelRLAgent:
                 if isinstance(payload, dict) and "trait_weights" in payload:
                     self.trait_weights = payload.get("trait_weights", self.trait_weights)
                     self.sentiment_bias = float(payload.get("sentiment_bias", 0.0))
+                    self.persisted_version = int(payload.get("version", 0))
                 elif isinstance(payload, dict):
                     # Backward compatibility with older model files that stored only trait weights.
                     self.trait_weights = payload
@@ -78,16 +93,56 @@ class RoleModelRLAgent:
                 print(f"Error loading model: {e}")
     
     def _save_model(self):
-        """Save current weights"""
+        """Save current weights (write to a temp file, then rename over the old one)"""
+        tmp_file = f"{self.model_file}.{os.getpid()}.tmp"
         try:
             payload = {
                 "trait_weights": self.trait_weights,
                 "sentiment_bias": self.sentiment_bias,
+                "version": self.persisted_version + 1,
             }
-            with open(self.model_file, 'wb') as f:
+            with open(tmp_file, 'wb') as f:
                 pickle.dump(payload, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.model_file)
+            self.persisted_version += 1
+            return True
         except Exception as e:
             print(f"Error saving model: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return False
+
+    def flush(self):
+        """Persist pending updates, if any. Returns True when a new version was written."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            saved = self._save_model()
+            if saved:
+                self._dirty = False
+                self._last_saved_at = time.monotonic()
+            return saved
+
+    @contextmanager
+    def batch(self):
+        """Apply updates in memory for the duration of the block and persist once on exit."""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._batch_depth:
+            return
+        if time.monotonic() - self._last_saved_at >= self.autosave_interval_seconds:
+            self.flush()
     
     def select_action(self, state, available_traits):
         """ε-greedy policy for trait selection"""
@@ -114,14 +169,14 @@ class RoleModelRLAgent:
             # Initialize new trait with default weight and then update
             self.trait_weights[trait] = self.trait_weights.get('default', 1.0) + self.learning_rate * reward
         
-        # Save after updates
-        self._save_model()
+        # Persisted on batch exit, or immediately/on the autosave timer outside a batch
+        self._mark_dirty()
 
     def adjust_sentiment_bias(self, reward):
         """Learn a small global correction for sentiment scores."""
         self.sentiment_bias += self.learning_rate * reward
         self.sentiment_bias = max(-1.0, min(1.0, self.sentiment_bias))
-        self._save_model()
+        self._mark_dirty()
     
     def get_weight(self, trait):
         """Get weight for a specific trait"""
@@ -139,18 +194,10 @@ class RoleModelRLAgent:
 # Initialize RL agent
 rl_agent = RoleModelRLAgent(role_model_traits)
 
-ACADEMIC_TEXT_TO_SCORE = {
-    "excellent": 5,
-    "outstanding": 5,
-    "very good": 4.5,
-    "good": 4,
-    "above average": 4,
-    "average": 3,
-    "below average": 2,
-    "weak": 1.5,
-    "poor": 1,
-    "fail": 1
-}
+
+def role_model_weights_stats():
+    return {"persisted_version": rl_agent.persisted_version, "dirty": rl_agent._dirty}
+
 
 REASON_POSITIVE_KEYWORDS = [
     "inspired", "motivate", "motivation", "hard work", "discipline", "success",
@@ -165,50 +212,6 @@ REASON_NEGATIVE_KEYWORDS = [
 ]
 
 
-def _resolve_column(df, candidates):
-    normalized = {str(col).strip().lower(): col for col in df.columns}
-    for candidate in candidates:
-        match = normalized.get(candidate.strip().lower())
-        if match:
-            return match
-    return None
-
-
-def _to_academic_scale(value):
-    if value is None or pd.isna(value):
-        return None
-
-    if isinstance(value, (int, float, np.number)):
-        numeric = float(value)
-        if numeric < 0:
-            return None
-        if numeric <= 5:
-            return max(1.0, min(5.0, numeric if numeric > 0 else 1.0))
-        if numeric <= 10:
-            return max(1.0, min(5.0, numeric / 2.0))
-        if numeric <= 100:
-            return max(1.0, min(5.0, numeric / 20.0))
-        return max(1.0, min(5.0, numeric))
-
-    text = str(value).strip().lower()
-    if not text:
-        return None
-
-    grade_map = {"a+": 5, "a": 4.8, "b+": 4.2, "b": 4, "c+": 3.2, "c": 3, "d": 2, "f": 1}
-    if text in grade_map:
-        return grade_map[text]
-
-    for label, score in ACADEMIC_TEXT_TO_SCORE.items():
-        if label in text:
-            return score
-
-    cleaned = text.replace("%", "").replace("/10", "").replace("/5", "")
-    try:
-        return _to_academic_scale(float(cleaned))
-    except Exception:
-        return None
-
-
 def _clean_text(text):
     if text is None or pd.isna(text):
         return ""
@@ -266,14 +269,55 @@ def _label_from_score(score):
         return "neutral"
     return "negative"
 
-def analyze_role_model(data):
-    """Analyze role models with reinforcement learning approach"""
+def _predict_role_model_score(identified_traits, base_score):
+    # Apply trait influence from RL and global bias
+    if identified_traits:
+        trait_weight_boost = float(np.mean([rl_agent.get_weight(t) for t in identified_traits])) - 1.0
+    else:
+        trait_weight_boost = 0.0
+    return max(1.0, min(5.0, base_score + (0.2 * trait_weight_boost) + rl_agent.sentiment_bias))
+
+
+def _reinforce_role_model(identified_traits, predicted_score, academic_score):
+    # Compare against academic performance and use as RL reward.
+    if academic_score is not None:
+        alignment_error = academic_score - predicted_score
+        reward = float(max(-1.0, min(1.0, alignment_error / 2.0)))
+
+        for trait in identified_traits:
+            rl_agent.update_weights(trait, reward)
+        rl_agent.adjust_sentiment_bias(reward * 0.1)
+    else:
+        # Weak positive reinforcement when no observed outcome is available.
+        for trait in identified_traits:
+            rl_agent.update_weights(trait, 0.01)
+
+
+def learn_from_experiences(experiences):
+    """Replay experiences queued by score-only analyses, in order, as one persisted batch"""
+    with rl_agent.batch():
+        for experience in experiences:
+            traits = experience["traits"]
+            predicted_score = _predict_role_model_score(traits, experience["base_score"])
+            _reinforce_role_model(traits, predicted_score, experience["academic_score"])
+    return len(experiences)
+
+
+def analyze_role_model(data, score_only=False, experience_sink=None, prepared=None):
+    """
+    Analyze role models with reinforcement learning approach
+
+    With ``score_only`` the RL weights are read but never updated; the rewards
+    are handed to ``experience_sink`` for ``learn_from_experiences`` instead.
+    ``prepared`` is an optional shared ``PreparedSurveyFrame`` for ``data``.
+    """
     if data is None or len(data) == 0:
         return {}
 
-    role_model_col = _resolve_column(data, ["Role models", "Role model"])
-    reason_col = _resolve_column(data, ["Reason for such role model", "Reason for such role model ", "Reason"])
-    academic_col = _resolve_column(data, ["Academic Performance", "Academic Performance ", "academic performance"])
+    if prepared is None:
+        prepared = PreparedSurveyFrame(data)
+    role_model_col = prepared.column(["Role models", "Role model"])
+    reason_col = prepared.column(["Reason for such role model", "Reason for such role model ", "Reason"])
 
     if not role_model_col:
         return {
@@ -296,56 +340,56 @@ def analyze_role_model(data):
     final_scores = []
     paired_scores = []
 
-    for _, row in data.iterrows():
-        role_text = row.get(role_model_col, None)
-        reason_text = row.get(reason_col, None) if reason_col else None
-        academic_score = _to_academic_scale(row.get(academic_col)) if academic_col else None
-
-        if role_text is None or pd.isna(role_text):
-            continue
-
-        role_model_score, identified_traits, trait_scores = _extract_role_model_score(role_text)
-        reason_score = _reason_sentiment_score(reason_text)
-        base_score = (role_model_score + reason_score) / 2.0
-
-        if identified_traits:
-            influential_count += 1
-
-        for trait in set(identified_traits):
-            trait_frequency[trait] += 1
-            total_traits_count += 1
-
-        # Apply trait influence from RL and global bias
-        if identified_traits:
-            trait_weight_boost = float(np.mean([rl_agent.get_weight(t) for t in identified_traits])) - 1.0
-        else:
-            trait_weight_boost = 0.0
-
-        predicted_score = max(1.0, min(5.0, base_score + (0.2 * trait_weight_boost) + rl_agent.sentiment_bias))
-
-        # Compare against academic performance and use as RL reward.
-        if academic_score is not None:
-            alignment_error = academic_score - predicted_score
-            reward = float(max(-1.0, min(1.0, alignment_error / 2.0)))
-
-            for trait in identified_traits:
-                rl_agent.update_weights(trait, reward)
-            rl_agent.adjust_sentiment_bias(reward * 0.1)
-            paired_scores.append((predicted_score, academic_score))
-        else:
-            # Weak positive reinforcement when no observed outcome is available.
-            for trait in identified_traits:
-                rl_agent.update_weights(trait, 0.01)
-
-        score_label = _label_from_score(predicted_score)
-        if score_label == "positive":
-            positive_impact += 1
-        elif score_label == "neutral":
-            neutral_impact += 1
-        else:
-            negative_impact += 1
-
-        final_scores.append(predicted_score)
+    experiences = []
+
+    # One weight-file write per analysis instead of one per trait update.
+    with nullcontext() if score_only else rl_agent.batch():
+        role_texts = prepared.values(role_model_col)
+        reason_texts = prepared.values(reason_col) if reason_col else np.full(len(data), None, dtype=object)
+        for role_text, reason_text, academic_score in zip(
+            role_texts, reason_texts, prepared.academic_scale()
+        ):
+            if role_text is None or pd.isna(role_text):
+                continue
+
+            role_model_score, identified_traits, trait_scores = _extract_role_model_score(role_text)
+            reason_score = _reason_sentiment_score(reason_text)
+            base_score = (role_model_score + reason_score) / 2.0
+
+            if identified_traits:
+                influential_count += 1
+
+            for trait in set(identified_traits):
+                trait_frequency[trait] += 1
+                total_traits_count += 1
+
+            predicted_score = _predict_role_model_score(identified_traits, base_score)
+            if score_only:
+                if identified_traits or academic_score is not None:
+                    experiences.append(
+                        {
+                            "traits": identified_traits,
+                            "base_score": base_score,
+                            "academic_score": academic_score,
+                        }
+                    )
+            else:
+                _reinforce_role_model(identified_traits, predicted_score, academic_score)
+            if academic_score is not None:
+                paired_scores.append((predicted_score, academic_score))
+
+            score_label = _label_from_score(predicted_score)
+            if score_label == "positive":
+                positive_impact += 1
+            elif score_label == "neutral":
+                neutral_impact += 1
+            else:
+                negative_impact += 1
+
+            final_scores.append(predicted_score)
+
+    if experiences and experience_sink is not None:
+        experience_sink(experiences)
 
     weighted_traits = rl_agent.get_weighted_traits(trait_frequency)
     top_traits = dict(sorted(weighted_traits.items(), key=lambda x: x[1], reverse=True)[:5])
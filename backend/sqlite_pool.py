@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Callable, Optional
+
+
+class PooledConnection(sqlite3.Connection):
+    """``sqlite3.Connection`` that tracks how many ``with`` blocks are using it."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.active_blocks = 0
+
+    def __enter__(self):
+        self.active_blocks += 1
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return super().__exit__(exc_type, exc, tb)
+        finally:
+            self.active_blocks -= 1
+
+
+class SQLiteConnectionPool:
+    """
+    One long-lived SQLite connection per thread.
+
+    Reuse only happens within a thread: a checkout never waits on another
+    thread, and a new thread (e.g. each request thread of the threaded dev
+    server) opens its own connection. The savings come from long-lived
+    threads such as production worker threads and the background workers.
+
+    Connections are opened in WAL mode with ``synchronous=NORMAL``, a busy
+    timeout and memory-mapped reads, so readers no longer block behind the
+    ingest writer and each ``with pool.connection() as conn`` block skips the
+    open/pragma cost. Statements are cached per connection (``cached_statements``),
+    so repeated queries reuse their prepared form. Callers keep the usual
+    ``with conn:`` commit/rollback semantics; nested blocks on one thread share
+    the connection. A connection is dropped with its thread.
+    """
+
+    def __init__(
+        self,
+        path_provider: Callable[[], str],
+        busy_timeout_ms: int = 5000,
+        mmap_size_bytes: int = 0,
+        cached_statements: int = 256,
+    ) -> None:
+        self._path_provider = path_provider
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size_bytes = mmap_size_bytes
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.connection_open_seconds = 0.0
+        self.stale_transactions_rolled_back = 0
+
+    def connection(self) -> PooledConnection:
+        path = self._path_provider()
+        conn: Optional[PooledConnection] = getattr(self._local, "conn", None)
+        if conn is not None and getattr(self._local, "path", None) != path:
+            conn.close()
+            conn = None
+        if conn is None:
+            conn = self._open(path)
+            self._local.conn = conn
+            self._local.path = path
+        elif conn.active_blocks == 0 and conn.in_transaction:
+            # A previous caller on this thread left a transaction open; don't let
+            # it hold the write lock (or leak its changes) into this checkout.
+            conn.rollback()
+            with self._lock:
+                self.stale_transactions_rolled_back += 1
+        with self._lock:
+            self.checkouts += 1
+        return conn
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "connections_opened": self.connections_opened,
+                "open_connections": self.connections_opened - self.connections_closed,
+                "connection_open_seconds": self.connection_open_seconds,
+                "stale_transactions_rolled_back": self.stale_transactions_rolled_back,
+            }
+
+    def _open(self, path: str) -> PooledConnection:
+        started = time.perf_counter()
+        conn = sqlite3.connect(
+            path,
+            timeout=self.busy_timeout_ms / 1000,
+            factory=PooledConnection,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        if self.mmap_size_bytes > 0:
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size_bytes)}")
+        with self._lock:
+            self.connections_opened += 1
+            self.connection_open_seconds += time.perf_counter() - started
+        weakref.finalize(conn, self._on_connection_dropped)
+        return conn
+
+    def _on_connection_dropped(self) -> None:
+        with self._lock:
+            self.connections_closed += 1
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import sqlite3
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Values of these types are JSON-encoded once per distinct value.
+_CACHEABLE_TYPES = (str, int, float, bool, type(None))
+
+
+class SurveyBulkIngestor:
+    """
+    Column-at-a-time hashing and ``executemany`` inserts for survey batches.
+
+    Each column's distinct values are JSON-encoded once, and the
+    per-row hash payload is assembled from those fragments; the result is
+    byte-for-byte the ``json.dumps(..., sort_keys=True, ensure_ascii=False)``
+    payload that single submissions hash, so dedupe works across both paths.
+    Rows are inserted with ``executemany`` in ``chunk_size`` chunks on the
+    caller's connection (one transaction), and inserted rows are counted from
+    the connection's change counter rather than per statement.
+    """
+
+    def __init__(self, columns: Sequence[str], chunk_size: int = 5000) -> None:
+        self.columns = list(columns)
+        self.chunk_size = max(1, chunk_size)
+        self._hash_columns = sorted(self.columns)
+        self._key_prefixes = [
+            json.dumps(column, ensure_ascii=False) + ": " for column in self._hash_columns
+        ]
+        self._encode = json.JSONEncoder(ensure_ascii=False).encode
+        columns_sql = ",".join(f'"{column}"' for column in self.columns)
+        placeholders = ",".join(["?"] * (len(self.columns) + 3))
+        self._insert_sql = (
+            f'INSERT OR IGNORE INTO surveys ({columns_sql}, "timestamp", unique_hash, source) '
+            f"VALUES ({placeholders})"
+        )
+
+    def row_hashes(self, rows: Sequence[dict]) -> List[str]:
+        """SHA-256 of each row's canonical JSON (same digest as ``compute_survey_row_hash``)."""
+        fragment_columns = [
+            [
+                prefix + fragment
+                for fragment in self._map_cached([row.get(column) for row in rows], self._encode)
+            ]
+            for column, prefix in zip(self._hash_columns, self._key_prefixes)
+        ]
+        return [
+            hashlib.sha256(("{" + ", ".join(fragments) + "}").encode("utf-8")).hexdigest()
+            for fragments in zip(*fragment_columns)
+        ]
+
+    def insert(
+        self,
+        conn: sqlite3.Connection,
+        rows: Sequence[dict],
+        timestamps: Sequence[str],
+        source: str,
+        hashes: Optional[Sequence[str]] = None,
+    ) -> int:
+        """Insert ``rows`` (duplicates by hash are ignored); returns the number inserted."""
+        if hashes is None:
+            hashes = self.row_hashes(rows)
+        changes_before = conn.total_changes
+        for start in range(0, len(rows), self.chunk_size):
+            stop = start + self.chunk_size
+            conn.executemany(
+                self._insert_sql,
+                (
+                    (*(row.get(column) for column in self.columns), timestamp, survey_hash, source)
+                    for row, timestamp, survey_hash in zip(
+                        rows[start:stop], timestamps[start:stop], hashes[start:stop]
+                    )
+                ),
+            )
+        return conn.total_changes - changes_before
+
+    @staticmethod
+    def _map_cached(values: list, convert: Callable[[object], object]) -> list:
+        cache: Dict[tuple, object] = {}
+        mapped = []
+        for value in values:
+            # Keyed by type too: 1, 1.0 and True are equal dict keys but encode differently.
+            if isinstance(value, _CACHEABLE_TYPES) and value == value:
+                key = (type(value), value)
+                if key not in cache:
+                    cache[key] = convert(value)
+                mapped.append(cache[key])
+            else:
+                mapped.append(convert(value))
+        return mapped
@@ -0,0 +1,231 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Sequence
+from uuid import uuid4
+
+import pandas as pd
+
+try:  # POSIX only; on other platforms the in-process lock is all we get.
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class SurveyExcelMirror:
+    """Write-behind mirror of survey submissions into ``Childsurvey.xlsx``.
+
+    ``append`` only writes one JSON line to a pending log next to the workbook,
+    so submission latency no longer depends on the workbook size. ``compact``
+    folds pending rows into the workbook in one rewrite, either from the
+    background compactor thread, a Celery task, or before the workbook is read.
+
+    The rewrite replaces the workbook atomically. Before that, a journal
+    records which segments it merges and the new workbook's hash. A
+    compaction interrupted between the replace and deleting those segments
+    is finished by the next one, which would otherwise merge them twice.
+    """
+
+    def __init__(
+        self,
+        path_provider: Callable[[], str],
+        preferred_columns: Sequence[str] = (),
+        value_lookup: Optional[Callable[[dict, str], object]] = None,
+        compaction_interval_seconds: float = 0,
+    ) -> None:
+        self._path_provider = path_provider
+        self.preferred_columns = list(preferred_columns)
+        self._value_lookup = value_lookup or (lambda row, column: row.get(column))
+        self.compaction_interval_seconds = compaction_interval_seconds
+        self._append_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def excel_path(self) -> str:
+        return self._path_provider()
+
+    @property
+    def pending_log_path(self) -> str:
+        return f"{self.excel_path}.pending.jsonl"
+
+    def append(self, row: dict) -> None:
+        """Record one row for the next compaction."""
+        line = json.dumps(row, ensure_ascii=False, default=str) + "\n"
+        with self._append_lock, self._file_lock("append"):
+            with open(self.pending_log_path, "a", encoding="utf-8") as handle:
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+        self._ensure_compactor()
+
+    def pending_count(self) -> int:
+        total = 0
+        for path in self._pending_files():
+            with open(path, "r", encoding="utf-8") as handle:
+                total += sum(1 for line in handle if line.strip())
+        return total
+
+    @property
+    def journal_path(self) -> str:
+        return f"{self.excel_path}.compaction.json"
+
+    def compact(self) -> int:
+        """Merge pending rows into the workbook; returns the number of rows written."""
+        with self._compact_lock, self._file_lock("compact"):
+            self._recover_interrupted()
+            if not os.path.exists(self.pending_log_path) and not self._segments():
+                return 0
+
+            # Seal the live log so new appends start a fresh file while we merge.
+            with self._append_lock, self._file_lock("append"):
+                if os.path.exists(self.pending_log_path):
+                    os.replace(
+                        self.pending_log_path,
+                        f"{self.pending_log_path}.{uuid4().hex}.segment",
+                    )
+
+            segments = self._segments()
+            rows = self._read_segments(segments)
+            if rows:
+                self._write_rows(rows, segments)
+            self._discard_merged(segments)
+            return len(rows)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _ensure_compactor(self) -> None:
+        if self.compaction_interval_seconds <= 0:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(
+            target=self._run_compactor,
+            name="survey-excel-compactor",
+            daemon=True,
+        )
+        self._compactor.start()
+
+    def _run_compactor(self) -> None:
+        while not self._stop.wait(self.compaction_interval_seconds):
+            try:
+                self.compact()
+            except Exception as exc:
+                print(f"Survey workbook compaction failed: {exc}")
+
+    def _segments(self) -> List[str]:
+        segments = glob.glob(f"{glob.escape(self.pending_log_path)}.*.segment")
+        return sorted(segments, key=os.path.getmtime)
+
+    def _pending_files(self) -> List[str]:
+        files = self._segments()
+        if os.path.exists(self.pending_log_path):
+            files.append(self.pending_log_path)
+        return files
+
+    @staticmethod
+    def _read_segments(segments: List[str]) -> List[dict]:
+        rows = []
+        for segment in segments:
+            with open(segment, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rows.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn final line from a crashed writer; skip it.
+                        print(f"Skipping unreadable pending survey row in {segment}")
+        return rows
+
+    def _write_rows(self, rows: List[dict], segments: List[str]) -> None:
+        excel_path = self.excel_path
+        if os.path.exists(excel_path):
+            existing_df = pd.read_excel(excel_path, sheet_name=0)
+        else:
+            existing_df = pd.DataFrame(columns=self.preferred_columns)
+
+        ordered_columns = list(existing_df.columns)
+        for row in rows:
+            for column in row.keys():
+                if column not in ordered_columns:
+                    ordered_columns.append(column)
+
+        append_df = pd.DataFrame(
+            [
+                {column: self._value_lookup(row, column) for column in ordered_columns}
+                for row in rows
+            ],
+            columns=ordered_columns,
+        )
+        updated_df = pd.concat(
+            [existing_df.reindex(columns=ordered_columns), append_df],
+            ignore_index=True,
+        )
+
+        tmp_path = f"{excel_path}.{uuid4().hex}.tmp.xlsx"
+        try:
+            updated_df.to_excel(tmp_path, index=False)
+            self._write_journal(segments, _file_digest(tmp_path))
+            os.replace(tmp_path, excel_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _write_journal(self, segments: List[str], workbook_digest: str) -> None:
+        journal = {"segments": segments, "workbook_sha256": workbook_digest}
+        tmp_path = f"{self.journal_path}.{uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(journal, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _discard_merged(self, segments: List[str]) -> None:
+        for segment in segments:
+            if os.path.exists(segment):
+                os.remove(segment)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def _recover_interrupted(self) -> None:
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as handle:
+            journal = json.load(handle)
+        if (
+            os.path.exists(self.excel_path)
+            and _file_digest(self.excel_path) == journal.get("workbook_sha256")
+        ):
+            # The workbook already holds these segments' rows.
+            print("Finishing an interrupted survey workbook compaction")
+            self._discard_merged(journal.get("segments", []))
+        else:
+            # Interrupted before the workbook was replaced: merge the segments again.
+            os.remove(self.journal_path)
+
+    @contextmanager
+    def _file_lock(self, name: str):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.excel_path}.{name}.lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
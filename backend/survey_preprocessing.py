@@ -0,0 +1,163 @@
+import threading
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+
+ACADEMIC_TEXT_TO_SCORE = {
+    "excellent": 5,
+    "outstanding": 5,
+    "very good": 4.5,
+    "good": 4,
+    "above average": 4,
+    "average": 3,
+    "below average": 2,
+    "weak": 1.5,
+    "poor": 1,
+    "fail": 1,
+}
+
+ACADEMIC_GRADE_TO_SCORE = {"a+": 5, "a": 4.8, "b+": 4.2, "b": 4, "c+": 3.2, "c": 3, "d": 2, "f": 1}
+
+ACADEMIC_COLUMN_CANDIDATES = ["Academic Performance", "Academic Performance ", "academic performance"]
+
+
+def resolve_column(df: pd.DataFrame, candidates: Union[str, Sequence[str]]) -> Optional[str]:
+    """Resolve exact or trimmed, case-insensitive column names (handles trailing spaces)."""
+    if isinstance(candidates, str):
+        candidates = [candidates]
+    for candidate in candidates:
+        if candidate in df.columns:
+            return candidate
+    for candidate in candidates:
+        normalized_target = candidate.strip().lower()
+        for col in df.columns:
+            if str(col).strip().lower() == normalized_target:
+                return col
+    return None
+
+
+def to_academic_scale(value):
+    """
+    Convert raw academic performance values to a 1-5 scale.
+    Supports numeric values (1-5, 0-10, 0-100) and common text labels.
+    """
+    if value is None or pd.isna(value):
+        return None
+
+    if isinstance(value, (int, float, np.number)):
+        numeric = float(value)
+        if numeric < 0:
+            return None
+        if numeric <= 5:
+            # Keep within sentiment range; treat 0 as lowest bound.
+            return max(1.0, min(5.0, numeric if numeric > 0 else 1.0))
+        if numeric <= 10:
+            return max(1.0, min(5.0, numeric / 2.0))
+        if numeric <= 100:
+            return max(1.0, min(5.0, numeric / 20.0))
+        return max(1.0, min(5.0, numeric))
+
+    text = str(value).strip().lower()
+    if not text:
+        return None
+
+    if text in ACADEMIC_GRADE_TO_SCORE:
+        return ACADEMIC_GRADE_TO_SCORE[text]
+
+    for label, score in ACADEMIC_TEXT_TO_SCORE.items():
+        if label in text:
+            return score
+
+    # Attempt numeric extraction from strings like "8/10" or "78%"
+    try:
+        cleaned = text.replace("%", "").replace("/10", "").replace("/5", "")
+        return to_academic_scale(float(cleaned))
+    except Exception:
+        return None
+
+
+def normalize_text(value) -> str:
+    """Lower-case, trim and collapse whitespace; missing values become ``""``."""
+    if value is None or pd.isna(value):
+        return ""
+    return " ".join(str(value).strip().lower().split())
+
+
+class PreparedSurveyFrame:
+    """
+    Column lookups and parsed per-row vectors shared by the analyzers.
+
+    Every analyzer used to resolve its own columns and re-parse the academic
+    column row by row. A prepared frame does each of those once, on first use,
+    and hands back arrays aligned with ``data``'s rows. It is immutable from
+    the analyzers' point of view, so one instance can serve concurrent
+    analyzers (and every request on the same survey snapshot version).
+    """
+
+    def __init__(self, data: pd.DataFrame) -> None:
+        self.data = data
+        # Re-entrant: derived vectors (academic_scores) build on cached ones.
+        self._lock = threading.RLock()
+        self._columns: dict = {}
+        self._cache: dict = {}
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def column(self, candidates: Union[str, Sequence[str]]) -> Optional[str]:
+        key = candidates if isinstance(candidates, str) else tuple(candidates)
+        if key not in self._columns:
+            self._columns[key] = resolve_column(self.data, candidates)
+        return self._columns[key]
+
+    @property
+    def academic_column(self) -> Optional[str]:
+        return self.column(ACADEMIC_COLUMN_CANDIDATES)
+
+    def values(self, column: str) -> np.ndarray:
+        """Raw values of ``column`` as an object array."""
+        return self._cached(("values", column), lambda: self.data[column].to_numpy(dtype=object))
+
+    def normalized_text(self, column: str) -> np.ndarray:
+        """``normalize_text`` of every value, computed once per distinct value."""
+        return self._cached(("text", column), lambda: self._map_unique(column, normalize_text, ""))
+
+    def numeric(self, column: str) -> np.ndarray:
+        """Float values of ``column``; missing or unparseable entries are NaN."""
+        return self._cached(
+            ("numeric", column),
+            lambda: pd.to_numeric(self.data[column], errors="coerce").to_numpy(dtype=float),
+        )
+
+    def academic_scale(self) -> np.ndarray:
+        """``to_academic_scale`` per row as an object array (None when unknown)."""
+        column = self.academic_column
+        if column is None:
+            return np.full(len(self.data), None, dtype=object)
+        return self._cached(("academic", column), lambda: self._map_unique(column, to_academic_scale, None))
+
+    def academic_scores(self) -> np.ndarray:
+        """Academic scale per row as floats, NaN when unknown."""
+        # None -> NaN in the object-to-float cast.
+        return self._cached(("academic_scores",), lambda: self.academic_scale().astype(float))
+
+    def _map_unique(self, column: str, convert, missing) -> np.ndarray:
+        codes, uniques = pd.factorize(self.data[column], use_na_sentinel=True)
+        lookup = np.empty(len(uniques) + 1, dtype=object)
+        lookup[:-1] = [convert(value) for value in uniques]
+        # Missing values carry code -1, which indexes the trailing slot.
+        lookup[-1] = missing
+        return lookup[codes]
+
+    def _cached(self, key, build):
+        value = self._cache.get(key)
+        if value is None:
+            with self._lock:
+                value = self._cache.get(key)
+                if value is None:
+                    value = build()
+                    value.setflags(write=False)
+                    self._cache[key] = value
+        return value
@@ -0,0 +1,216 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+T = TypeVar("T")
+
+
+class SurveySnapshot:
+    """Process-wide, versioned in-memory copy of the surveys table.
+
+    The snapshot is append-only: new rows are pulled from SQLite by rowid so
+    readers never re-parse the workbook and each write only costs the delta.
+    Frames handed out by ``frame()`` are never mutated in place; treat them
+    as read-only views of a single version.
+
+    Columns live in preallocated arrays that double when full, and each
+    version's frame is a view of their first rows. Appending a delta only
+    writes the new rows, so an ingest costs O(delta) amortized instead of a
+    copy of the whole frame. Rows past a frame's end are invisible to it,
+    which keeps frames handed out earlier unchanged.
+    """
+
+    def __init__(self, columns: Sequence[str], refresh_interval_seconds: float = 5.0) -> None:
+        self.columns = list(columns)
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._lock = threading.RLock()
+        self._frame = pd.DataFrame(columns=self.columns)
+        self._version = 0
+        self._generation = 0
+        self._last_rowid = 0
+        # What the rows before ``_last_rowid`` came from: the table, or a loaded frame's hash.
+        self._origin = "db"
+        # Capacity-sized column arrays behind ``_frame``; None until the first append.
+        self._buffers: Optional[Dict[str, np.ndarray]] = None
+        self._capacity = 0
+        self._last_sync_at = 0.0
+        self._derived = None
+        self._listeners: List[Callable[[int, pd.DataFrame], None]] = []
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def generation(self) -> int:
+        """Bumped whenever the frame is replaced instead of appended to."""
+        return self._generation
+
+    @property
+    def data_version(self) -> str:
+        """Identifies the snapshot's rows the same way in every process.
+
+        Built from where the frame started (``db``, or a hash of a frame given
+        to ``load_frame``), the last rowid synced and the row count. Rows are
+        only ever appended, so two processes with the same value hold the same
+        rows, and a deleted or re-inserted row changes it.
+        """
+        with self._lock:
+            return f"{self._origin}:{self._last_rowid}:{len(self._frame)}"
+
+    @property
+    def is_empty(self) -> bool:
+        return self._frame.empty
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    def frame(self) -> pd.DataFrame:
+        # A shallow copy keeps callers from renaming/adding columns on the shared frame.
+        return self._frame.copy(deep=False)
+
+    def view(self) -> Tuple[int, pd.DataFrame]:
+        """``(generation, frame)`` taken together, so the frame belongs to that generation."""
+        with self._lock:
+            return self._generation, self._frame.copy(deep=False)
+
+    def add_listener(self, callback: Callable[[int, pd.DataFrame], None]) -> None:
+        """Call ``callback(generation, frame)`` after every append or replace."""
+        self._listeners.append(callback)
+
+    def derived(self, build: Callable[[pd.DataFrame], T]) -> T:
+        """``build(frame)`` for the current version, computed at most once per version.
+
+        The value is built from (and should carry) its own frame, so callers never
+        pair a derived value with a frame from a different version.
+        """
+        with self._lock:
+            version, frame = self._version, self._frame
+            if self._derived is not None and self._derived[0] == version:
+                return self._derived[1]
+        value = build(frame.copy(deep=False))
+        with self._lock:
+            if self._version == version:
+                self._derived = (version, value)
+        return value
+
+    def load_frame(self, df: Optional[pd.DataFrame], last_rowid: Optional[int] = None) -> None:
+        """Replace the snapshot wholesale (workbook fallback and tests).
+
+        Pass the current max rowid of ``surveys`` as ``last_rowid`` when the
+        frame stands in for those rows, so ``sync`` only appends newer ones
+        instead of duplicating them. ``None`` keeps the current position.
+        """
+        with self._lock:
+            self._frame = df.reset_index(drop=True) if df is not None else pd.DataFrame(columns=self.columns)
+            self._buffers = None
+            self._capacity = 0
+            if last_rowid is not None:
+                self._last_rowid = last_rowid
+            self._origin = _frame_fingerprint(self._frame)
+            self._version += 1
+            self._generation += 1
+        self._notify()
+
+    def sync(self, conn) -> int:
+        """Append rows inserted into ``surveys`` since the last sync; returns the row count."""
+        columns_sql = ",".join(f'"{column}"' for column in self.columns)
+        with self._lock:
+            rows = conn.execute(
+                f"""
+                SELECT rowid AS _snapshot_rowid, {columns_sql}
+                FROM surveys
+                WHERE rowid > ?
+                ORDER BY rowid
+                """,
+                (self._last_rowid,),
+            ).fetchall()
+            self._last_sync_at = time.monotonic()
+            if not rows:
+                return 0
+
+            delta = pd.DataFrame([tuple(row)[1:] for row in rows], columns=self.columns)
+            self._append(delta)
+            self._last_rowid = int(rows[-1][0])
+            self._version += 1
+        self._notify()
+        return len(rows)
+
+    def refresh_if_due(self, connect: Callable) -> int:
+        """Pick up rows written by other workers, at most once per refresh interval."""
+        if time.monotonic() - self._last_sync_at < self.refresh_interval_seconds:
+            return 0
+        with connect() as conn:
+            return self.sync(conn)
+
+    def _append(self, delta: pd.DataFrame) -> None:
+        size, added = len(self._frame), len(delta)
+        if size == 0:
+            # Like the first sync always did: the delta's columns and dtypes, nothing else.
+            self._buffers, self._capacity = {}, 0
+            columns = list(delta.columns)
+        else:
+            columns = list(self._frame.columns)
+            columns += [column for column in delta.columns if column not in self._frame.columns]
+            if self._buffers is None:
+                self._buffers = {
+                    column: self._frame[column].to_numpy() for column in self._frame.columns
+                }
+                self._capacity = size
+
+        if size + added > self._capacity:
+            capacity = max(1024, 2 * (size + added))
+            for column, buffer in self._buffers.items():
+                grown = np.empty(capacity, dtype=buffer.dtype)
+                grown[:size] = buffer[:size]
+                self._buffers[column] = grown
+            self._capacity = capacity
+
+        for column in columns:
+            if column in delta.columns:
+                values = delta[column].to_numpy()
+            else:
+                values = np.full(added, np.nan)
+            buffer = self._buffers.get(column)
+            if buffer is None:
+                # Rows before this column existed read as missing, as pd.concat would give.
+                buffer = np.empty(self._capacity, dtype=_common_dtype(values.dtype, np.float64))
+                buffer[:size] = np.nan
+            dtype = _common_dtype(buffer.dtype, values.dtype)
+            if dtype != buffer.dtype:
+                buffer = buffer.astype(dtype)
+            buffer[size:size + added] = values
+            self._buffers[column] = buffer
+
+        self._frame = pd.DataFrame(
+            {column: self._buffers[column][:size + added] for column in columns},
+            copy=False,
+        )
+
+    def _notify(self) -> None:
+        if not self._listeners:
+            return
+        generation, frame = self.view()
+        for callback in self._listeners:
+            try:
+                callback(generation, frame)
+            except Exception as exc:
+                print(f"Survey snapshot listener failed: {exc}")
+
+
+def _common_dtype(left: np.dtype, right: np.dtype) -> np.dtype:
+    try:
+        dtype = np.result_type(left, right)
+    except TypeError:
+        return np.dtype(object)
+    # Fixed-width strings would truncate later values.
+    return np.dtype(object) if dtype.kind in "SU" else dtype
+
+
+def _frame_fingerprint(frame: pd.DataFrame) -> str:
+    # Hashed as text so object columns with mixed values hash too.
+    digest = pd.util.hash_pandas_object(frame.astype(str), index=False).sum()
+    return format(int(digest) & 0xFFFFFFFFFFFF, "x")
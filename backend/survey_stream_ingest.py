@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+import sqlite3
+import tempfile
+from itertools import islice
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from data_quality_completeness import completeness_summary, missing_mask
+from data_quality_outliers import IQROutlierEngine
+
+
+def iter_ndjson_records(stream: IO[bytes]) -> Iterator[dict]:
+    """One JSON object per line; blank lines are skipped."""
+    for line_number, line in enumerate(_decoded_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Line {line_number} is not valid JSON: {exc.msg}.") from exc
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_number} must be a JSON object.")
+        yield record
+
+
+def iter_csv_records(stream: IO[bytes], numeric_columns: Iterable[str] = ()) -> Iterator[dict]:
+    """Rows of a headed CSV body; ``numeric_columns`` are parsed to numbers like JSON input."""
+    numeric_columns = set(numeric_columns)
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    try:
+        for row in reader:
+            yield {
+                key: _parse_csv_number(value) if key in numeric_columns else value
+                for key, value in row.items()
+                if key is not None
+            }
+    except csv.Error as exc:
+        raise ValueError(f"Line {reader.line_num} is not valid CSV: {exc}.") from exc
+    except UnicodeDecodeError as exc:
+        raise ValueError("Request body is not valid UTF-8.") from exc
+
+
+def _decoded_lines(stream: IO[bytes]) -> Iterator[str]:
+    # Decoding runs a buffer ahead of the lines, so the error cannot name one.
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    while True:
+        try:
+            line = next(lines)
+        except StopIteration:
+            return
+        except UnicodeDecodeError as exc:
+            raise ValueError("Request body is not valid UTF-8.") from exc
+        yield line
+
+
+def chunked(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parse_csv_number(value):
+    if value is None or not value.strip():
+        return value
+    text = value.strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return value
+
+
+class NormalizedChunkSpool:
+    """
+    Normalized record chunks spilled to a temporary file.
+
+    Lets a streamed body be read and validated in full before a write
+    transaction is opened, so a slow upload never holds the database lock.
+    """
+
+    def __init__(self) -> None:
+        self._file = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+
+    def add(self, normalized_rows: Sequence[dict], timestamps: Sequence[str]) -> None:
+        self._file.write(json.dumps([list(normalized_rows), list(timestamps)]))
+        self._file.write("\n")
+
+    def chunks(self) -> Iterator[tuple]:
+        self._file.seek(0)
+        for line in self._file:
+            normalized_rows, timestamps = json.loads(line)
+            yield normalized_rows, timestamps
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class StreamingQualityMetrics:
+    """
+    ``compute_batch_quality_metrics`` for batches that arrive in chunks.
+
+    Missing-value counts are running totals and the IQR bounds come from the
+    outlier engine's per-field sketches, so memory stays constant in the batch
+    size. Parsed numeric values are spilled to a temporary file so the final
+    outlier pass can apply the resolved bounds to every row.
+    """
+
+    def __init__(self, columns: Sequence[str], outlier_engine: IQROutlierEngine) -> None:
+        self.columns = list(columns)
+        self.outlier_engine = outlier_engine
+        self.total_rows = 0
+        self.missing_counts: Dict[str, int] = {column: 0 for column in self.columns}
+        self.sketches = outlier_engine.new_sketches()
+        self._spill = tempfile.TemporaryFile()
+
+    def add_rows(self, normalized_rows: Sequence[dict]) -> None:
+        self.total_rows += len(normalized_rows)
+        chunk_missing = missing_mask(normalized_rows, self.columns).sum(axis=0)
+        for column, count in zip(self.columns, chunk_missing.tolist()):
+            self.missing_counts[column] += count
+
+        numeric = self.outlier_engine.numeric_matrix(normalized_rows)
+        self.outlier_engine.add_to_sketches(self.sketches, numeric)
+        self._spill.write(numeric.tobytes())
+
+    def finalize(self, inserted_rows: int, conn: Optional[sqlite3.Connection] = None) -> dict:
+        """Batch metrics; with ``conn`` the outlier population is updated in that transaction."""
+        outlier_rows, field_outlier_counts = self._count_outliers(conn)
+        field_metrics, completeness_score = completeness_summary(
+            self.columns, self.missing_counts, self.total_rows, field_outlier_counts
+        )
+        return {
+            "total_rows": self.total_rows,
+            "inserted_rows": inserted_rows,
+            "duplicate_rows": max(self.total_rows - inserted_rows, 0),
+            "outlier_rows": outlier_rows,
+            "completeness_score": completeness_score,
+            "field_metrics": field_metrics,
+        }
+
+    def close(self) -> None:
+        self._spill.close()
+
+    def _count_outliers(self, conn, chunk_rows: int = 8192):
+        iqr_lower, iqr_upper = self.outlier_engine.resolve_bounds(self.sketches, conn)
+        width = len(self.outlier_engine.fields)
+        field_counts = np.zeros(width, dtype=np.int64)
+        outlier_rows = 0
+        self._spill.seek(0)
+        while True:
+            block = self._spill.read(chunk_rows * width * 8)
+            if not block:
+                break
+            values = np.frombuffer(block, dtype=float).reshape(-1, width)
+            block_rows, block_counts = self.outlier_engine.flag(values, iqr_lower, iqr_upper)
+            outlier_rows += block_rows
+            field_counts += block_counts
+        return outlier_rows, dict(zip(self.outlier_engine.fields, field_counts.tolist()))
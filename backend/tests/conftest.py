@@ -145,12 +145,12 @@ def _install_stub_modules():
     sys.modules["survey_processor"] = survey_processor_mod
 
     role_mod = types.ModuleType("sentiment_analysis_rolemodels")
-    role_mod.analyze_role_model = lambda _df: {"rolemodel_score": 0.5}
+    role_mod.analyze_role_model = lambda _df, **_kwargs: {"rolemodel_score": 0.5}
     sys.modules["sentiment_analysis_rolemodels"] = role_mod
 
     background_mod = types.ModuleType("sentiment_analysis_background")
     background_mod.get_background_sentiment = (
-        lambda _df: {"background_score": 0.7, "background_details": [1, 2, 3]}
+        lambda _df, **_kwargs: {"background_score": 0.7, "background_details": [1, 2, 3]}
     )
     sys.modules["sentiment_analysis_background"] = background_mod
 
@@ -161,11 +161,11 @@ def _install_stub_modules():
     sys.modules["sentiment_analysis_behavoralimpact"] = behavioral_mod
 
     income_mod = types.ModuleType("sentiment_analysis_family_income")
-    income_mod.get_income_sentiment = lambda _df: {"income_score": 0.61}
+    income_mod.get_income_sentiment = lambda _df, **_kwargs: {"income_score": 0.61}
     sys.modules["sentiment_analysis_family_income"] = income_mod
 
     home_mod = types.ModuleType("sentiment_analysis_problems_in_home")
-    home_mod.analyze_problems_in_home = lambda _df: {"home_score": 0.59}
+    home_mod.analyze_problems_in_home = lambda _df, **_kwargs: {"home_score": 0.59}
     sys.modules["sentiment_analysis_problems_in_home"] = home_mod
 
     vector_store_mod = types.ModuleType("vector_store")
@@ -204,6 +204,11 @@ def app_module(tmp_path, monkeypatch):
     monkeypatch.setenv("ANALYTICS_MAX_PAGE_SIZE", "2")
     monkeypatch.setenv("ANALYTICS_DEFAULT_PAGE_SIZE", "1")
     monkeypatch.setenv("FLASK_DEBUG", "0")
+    monkeypatch.setenv("SURVEY_EXCEL_COMPACTION_SECONDS", "0")
+    monkeypatch.setenv("RL_LEARNING_FLUSH_SECONDS", "0")
+    monkeypatch.setenv("DQ_ALERT_POLL_SECONDS", "0")
+    monkeypatch.setenv("ANALYTICS_PROCESS_WORKERS", "0")
+    monkeypatch.setenv("ANALYSIS_MATERIALIZE_DEBOUNCE_SECONDS", "0")
 
     if "config" in sys.modules:
         del sys.modules["config"]
@@ -227,6 +232,7 @@ def app_module(tmp_path, monkeypatch):
             }
         ]
     )
+    module.survey_snapshot.load_frame(module.data)
     return module
 
 
@@ -1,4 +1,10 @@
+import csv
+import io
+import json
+import types
+
 import pandas as pd
+import pytest
 
 
 def _sample_record(name_suffix="1"):
@@ -118,7 +124,12 @@ def test_submit_survey_creates_excel_and_normalizes_assessment_payload(
 
     assert response.status_code == 200
     assert body["success"] is True
+    assert not workbook_path.exists()
+    assert app_module.survey_excel_mirror.pending_count() == 1
+
+    assert app_module.survey_excel_mirror.compact() == 1
     assert workbook_path.exists()
+    assert app_module.survey_excel_mirror.pending_count() == 0
 
     workbook_df = pd.read_excel(workbook_path)
     latest_row = workbook_df.iloc[-1].to_dict()
@@ -142,3 +153,454 @@ def test_submit_survey_creates_excel_and_normalizes_assessment_payload(
         assessment_body["survey_data"]["Reason for such role model "]
         == "Guides the community"
     )
+
+
+def test_workbook_compaction_writes_each_submission_once_even_if_interrupted(
+    client, app_module, auth_token, tmp_path
+):
+    workbook_path = tmp_path / "Childsurvey.xlsx"
+    app_module.SURVEY_EXCEL_PATH = str(workbook_path)
+    app_module.data = None
+    app_module.survey_processor.process_and_save_survey = lambda payload: {
+        "timestamp": "2026-03-06T12:34:56",
+    }
+    mirror = app_module.survey_excel_mirror
+
+    def submit(name):
+        response = client.post(
+            "/api/submit-survey",
+            headers={"X-Auth-Token": auth_token},
+            json={
+                "Name of Child": name,
+                "Age": 12,
+                "Behavioral Impact": "Calm",
+                "Academic Performance": 70,
+                "Family Income": 12000,
+            },
+        )
+        assert response.status_code == 200
+
+    def workbook_names():
+        return pd.read_excel(workbook_path)["Name of Child "].tolist()
+
+    submit("Student A")
+    submit("Student B")
+    assert mirror.pending_count() == 2
+    assert mirror.compact() == 2
+    assert workbook_names() == ["Student A", "Student B"]
+    assert mirror.pending_count() == 0
+
+    # Killed after the workbook was replaced but before its segments were removed.
+    submit("Student C")
+
+    def killed(_segments):
+        raise RuntimeError("compactor killed")
+
+    mirror._discard_merged = killed
+    with pytest.raises(RuntimeError):
+        mirror.compact()
+    del mirror._discard_merged
+    assert workbook_names() == ["Student A", "Student B", "Student C"]
+    assert mirror.compact() == 0
+    assert workbook_names() == ["Student A", "Student B", "Student C"]
+    assert mirror.pending_count() == 0
+
+    # Killed before the workbook was replaced: the rerun merges the rows once.
+    submit("Student D")
+    mirror._write_journal = lambda *_args: killed(None)
+    with pytest.raises(RuntimeError):
+        mirror.compact()
+    del mirror._write_journal
+    assert mirror.compact() == 1
+    assert workbook_names() == ["Student A", "Student B", "Student C", "Student D"]
+    assert mirror.pending_count() == 0
+    assert not list(tmp_path.glob("Childsurvey.xlsx.*tmp*"))
+
+
+def test_ingest_appends_to_snapshot_without_workbook_reload(client, app_module, auth_token):
+    def fail_reload():
+        raise AssertionError("analytics should not re-read the workbook")
+
+    app_module._load_from_known_locations = fail_reload
+    rows_before = len(app_module.survey_snapshot)
+    version_before = app_module.survey_snapshot.version
+
+    ingest_response = client.post(
+        "/api/data-quality/ingest-surveys-batch",
+        headers={"X-Auth-Token": auth_token},
+        json={"records": [_sample_record("snapshot")], "batchId": "batch-snapshot"},
+    )
+    analysis_response = client.get(
+        "/api/analysis/complete-summary",
+        headers={"X-Auth-Token": auth_token},
+    )
+
+    assert ingest_response.status_code == 201
+    assert analysis_response.status_code == 200
+    assert len(app_module.survey_snapshot) == rows_before + 1
+    assert app_module.survey_snapshot.version > version_before
+    assert analysis_response.get_json()["totalSurveys"] == rows_before + 1
+
+
+def test_snapshot_appends_in_place_and_workbook_fallback_skips_seeded_rows(app_module):
+    snapshot = app_module.survey_snapshot
+    with app_module.get_db_connection() as conn:
+        max_rowid = conn.execute("SELECT MAX(rowid) FROM surveys").fetchone()[0]
+        snapshot.load_frame(app_module.data, last_rowid=max_rowid)
+        assert snapshot.sync(conn) == 0
+
+        frames = []
+        for index in range(3):
+            record = _sample_record(f"append-{index}")
+            columns_sql = ",".join(f'"{column}"' for column in record)
+            conn.execute(
+                f"INSERT INTO surveys ({columns_sql}) VALUES ({','.join('?' * len(record))})",
+                list(record.values()),
+            )
+            conn.commit()
+            assert snapshot.sync(conn) == 1
+            frames.append(snapshot.frame())
+
+    assert [len(frame) for frame in frames] == [2, 3, 4]
+    # Earlier versions never see rows appended after them.
+    assert frames[0]["Name of Child "].tolist() == ["Test Child", "Student append-0"]
+    assert frames[-1]["Age"].dtype.kind == "f"
+
+
+def test_ingest_folds_only_new_rows_into_analysis_counters(client, app_module, auth_token):
+    folded_batches = []
+
+    def fold_aggregate_rows(state, data, _prepared):
+        folded_batches.append(len(data))
+        state["rows"] += len(data)
+
+    app_module.income = types.SimpleNamespace(
+        new_aggregate_state=lambda: {"rows": 0},
+        fold_aggregate_rows=fold_aggregate_rows,
+        summarize_aggregate_state=lambda state: {"total_households": state["rows"]},
+    )
+    rows_before = len(app_module.survey_snapshot)
+
+    for index in range(2):
+        response = client.post(
+            "/api/data-quality/ingest-surveys-batch",
+            headers={"X-Auth-Token": auth_token},
+            json={"records": [_sample_record(f"counter-{index}")], "batchId": f"batch-counter-{index}"},
+        )
+        assert response.status_code == 201
+    counters = client.get("/api/analysis/counters", headers={"X-Auth-Token": auth_token})
+
+    assert counters.status_code == 200
+    assert counters.get_json()["income"] == {"total_households": rows_before + 2}
+    assert counters.get_json()["totalSurveys"] == rows_before + 2
+    # The first ingest builds from the existing rows; later ones fold just their delta.
+    assert folded_batches == [rows_before + 1, 1]
+
+
+def test_db_connections_are_pooled_per_thread_in_wal_mode(client, app_module):
+    with app_module.get_db_connection() as first, app_module.get_db_connection() as second:
+        journal_mode = first.execute("PRAGMA journal_mode").fetchone()[0]
+        assert first is second
+    opened_before = app_module.db_pool.stats()["connections_opened"]
+
+    client.get("/api/data-quality/monitoring")
+    body = client.get("/metrics").get_data(as_text=True)
+
+    assert journal_mode == "wal"
+    assert app_module.db_pool.stats()["connections_opened"] == opened_before
+    assert "visionary_sqlite_pool_checkouts_total" in body
+    assert "visionary_sqlite_pool_connection_open_seconds_total" in body
+
+
+def test_bulk_ingest_dedupes_within_batch_and_matches_single_row_hashes(
+    client, app_module, auth_token
+):
+    app_module.survey_bulk_ingestor.chunk_size = 2
+    records = [_sample_record(str(index)) for index in range(5)] + [_sample_record("0")]
+
+    response = client.post(
+        "/api/data-quality/ingest-surveys-batch",
+        headers={"X-Auth-Token": auth_token},
+        json={"records": records, "batchId": "batch-bulk"},
+    )
+    metrics = response.get_json()["metrics"]
+    with app_module.get_db_connection() as conn:
+        stored_hash = conn.execute(
+            "SELECT unique_hash FROM surveys WHERE source LIKE 'batch:batch-bulk:%' ORDER BY rowid LIMIT 1"
+        ).fetchone()["unique_hash"]
+        field_metric_rows = conn.execute(
+            "SELECT COUNT(*) AS total FROM data_quality_field_metrics WHERE batch_id = ?",
+            ("batch-bulk",),
+        ).fetchone()["total"]
+
+    normalized_first = {
+        column: app_module._normalize_survey_value(records[0].get(column))
+        for column in app_module.SURVEY_COLUMNS
+    }
+    assert response.status_code == 201
+    assert metrics["inserted_rows"] == 5
+    assert metrics["duplicate_rows"] == 1
+    assert stored_hash == app_module.compute_survey_row_hash(normalized_first)
+    assert field_metric_rows == len(metrics["field_metrics"])
+
+
+def test_stream_ingest_accepts_ndjson_and_csv_with_batch_metrics(client, app_module, auth_token):
+    # Judge the batch on its own so the in-memory computation is a direct reference.
+    app_module.data_quality_outlier_engine.bounds_scope = "batch"
+    headers = {"X-Auth-Token": auth_token}
+    records = [_sample_record(str(index)) for index in range(6)]
+    records[2]["Family Income "] = 5_000_000
+    records[3]["Role models"] = None
+    ndjson_body = "\n".join(json.dumps(record, ensure_ascii=False) for record in records) + "\n"
+
+    ndjson_response = client.post(
+        "/api/data-quality/ingest-surveys-stream?batchId=stream-ndjson",
+        headers=headers,
+        data=ndjson_body.encode("utf-8"),
+        content_type="application/x-ndjson",
+    )
+
+    csv_buffer = io.StringIO()
+    writer = csv.DictWriter(csv_buffer, fieldnames=list(records[0]))
+    writer.writeheader()
+    writer.writerows(records)
+    csv_response = client.post(
+        "/api/data-quality/ingest-surveys-stream?batchId=stream-csv",
+        headers=headers,
+        data=csv_buffer.getvalue().encode("utf-8"),
+        content_type="text/csv",
+    )
+
+    normalized_rows = [
+        {
+            column: app_module._normalize_survey_value(record.get(column))
+            for column in app_module.SURVEY_COLUMNS
+        }
+        for record in records
+    ]
+    assert ndjson_response.status_code == 201
+    assert ndjson_response.get_json()["batchId"] == "stream-ndjson"
+    assert ndjson_response.get_json()["metrics"] == app_module.compute_batch_quality_metrics(
+        normalized_rows, 6
+    )
+    # CSV numbers are parsed, so the same surveys hash identically and are all duplicates.
+    assert csv_response.status_code == 201
+    assert csv_response.get_json()["metrics"]["inserted_rows"] == 0
+    assert csv_response.get_json()["metrics"]["duplicate_rows"] == 6
+
+
+def test_stream_ingest_rejects_malformed_line_without_partial_insert(client, app_module, auth_token):
+    rows_before = len(app_module.survey_snapshot)
+    body = json.dumps(_sample_record("ok")) + "\n{not json\n"
+
+    response = client.post(
+        "/api/data-quality/ingest-surveys-stream",
+        headers={"X-Auth-Token": auth_token},
+        data=body.encode("utf-8"),
+        content_type="application/x-ndjson",
+    )
+    with app_module.get_db_connection() as conn:
+        stored = conn.execute(
+            "SELECT COUNT(*) AS total FROM surveys WHERE \"Name of Child \" = 'Student ok'"
+        ).fetchone()["total"]
+
+    assert response.status_code == 400
+    assert "Line 2" in response.get_json()["error"]
+    assert stored == 0
+    assert len(app_module.survey_snapshot) == rows_before
+
+    undecodable = client.post(
+        "/api/data-quality/ingest-surveys-stream",
+        headers={"X-Auth-Token": auth_token},
+        data=json.dumps(_sample_record("ok")).encode("utf-8") + b"\n\xff\xfe{}\n",
+        content_type="application/x-ndjson",
+    )
+    assert undecodable.status_code == 400
+    assert "not valid UTF-8" in undecodable.get_json()["error"]
+
+
+def test_outlier_bounds_use_persisted_population_sketches(client, app_module, auth_token):
+    headers = {"X-Auth-Token": auth_token}
+    engine = app_module.data_quality_outlier_engine
+    with app_module.get_db_connection() as conn:
+        values_before = engine.load_population(conn)["Family Income "].n
+    incomes = [12000, 14000, 15000, 16000, 18000, 20000]
+    population_batch = []
+    for index, income in enumerate(incomes):
+        record = _sample_record(f"population-{index}")
+        record["Family Income "] = income
+        population_batch.append(record)
+    client.post(
+        "/api/data-quality/ingest-surveys-batch",
+        headers=headers,
+        json={"records": population_batch, "batchId": "population-seed"},
+    )
+
+    # Within the static range, and a one-row batch has no IQR of its own.
+    outlier = _sample_record("population-outlier")
+    outlier["Family Income "] = 900_000
+    response = client.post(
+        "/api/data-quality/ingest-surveys-batch",
+        headers=headers,
+        json={"records": [outlier], "batchId": "population-outlier"},
+    )
+    with app_module.get_db_connection() as conn:
+        values_after = engine.load_population(conn)["Family Income "].n
+
+    field_metrics = {item["field_name"]: item for item in response.get_json()["metrics"]["field_metrics"]}
+    assert field_metrics["Family Income "]["outlier_count"] == 1
+    assert values_after == values_before + len(incomes) + 1
+
+
+def test_batch_quality_metrics_count_blank_and_null_cells_as_missing(app_module):
+    rows = [
+        {**_sample_record("a"), "Role models": "   ", "Age": float("nan")},
+        {**_sample_record("b"), "Role models": None},
+        {key: value for key, value in _sample_record("c").items() if key != "Role models"},
+        _sample_record("d"),
+    ]
+
+    metrics = app_module.compute_batch_quality_metrics(rows, inserted_rows=4)
+    by_field = {item["field_name"]: item for item in metrics["field_metrics"]}
+    total_cells = 4 * len(app_module.SURVEY_COLUMNS)
+
+    assert by_field["Role models"]["missing_count"] == 3
+    assert by_field["Role models"]["completeness_ratio"] == 0.25
+    assert by_field["Age"]["missing_count"] == 1
+    assert by_field["Name of Child "]["missing_count"] == 0
+    assert metrics["completeness_score"] == round((total_cells - 4) / total_cells, 4)
+
+
+def test_alerts_are_queued_and_retried_by_the_outbox(client, app_module, auth_token, monkeypatch):
+    headers = {"X-Auth-Token": auth_token}
+    config_response = client.post(
+        "/api/data-quality/alerts/config",
+        headers=headers,
+        json={
+            "completenessMin": 1.0,
+            "duplicatesMax": 10,
+            "outliersMax": 10,
+            "webhookUrls": ["https://hooks.example/dq"],
+        },
+    )
+    assert config_response.status_code == 200
+
+    calls = []
+
+    def flaky_post(url, payload):
+        calls.append((url, payload["batchId"]))
+        return (len(calls) > 1), (None if len(calls) > 1 else "HTTP Error 503")
+
+    monkeypatch.setattr(app_module, "_post_json", flaky_post)
+    monkeypatch.setattr(app_module.data_quality_alert_outbox, "retry_base_seconds", 0)
+
+    ingest_response = client.post(
+        "/api/data-quality/ingest-surveys-batch",
+        headers=headers,
+        json={"records": [{**_sample_record("alert"), "Role models": ""}], "batchId": "batch-alert"},
+    )
+    body = ingest_response.get_json()
+
+    assert ingest_response.status_code == 201
+    assert calls == []
+    assert body["alertDelivery"]["webhook"][0]["status"] == "pending"
+
+    def stored_channels():
+        with app_module.get_db_connection() as conn:
+            row = conn.execute(
+                "SELECT channels FROM data_quality_alerts WHERE batch_id = ?", ("batch-alert",)
+            ).fetchone()
+        return json.loads(row["channels"])["webhook"][0]
+
+    assert app_module.data_quality_alert_outbox.deliver_due() == 1
+    assert stored_channels()["status"] == "pending"
+    assert stored_channels()["error"] == "HTTP Error 503"
+
+    assert app_module.data_quality_alert_outbox.deliver_due() == 1
+    assert stored_channels() == {
+        "target": "https://hooks.example/dq",
+        "status": "delivered",
+        "success": True,
+        "attempts": 2,
+        "error": None,
+    }
+    assert calls == [("https://hooks.example/dq", "batch-alert")] * 2
+    assert app_module.data_quality_alert_outbox.stats()["pending"] == 0
+
+
+def test_single_submissions_fold_into_rolling_quality_batches(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.submission_batch_coalescer, "max_rows", 2)
+    submissions = [
+        {**_sample_record("fold-1"), "Role models": ""},
+        {**_sample_record("fold-2"), "Role models": None},
+        _sample_record("fold-3"),
+    ]
+
+    results = []
+    with app_module.get_db_connection() as conn:
+        conn.execute(
+            "UPDATE data_quality_alert_config SET completeness_min = 1.0, webhook_urls = ? WHERE id = 1",
+            (json.dumps(["https://hooks.example/dq"]),),
+        )
+        for submission in submissions:
+            results.append(
+                app_module.record_submission_quality(conn, submission, 1, "2026-03-06T12:00:00")
+            )
+        conn.commit()
+
+        batches = conn.execute(
+            """
+            SELECT batch_id, total_rows, completeness_score
+            FROM data_quality_batches
+            WHERE source = 'submit_survey'
+            ORDER BY batch_id
+            """
+        ).fetchall()
+        role_model_metrics = conn.execute(
+            """
+            SELECT total_count, missing_count, completeness_ratio
+            FROM data_quality_field_metrics
+            WHERE batch_id = ? AND field_name = 'Role models'
+            """,
+            (batches[0]["batch_id"],),
+        ).fetchone()
+        field_rows = conn.execute(
+            "SELECT COUNT(*) AS total FROM data_quality_field_metrics WHERE batch_id = ?",
+            (batches[0]["batch_id"],),
+        ).fetchone()["total"]
+
+    (first_id, first_metrics, first_alerts), (second_id, _, second_alerts), (third_id, _, _) = results
+    total_cells = 2 * len(app_module.SURVEY_COLUMNS)
+
+    assert first_id == second_id != third_id
+    assert first_metrics["total_rows"] == 1
+    assert [tuple(row)[1:] for row in batches] == [
+        (2, round((total_cells - 2) / total_cells, 4)),
+        (1, 1.0),
+    ]
+    assert tuple(role_model_metrics) == (2, 2, 0.0)
+    assert field_rows == len(app_module.SURVEY_COLUMNS)
+    # The completeness breach alerts once for the whole batch.
+    assert [item["metric_name"] for item in first_alerts] == ["completeness_score"]
+    assert second_alerts == []
+
+
+def test_survey_writes_leave_monitoring_cache_warm(client, app_module, auth_token):
+    headers = {"X-Auth-Token": auth_token}
+    monitoring_url = "/api/data-quality/monitoring?page=1&pageSize=2"
+    assert client.get(monitoring_url, headers=headers).headers.get("X-Cache") == "MISS"
+    assert client.get(monitoring_url, headers=headers).headers.get("X-Cache") == "HIT"
+
+    app_module.invalidate_cached_responses(app_module.CACHE_TAG_SURVEYS)
+    app_module.survey_snapshot.load_frame(app_module.data)
+    assert client.get(monitoring_url, headers=headers).headers.get("X-Cache") == "HIT"
+
+    config_response = client.post(
+        "/api/data-quality/alerts/config",
+        headers=headers,
+        json={"completenessMin": 0.5, "duplicatesMax": 3, "outliersMax": 4},
+    )
+    assert config_response.status_code == 200
+    refreshed = client.get(monitoring_url, headers=headers)
+    assert refreshed.headers.get("X-Cache") == "MISS"
+    assert refreshed.get_json()["thresholds"]["duplicatesMax"] == 3
@@ -0,0 +1,130 @@
+import multiprocessing
+import threading
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+
+def _default_executor() -> Executor:
+    # Spawned workers keep torch state out of the web process and survive fork-unsafe libraries.
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+
+class BackgroundTrainingScheduler:
+    """
+    Runs model training off the request path.
+
+    ``local`` mode trains in a single worker process; at most one job runs at a
+    time and requests arriving meanwhile coalesce into one follow-up job on the
+    newest snapshot. ``celery`` mode hands the snapshot to a Celery task.
+    Rows are only converted (``records_provider()``) when a job actually
+    starts, so coalesced requests cost nothing. A pool broken by a crashed
+    worker is replaced; if a fresh one cannot take the job either, the error
+    lands in ``last_error`` and the scheduler goes back to ``idle``.
+    """
+
+    def __init__(
+        self,
+        train_fn_provider: Callable[[], Callable],
+        backend: str = "local",
+        celery_task=None,
+        executor_factory: Callable[[], Executor] = _default_executor,
+    ) -> None:
+        self.backend = backend if backend in {"local", "celery"} else "local"
+        self._train_fn_provider = train_fn_provider
+        self._celery_task = celery_task
+        self._executor_factory = executor_factory
+        self._executor: Optional[Executor] = None
+        # Re-entrant: a job that finishes instantly runs its callback inside submit().
+        self._lock = threading.RLock()
+        self._running = False
+        self._pending_records: Optional[Callable[[], list]] = None
+        self._status = {
+            "backend": self.backend,
+            "state": "idle",
+            "jobs_started": 0,
+            "jobs_completed": 0,
+            "last_started_at": None,
+            "last_completed_at": None,
+            "last_result": None,
+            "last_error": None,
+            "last_task_id": None,
+        }
+
+    def schedule(self, records_provider: Callable[[], list]) -> dict:
+        """Queue a training run on ``records_provider()`` (a snapshot of survey rows)."""
+        if self.backend == "celery" and self._celery_task is not None:
+            async_result = self._celery_task.delay(records_provider())
+            with self._lock:
+                self._status["jobs_started"] += 1
+                self._status["last_started_at"] = datetime.utcnow().isoformat()
+                self._status["last_task_id"] = getattr(async_result, "id", None)
+                self._status["state"] = "queued"
+            return self.status()
+
+        with self._lock:
+            if self._running:
+                # Coalesce: only the newest snapshot is trained after the current job.
+                self._pending_records = records_provider
+                self._status["state"] = "running_with_pending"
+                return dict(self._status)
+            self._start_locked(records_provider)
+        return self.status()
+
+    def status(self) -> dict:
+        with self._lock:
+            return dict(self._status)
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _start_locked(self, records_provider: Callable[[], list]) -> None:
+        records = records_provider()
+        train_fn = self._train_fn_provider()
+        for attempt in range(2):
+            if self._executor is None:
+                self._executor = self._executor_factory()
+            try:
+                future = self._executor.submit(train_fn, records)
+                break
+            except BrokenExecutor as exc:
+                self._discard_executor_locked()
+                if attempt:
+                    print(f"Background training could not start: {exc}")
+                    self._status["last_error"] = str(exc) or type(exc).__name__
+                    self._status["state"] = "idle"
+                    return
+        self._running = True
+        self._status["state"] = "running"
+        self._status["jobs_started"] += 1
+        self._status["last_started_at"] = datetime.utcnow().isoformat()
+        future.add_done_callback(self._on_done)
+
+    def _discard_executor_locked(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, future) -> None:
+        with self._lock:
+            self._status["jobs_completed"] += 1
+            self._status["last_completed_at"] = datetime.utcnow().isoformat()
+            try:
+                self._status["last_result"] = future.result()
+                self._status["last_error"] = None
+            except Exception as exc:
+                print(f"Background training failed: {exc}")
+                self._status["last_error"] = str(exc) or type(exc).__name__
+                if isinstance(exc, BrokenExecutor):
+                    # The worker died (e.g. killed for memory); the next job gets a new pool.
+                    self._discard_executor_locked()
+
+            self._running = False
+            pending, self._pending_records = self._pending_records, None
+            if pending is not None:
+                self._start_locked(pending)
+            else:
+                self._status["state"] = "idle"